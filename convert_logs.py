@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+串口日志离线转换工具
+功能: 把serial_logs中的日志文件（.txt/.rec/.bin，可为压缩文件）转换为CSV或NDJSON，不启动图形界面
+
+用法:
+    python convert_logs.py serial_logs -f csv -o exported -j 8
+"""
+
+import argparse
+import collections
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# 添加项目路径到sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, current_dir)
+
+from core.log_convert import (DEFAULT_CHUNK_SIZE, OUTPUT_CSV, OUTPUT_FORMATS, collect_log_files, convert_chunk,
+                              output_header, output_path, plan_chunks)
+
+
+def parse_args(argv):
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description="把串口日志文件转换为CSV或NDJSON")
+    parser.add_argument('paths', nargs='+', help="日志文件或目录")
+    parser.add_argument('-f', '--format', choices=OUTPUT_FORMATS, default=OUTPUT_CSV, help="输出格式（默认csv）")
+    parser.add_argument('-o', '--output-dir', default=None, help="输出目录（默认与日志文件相同）")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help="工作进程数（默认CPU核数）")
+    parser.add_argument('--chunk-mb', type=float, default=DEFAULT_CHUNK_SIZE / (1024 * 1024),
+                        help="大文件分块大小（MB，默认16）")
+    parser.add_argument('-q', '--quiet', action='store_true', help="不显示进度")
+    return parser.parse_args(argv)
+
+
+def format_size(nbytes):
+    """字节数的显示文本"""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if nbytes < 1024 or unit == 'GB':
+            return f"{nbytes:.1f} {unit}" if unit != 'B' else f"{nbytes} B"
+        nbytes /= 1024
+
+
+def convert(files, output_format, output_dir, jobs, chunk_size, quiet=False):
+    """
+    并行转换日志文件
+
+    各文件先按记录或行的边界分块，所有块交给进程池转换，结果按原顺序写入各自的输出文件。
+    同时提交的块数有上限，写入跟不上时不会在内存中堆积转换结果。
+
+    Args:
+        files: 日志文件路径列表
+        output_format: 'csv' 或 'ndjson'
+        output_dir: 输出目录，为None时与日志文件相同
+        jobs: 工作进程数
+        chunk_size: 分块大小（字节）
+        quiet: 是否不显示进度
+
+    Returns:
+        dict: 统计 {'files', 'failed', 'rows', 'bytes', 'elapsed'}
+    """
+    start = time.monotonic()
+    tasks = []
+    failed = 0
+    for path in files:
+        try:
+            chunks = plan_chunks(path, chunk_size)
+        except Exception as e:
+            print(f"跳过无法读取的文件: {path}: {str(e)}", file=sys.stderr)
+            failed += 1
+            continue
+        for i, chunk in enumerate(chunks):
+            tasks.append((path, i == len(chunks) - 1, chunk))
+    total_bytes = sum(chunk['bytes'] for _, _, chunk in tasks)
+
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+
+    stats = {'files': 0, 'failed': failed, 'rows': 0, 'bytes': 0, 'elapsed': 0.0}
+    current = None  # 正在写入的(日志文件路径, 输出文件)
+    with ProcessPoolExecutor(max_workers=max(1, jobs)) as executor:
+        pending = collections.deque()
+        next_task = 0
+        max_pending = max(1, jobs) * 2
+        while next_task < len(tasks) or pending:
+            while next_task < len(tasks) and len(pending) < max_pending:
+                path, last, chunk = tasks[next_task]
+                pending.append((path, last, executor.submit(convert_chunk, chunk, output_format)))
+                next_task += 1
+            # 按提交顺序取结果，保证输出顺序与日志一致
+            path, last, future = pending.popleft()
+            try:
+                text, rows, nbytes = future.result()
+            except Exception as e:
+                print(f"\n转换失败: {path}: {str(e)}", file=sys.stderr)
+                text, rows, nbytes = '', 0, 0
+                stats['failed'] += 1
+            if current is None or current[0] != path:
+                if current is not None:
+                    current[1].close()
+                out = open(output_path(path, output_dir, output_format), 'w', encoding='utf-8', newline='')
+                out.write(output_header(output_format))
+                current = (path, out)
+            current[1].write(text)
+            if last:
+                current[1].close()
+                current = None
+                stats['files'] += 1
+            stats['rows'] += rows
+            stats['bytes'] += nbytes
+            if not quiet:
+                elapsed = time.monotonic() - start
+                percent = stats['bytes'] * 100 / total_bytes if total_bytes else 100.0
+                rate = stats['bytes'] / elapsed if elapsed > 0 else 0
+                print(f"\r[{percent:5.1f}%] {format_size(stats['bytes'])} / {format_size(total_bytes)}  "
+                      f"{format_size(rate)}/s  {stats['rows']} 行", end='', file=sys.stderr, flush=True)
+    if current is not None:
+        current[1].close()
+    stats['elapsed'] = time.monotonic() - start
+    if not quiet:
+        print(file=sys.stderr)
+    return stats
+
+
+def main(argv=None):
+    """主函数"""
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    files = collect_log_files(args.paths)
+    if not files:
+        print("没有找到可转换的日志文件", file=sys.stderr)
+        return 1
+
+    stats = convert(files, args.format, args.output_dir, args.jobs,
+                    max(1, int(args.chunk_mb * 1024 * 1024)), args.quiet)
+
+    elapsed = stats['elapsed']
+    summary = (f"转换完成: {stats['files']} 个文件，{stats['rows']} 行，{format_size(stats['bytes'])}，"
+               f"用时 {elapsed:.2f} 秒，{format_size(stats['bytes'] / elapsed if elapsed > 0 else 0)}/s，"
+               f"{stats['rows'] / elapsed if elapsed > 0 else 0:.0f} 行/秒")
+    if stats['failed']:
+        summary += f"，失败 {stats['failed']} 个"
+    print(summary)
+    return 0 if not stats['failed'] else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
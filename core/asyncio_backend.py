@@ -0,0 +1,372 @@
+import asyncio
+import os
+import threading
+from .bounded_queue import POLICY_BLOCK
+
+
+class SerialTransport(asyncio.Transport):
+    """串口传输：通过loop.add_reader/add_writer在事件循环中非阻塞地读写串口"""
+
+    MAX_READ_SIZE = 64 * 1024
+
+    def __init__(self, loop, protocol, serial_port):
+        """
+        初始化串口传输（须在事件循环线程中创建）
+
+        Args:
+            loop: 事件循环
+            protocol: 串口协议对象
+            serial_port: 已打开的串口对象
+        """
+        super().__init__()
+        self._loop = loop
+        self._protocol = protocol
+        self._serial = serial_port
+        self._fd = serial_port.fileno()
+        self._write_buffer = bytearray()
+        self._writing = False
+        self._reading = True
+        self._closing = False
+        self._closed = False
+
+        self._loop.add_reader(self._fd, self._read_ready)
+        self._loop.call_soon(self._protocol.connection_made, self)
+
+    def get_extra_info(self, name, default=None):
+        """获取附加信息"""
+        if name == 'serial':
+            return self._serial
+        return default
+
+    def is_closing(self):
+        """是否正在关闭"""
+        return self._closing
+
+    def is_reading(self):
+        """是否正在监听读取"""
+        return self._reading and not self._closing
+
+    def pause_reading(self):
+        """暂停读取（数据留在驱动缓冲区中）"""
+        if not self.is_reading():
+            return
+        self._reading = False
+        self._loop.remove_reader(self._fd)
+
+    def resume_reading(self):
+        """恢复读取"""
+        if self._closing or self._reading:
+            return
+        self._reading = True
+        self._loop.add_reader(self._fd, self._read_ready)
+
+    def get_write_buffer_size(self):
+        """获取写缓冲区中尚未写出的字节数"""
+        return len(self._write_buffer)
+
+    def write(self, data):
+        """
+        写入数据（非阻塞，未能立即写出的部分进入写缓冲区）
+
+        Args:
+            data: 要写入的字节数据
+        """
+        if self._closing or not data:
+            return
+        if not self._write_buffer:
+            try:
+                written = os.write(self._fd, data)
+            except (BlockingIOError, InterruptedError):
+                written = 0
+            except OSError as e:
+                self._fatal_error(e)
+                return
+            data = data[written:]
+            if not data:
+                return
+        self._write_buffer += data
+        if not self._writing:
+            self._loop.add_writer(self._fd, self._write_ready)
+            self._writing = True
+
+    def close(self):
+        """关闭传输（写缓冲区写完后才真正关闭）"""
+        if self._closing:
+            return
+        self._closing = True
+        self._loop.remove_reader(self._fd)
+        if not self._write_buffer:
+            self._loop.call_soon(self._call_connection_lost, None)
+
+    def abort(self):
+        """立即关闭传输，丢弃写缓冲区"""
+        self._write_buffer.clear()
+        self._closing = True
+        self._loop.remove_reader(self._fd)
+        self._call_connection_lost(None)
+
+    def _read_ready(self):
+        """串口可读回调：直接读入协议提供的缓冲区"""
+        buffer = self._protocol.get_buffer(self.MAX_READ_SIZE)
+        if not len(buffer):
+            # 协议暂时没有可写空间
+            self._protocol.buffer_updated(0)
+            return
+        try:
+            nbytes = os.readv(self._fd, [buffer])
+        except (BlockingIOError, InterruptedError):
+            self._protocol.buffer_updated(0)
+            return
+        except OSError as e:
+            self._protocol.buffer_updated(0)
+            self._fatal_error(e)
+            return
+        self._protocol.buffer_updated(nbytes)
+        if not nbytes:
+            # 设备报告可读却读不到数据，说明设备已断开
+            self._fatal_error(ConnectionError("设备已断开"))
+
+    def _write_ready(self):
+        """串口可写回调"""
+        try:
+            written = os.write(self._fd, self._write_buffer)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as e:
+            self._fatal_error(e)
+            return
+        del self._write_buffer[:written]
+        if not self._write_buffer:
+            self._loop.remove_writer(self._fd)
+            self._writing = False
+            if self._closing:
+                self._call_connection_lost(None)
+
+    def _fatal_error(self, exc):
+        """发生不可恢复的错误时关闭传输"""
+        self._write_buffer.clear()
+        self._closing = True
+        self._loop.remove_reader(self._fd)
+        self._call_connection_lost(exc)
+
+    def _call_connection_lost(self, exc):
+        """通知协议连接已断开"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._writing:
+            self._loop.remove_writer(self._fd)
+            self._writing = False
+        self._protocol.connection_lost(exc)
+
+
+class SerialProtocol(asyncio.BufferedProtocol):
+    """串口协议：传输直接把数据读入串口的接收环形缓冲区，再通知后端回调
+
+    block策略的环形缓冲区写满时暂停传输的读取，消费者腾出空间后再恢复。
+    """
+
+    PAUSE_POLL_INTERVAL = 0.01  # 暂停读取时检查缓冲区空间的间隔（秒）
+
+    def __init__(self, port_name, ring, on_data, on_error):
+        """
+        初始化串口协议
+
+        Args:
+            port_name: 串口名称
+            ring: ByteRingBuffer 串口的接收环形缓冲区
+            on_data: 数据回调 on_data(port_name, nbytes)
+            on_error: 错误回调 on_error(port_name, error_message)
+        """
+        self.port_name = port_name
+        self.ring = ring
+        self.on_data = on_data
+        self.on_error = on_error
+        self.transport = None
+        self.loop = None
+
+    def connection_made(self, transport):
+        """连接建立"""
+        self.transport = transport
+        self.loop = asyncio.get_running_loop()
+
+    def get_buffer(self, sizehint):
+        """提供接收环形缓冲区中的下一段可写区域"""
+        return self.ring.writable_view(sizehint if sizehint > 0 else None)
+
+    def buffer_updated(self, nbytes):
+        """数据已写入get_buffer()返回的区域"""
+        self.ring.commit(nbytes)
+        if nbytes:
+            self.on_data(self.port_name, nbytes)
+        if self.ring.policy == POLICY_BLOCK and self.ring.is_full():
+            self.transport.pause_reading()
+            self.loop.call_later(self.PAUSE_POLL_INTERVAL, self._check_space)
+
+    def _check_space(self):
+        """环形缓冲区有空间后恢复读取"""
+        if self.transport is None or self.transport.is_closing():
+            return
+        if self.ring.policy == POLICY_BLOCK and self.ring.is_full():
+            self.loop.call_later(self.PAUSE_POLL_INTERVAL, self._check_space)
+        else:
+            self.transport.resume_reading()
+
+    def connection_lost(self, exc):
+        """连接断开"""
+        if exc is not None:
+            self.on_error(self.port_name, f"接收数据错误: {str(exc)}")
+
+
+class AsyncioSerialBackend:
+    """asyncio串口后端
+
+    在专用线程中运行一个事件循环，每个串口对应一个protocol/transport，
+    读取通过loop.add_reader等待串口文件描述符并直接读入接收环形缓冲区，
+    写入排队后非阻塞写出。
+    仅支持可以提供文件描述符的POSIX平台。
+    """
+
+    def __init__(self, on_data, on_error):
+        """
+        初始化asyncio串口后端
+
+        Args:
+            on_data: 数据回调 on_data(port_name, nbytes)，数据写入环形缓冲区后在事件循环线程中调用
+            on_error: 错误回调 on_error(port_name, error_message)，在事件循环线程中调用
+        """
+        self.on_data = on_data
+        self.on_error = on_error
+        self.loop = None
+        self._thread = None
+        self._transports = {}  # 串口传输 {port_name: SerialTransport}（仅事件循环线程访问）
+
+    @staticmethod
+    def is_supported():
+        """
+        检查当前平台是否支持
+
+        Returns:
+            bool: 是否支持
+        """
+        return os.name == 'posix'
+
+    def start(self):
+        """启动事件循环线程"""
+        if self.loop is not None and self.loop.is_running():
+            return
+        self.loop = asyncio.new_event_loop()
+        started = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(started,), daemon=True)
+        self._thread.start()
+        started.wait(1.0)
+
+    def stop(self):
+        """关闭所有串口传输并停止事件循环"""
+        if self.loop is None:
+            return
+        for port_name in list(self._transports.keys()):
+            self.unregister(port_name)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self.loop.close()
+        self.loop = None
+
+    def register(self, port_name, serial_port, ring, timeout=1.0):
+        """
+        注册串口，为其创建protocol/transport
+
+        Args:
+            port_name: 串口名称
+            serial_port: 已打开的串口对象
+            ring: ByteRingBuffer 串口的接收环形缓冲区
+            timeout: 等待完成的超时时间（秒）
+
+        Returns:
+            bool: 是否注册成功
+        """
+        return self._call(self._register, timeout, port_name, serial_port, ring)
+
+    def unregister(self, port_name, timeout=1.0):
+        """
+        注销串口（返回后事件循环不再访问该串口）
+
+        Args:
+            port_name: 串口名称
+            timeout: 等待完成的超时时间（秒）
+
+        Returns:
+            bool: 是否注销成功
+        """
+        return self._call(self._unregister, timeout, port_name)
+
+    def write(self, port_name, data):
+        """
+        排队写入数据（非阻塞，可在任意线程调用）
+
+        Args:
+            port_name: 串口名称
+            data: 要写入的字节数据
+
+        Returns:
+            bool: 是否成功排队
+        """
+        if self.loop is None or not self.loop.is_running():
+            return False
+        self.loop.call_soon_threadsafe(self._write, port_name, bytes(data))
+        return True
+
+    def get_registered_ports(self):
+        """获取已注册的串口名称列表"""
+        return list(self._transports.keys())
+
+    def _run(self, started):
+        """事件循环线程主函数"""
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(started.set)
+        try:
+            self.loop.run_forever()
+        except Exception as e:
+            self.on_error("", f"asyncio后端线程错误: {str(e)}")
+
+    def _call(self, func, timeout, *args):
+        """在事件循环线程中执行函数并等待结果"""
+        if self.loop is None or not self.loop.is_running():
+            return False
+
+        async def runner():
+            return func(*args)
+
+        future = asyncio.run_coroutine_threadsafe(runner(), self.loop)
+        try:
+            return future.result(timeout)
+        except Exception as e:
+            self.on_error(args[0] if args else "", f"asyncio后端操作失败: {str(e)}")
+            return False
+
+    def _register(self, port_name, serial_port, ring):
+        """创建串口传输（事件循环线程）"""
+        self._unregister(port_name)
+        protocol = SerialProtocol(port_name, ring, self.on_data, self._on_protocol_error)
+        self._transports[port_name] = SerialTransport(self.loop, protocol, serial_port)
+        return True
+
+    def _unregister(self, port_name):
+        """关闭串口传输（事件循环线程）"""
+        transport = self._transports.pop(port_name, None)
+        if transport is not None:
+            transport.abort()
+        return True
+
+    def _write(self, port_name, data):
+        """写入数据（事件循环线程）"""
+        transport = self._transports.get(port_name)
+        if transport is not None:
+            transport.write(data)
+
+    def _on_protocol_error(self, port_name, error_message):
+        """协议出错时移除串口传输并上报错误"""
+        self._transports.pop(port_name, None)
+        self.on_error(port_name, error_message)
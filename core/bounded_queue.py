@@ -0,0 +1,249 @@
+import collections
+import threading
+import time
+
+
+# 溢出策略
+POLICY_DROP_OLDEST = 'drop_oldest'  # 丢弃最旧的数据
+POLICY_DROP_NEWEST = 'drop_newest'  # 丢弃新到达的数据
+POLICY_BLOCK = 'block'              # 阻塞生产者直到有空间
+OVERFLOW_POLICIES = (POLICY_DROP_OLDEST, POLICY_DROP_NEWEST, POLICY_BLOCK)
+
+
+def check_policy(policy):
+    """
+    检查溢出策略是否有效
+
+    Args:
+        policy: 溢出策略
+
+    Returns:
+        str: 有效的溢出策略
+
+    Raises:
+        ValueError: 策略无效
+    """
+    if policy not in OVERFLOW_POLICIES:
+        raise ValueError(f"无效的溢出策略: {policy}")
+    return policy
+
+
+class BoundedQueue:
+    """有界队列
+
+    同时按条数和字节数限制容量，队列满时按溢出策略处理：
+    drop_oldest 丢弃队首最旧的数据，drop_newest 丢弃新放入的数据，
+    block 阻塞生产者直到消费者腾出空间（或超时）。
+    被丢弃的条数和字节数会被计数，便于在界面上显示过载情况。
+    """
+
+    def __init__(self, max_items=64, max_bytes=4 * 1024 * 1024, policy=POLICY_DROP_OLDEST):
+        """
+        初始化有界队列
+
+        Args:
+            max_items: 最大条数
+            max_bytes: 最大字节数
+            policy: 溢出策略
+        """
+        self.max_items = max(1, int(max_items))
+        self.max_bytes = max(1, int(max_bytes))
+        self.policy = check_policy(policy)
+
+        self._items = collections.deque()
+        self._nbytes = 0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+
+        self.high_water = 0      # 队列字节数的历史最高值
+        self.dropped_items = 0   # 丢弃的条数
+        self.dropped_bytes = 0   # 丢弃的字节数
+
+    def __len__(self):
+        """队列中的条数"""
+        return len(self._items)
+
+    @property
+    def nbytes(self):
+        """队列中的字节数"""
+        return self._nbytes
+
+    @property
+    def closed(self):
+        """队列是否已关闭"""
+        return self._closed
+
+    def set_policy(self, policy):
+        """
+        设置溢出策略
+
+        Args:
+            policy: 溢出策略
+        """
+        with self._lock:
+            self.policy = check_policy(policy)
+            # 切换出阻塞策略时唤醒等待中的生产者
+            self._not_full.notify_all()
+
+    def is_full(self, size=0):
+        """
+        检查放入指定大小的数据后是否会超出容量
+
+        Args:
+            size: 将要放入的字节数
+
+        Returns:
+            bool: 是否已满
+        """
+        return self._is_full(size)
+
+    def room(self):
+        """
+        当前可以放入而不触发溢出的字节数
+
+        Returns:
+            int: 字节数，条数已满时为0
+        """
+        with self._lock:
+            if not self._items:
+                return self.max_bytes
+            if len(self._items) >= self.max_items:
+                return 0
+            return max(0, self.max_bytes - self._nbytes)
+
+    def put(self, item, timeout=None, size=None):
+        """
+        放入数据
+
+        Args:
+            item: 字节数据（或任意对象，此时须给出size）
+            timeout: block策略下的最长等待时间（秒），为None时一直等待，
+                     超时仍无空间时数据计为丢弃
+            size: 计入容量的字节数，为None时取len(item)
+
+        Returns:
+            bool: 是否放入队列（被丢弃返回False）
+        """
+        if size is None:
+            size = len(item)
+        with self._lock:
+            if self._closed:
+                return False
+            if self._is_full(size):
+                if self.policy == POLICY_DROP_NEWEST:
+                    self._count_drop(size)
+                    return False
+                if self.policy == POLICY_BLOCK:
+                    deadline = None if timeout is None else time.monotonic() + timeout
+                    while (self._is_full(size) and not self._closed and
+                           self.policy == POLICY_BLOCK):
+                        remaining = None if deadline is None else deadline - time.monotonic()
+                        if remaining is not None and remaining <= 0:
+                            self._count_drop(size)
+                            return False
+                        self._not_full.wait(remaining)
+                    if self._closed:
+                        return False
+                # drop_oldest（或等待期间切换为非阻塞策略）：丢弃最旧的数据腾出空间
+                while self._items and self._is_full(size):
+                    _, dropped = self._items.popleft()
+                    self._nbytes -= dropped
+                    self._count_drop(dropped)
+            self._items.append((item, size))
+            self._nbytes += size
+            if self._nbytes > self.high_water:
+                self.high_water = self._nbytes
+            self._not_empty.notify()
+            return True
+
+    def get(self, timeout=None):
+        """
+        取出一条数据
+
+        Args:
+            timeout: 最长等待时间（秒），为None时一直等待，为0时不等待
+
+        Returns:
+            取出的数据，队列为空（超时或已关闭）时返回None
+        """
+        with self._lock:
+            if timeout is None:
+                while not self._items and not self._closed:
+                    self._not_empty.wait()
+            elif timeout > 0 and not self._items and not self._closed:
+                self._not_empty.wait_for(lambda: self._items or self._closed, timeout)
+            if not self._items:
+                return None
+            return self._pop()
+
+    def get_all(self):
+        """
+        取出当前队列中的所有数据（不等待）
+
+        Returns:
+            list: 数据列表
+        """
+        with self._lock:
+            items = [item for item, _ in self._items]
+            self._items.clear()
+            self._nbytes = 0
+            self._not_full.notify_all()
+            return items
+
+    def clear(self):
+        """丢弃队列中的所有数据（不计入丢弃统计）"""
+        self.get_all()
+
+    def close(self):
+        """关闭队列，唤醒所有等待中的生产者和消费者"""
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+
+    def get_drop_counts(self):
+        """
+        获取丢弃计数
+
+        Returns:
+            tuple: (丢弃字节数, 丢弃条数)
+        """
+        return (self.dropped_bytes, self.dropped_items)
+
+    def get_statistics(self):
+        """
+        获取队列统计
+
+        Returns:
+            dict: 条数、字节数、高水位、丢弃条数及字节数
+        """
+        with self._lock:
+            return {
+                'items': len(self._items),
+                'bytes': self._nbytes,
+                'max_items': self.max_items,
+                'max_bytes': self.max_bytes,
+                'high_water': self.high_water,
+                'dropped_items': self.dropped_items,
+                'dropped_bytes': self.dropped_bytes
+            }
+
+    def _is_full(self, size):
+        """放入size字节后是否超出容量（空队列总能放入一条）"""
+        if not self._items:
+            return False
+        return len(self._items) >= self.max_items or self._nbytes + size > self.max_bytes
+
+    def _pop(self):
+        """取出队首数据（调用者持有锁）"""
+        item, size = self._items.popleft()
+        self._nbytes -= size
+        self._not_full.notify()
+        return item
+
+    def _count_drop(self, size):
+        """计入一次丢弃（调用者持有锁）"""
+        self.dropped_items += 1
+        self.dropped_bytes += size
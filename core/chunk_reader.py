@@ -0,0 +1,115 @@
+import os
+import select
+from .bounded_queue import POLICY_BLOCK
+
+
+class ChunkReader:
+    """串口分块读取器，按突发(burst)整块读取串口数据
+
+    不做任何行分帧：首字节到达前阻塞等待，之后持续读取已到达的数据，
+    直到读满当前块大小或字节间隔超过字节间超时，这段数据作为一块写入环形缓冲区。
+    块大小会根据实际吞吐量自适应调整。
+    环形缓冲区为block策略且已满时，不再从串口读取，而是等待消费者腾出空间。
+    """
+
+    MIN_CHUNK_SIZE = 256
+    MAX_CHUNK_SIZE = 64 * 1024
+    DEFAULT_CHUNK_SIZE = 4096
+    DEFAULT_BLOCK_TIMEOUT = 0.1
+
+    def __init__(self, serial_port, block_timeout=DEFAULT_BLOCK_TIMEOUT, inter_byte_timeout=None):
+        """
+        初始化分块读取器
+
+        Args:
+            serial_port: 已打开的串口对象
+            block_timeout: 等待首字节的最长阻塞时间（秒）
+            inter_byte_timeout: 字节间超时（秒），为None时按波特率自动计算
+        """
+        self.serial_port = serial_port
+        self.block_timeout = block_timeout
+        if inter_byte_timeout is None:
+            inter_byte_timeout = self.calc_inter_byte_timeout(serial_port.baudrate)
+        self.inter_byte_timeout = inter_byte_timeout
+        self.chunk_size = self.DEFAULT_CHUNK_SIZE
+
+        # POSIX下pyserial的read基于select实现，字节间超时由本类自行处理；
+        # 其他平台（Windows）直接使用驱动层的字节间超时
+        self._use_select = os.name == 'posix' and hasattr(serial_port, 'fileno')
+
+        self.serial_port.timeout = block_timeout
+        if not self._use_select:
+            self.serial_port.inter_byte_timeout = inter_byte_timeout
+
+    @staticmethod
+    def calc_inter_byte_timeout(baudrate):
+        """
+        根据波特率计算字节间超时
+
+        Args:
+            baudrate: 波特率
+
+        Returns:
+            float: 约4个字符时间的超时（秒），最小1ms
+        """
+        char_time = 10.0 / max(int(baudrate), 1)
+        return max(0.001, char_time * 4)
+
+    def read_into(self, ring):
+        """
+        读取一块数据，直接写入环形缓冲区
+
+        Args:
+            ring: ByteRingBuffer 接收环形缓冲区
+
+        Returns:
+            int: 本次读取的字节数，超时无数据时返回0
+        """
+        if ring.policy == POLICY_BLOCK and ring.is_full():
+            # 阻塞读取方：数据留在串口驱动缓冲区中，直到消费者腾出空间
+            ring.wait_for_space(self.block_timeout)
+            return 0
+        
+        if self._use_select:
+            total = self._read_into_select(ring)
+        else:
+            total = ring.fill_from(self.serial_port.readinto, self.chunk_size)
+        self._adapt_chunk_size(total)
+        return total
+
+    def _read_into_select(self, ring):
+        """POSIX平台下的分块读取实现"""
+        serial_port = self.serial_port
+        size = self.chunk_size
+
+        waiting = serial_port.in_waiting
+        if waiting:
+            total = ring.fill_from(serial_port.readinto, min(waiting, size))
+        else:
+            # 阻塞等待首字节（超时由串口timeout控制）
+            total = ring.fill_from(serial_port.readinto, 1)
+            if not total:
+                return 0
+
+        while total < size:
+            waiting = serial_port.in_waiting
+            if waiting:
+                nbytes = ring.fill_from(serial_port.readinto, min(waiting, size - total))
+                if not nbytes:
+                    # 环形缓冲区已满（block策略），本块到此结束
+                    break
+                total += nbytes
+                continue
+            # 等待同一突发中的后续字节，超过字节间超时则认为本块结束
+            ready, _, _ = select.select([serial_port.fileno()], [], [], self.inter_byte_timeout)
+            if not ready:
+                break
+
+        return total
+
+    def _adapt_chunk_size(self, length):
+        """根据本次读取长度调整下次的块大小"""
+        if length >= self.chunk_size:
+            self.chunk_size = min(self.chunk_size * 2, self.MAX_CHUNK_SIZE)
+        elif length < self.chunk_size // 4:
+            self.chunk_size = max(self.chunk_size // 2, self.MIN_CHUNK_SIZE)
@@ -0,0 +1,390 @@
+import threading
+from PyQt6.QtCore import QObject, pyqtSignal
+from .bounded_queue import BoundedQueue, POLICY_BLOCK, POLICY_DROP_OLDEST
+
+
+class DataConsumer(QObject):
+    """数据消费者
+
+    每个串口对应一个有界队列，由消费者自己的工作线程（或GUI线程）取出并处理，
+    处理慢的消费者只会让自己的队列积压，不影响其他消费者和串口读取。
+    """
+
+    # 定义信号
+    _queued = pyqtSignal(str)  # GUI模式下通知GUI线程处理 (port_name)
+
+    def __init__(self, name, callback, use_thread=True, max_items=64,
+                 max_bytes=4 * 1024 * 1024, coalesce=True, on_space=None):
+        """
+        初始化数据消费者（须在GUI线程中创建）
+
+        Args:
+            name: 消费者名称
+            callback: 处理函数 callback(port_name, data)
+            use_thread: True在独立工作线程中处理，False在GUI线程中处理
+            max_items: 每个串口队列的最大批次数
+            max_bytes: 每个串口队列的最大字节数
+            coalesce: 是否把一次取出的多个批次合并后再交给处理函数
+            on_space: 队列被取空后的回调 on_space(port_name)，用于恢复block策略下暂停的消费
+        """
+        super().__init__()
+        self.name = name
+        self.callback = callback
+        self.use_thread = use_thread
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.coalesce = coalesce
+        self.on_space = on_space
+
+        self._queues = {}  # 串口队列 {port_name: BoundedQueue}
+        self._cond = threading.Condition()
+        self._active = False   # 工作线程是否正在处理
+        self._notified = set()  # GUI模式下已发出通知但尚未处理的串口
+        self._running = False
+        self._thread = None
+
+        self._queued.connect(self._process_port)
+
+    def start(self):
+        """启动工作线程（GUI模式下无需线程）"""
+        if self._running:
+            return
+        self._running = True
+        if self.use_thread:
+            self._thread = threading.Thread(target=self._work_loop, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """处理完剩余数据后停止工作线程"""
+        if not self._running:
+            return
+        self.drain()
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def add_port(self, port_name, policy=POLICY_DROP_OLDEST):
+        """
+        为串口创建队列
+
+        Args:
+            port_name: 串口名称
+            policy: 溢出策略
+        """
+        queue = BoundedQueue(self.max_items, self.max_bytes, policy)
+        with self._cond:
+            self._queues[port_name] = queue
+
+    def remove_port(self, port_name):
+        """
+        移除串口队列（未处理的数据被丢弃）
+
+        Args:
+            port_name: 串口名称
+        """
+        with self._cond:
+            queue = self._queues.pop(port_name, None)
+            self._notified.discard(port_name)
+        if queue is not None:
+            queue.close()
+
+    def get_queue(self, port_name):
+        """获取串口队列，不存在时返回None"""
+        return self._queues.get(port_name)
+
+    def put(self, port_name, data):
+        """
+        放入一个批次（发布线程调用，不阻塞）
+
+        Args:
+            port_name: 串口名称
+            data: 字节数据
+        """
+        queue = self._queues.get(port_name)
+        if queue is None:
+            return
+        queue.put(data, timeout=0)
+        with self._cond:
+            if self.use_thread:
+                self._cond.notify()
+                return
+            # 上次通知尚未处理时不再重复投递Qt事件
+            notify = port_name not in self._notified
+            self._notified.add(port_name)
+        if notify:
+            self._queued.emit(port_name)
+
+    def room(self, port_name):
+        """
+        block策略下串口队列当前可放入的字节数
+
+        Args:
+            port_name: 串口名称
+
+        Returns:
+            int: 可放入的字节数，非block策略时返回None（不限制）
+        """
+        queue = self._queues.get(port_name)
+        if queue is None or queue.policy != POLICY_BLOCK:
+            return None
+        return queue.room()
+
+    def drain(self, port_name=None, timeout=1.0):
+        """
+        处理完队列中已有的数据
+
+        GUI模式下在调用线程（GUI线程）中立即处理，线程模式下等待工作线程处理完毕。
+
+        Args:
+            port_name: 串口名称，为None时处理所有串口
+            timeout: 线程模式下的最长等待时间（秒）
+
+        Returns:
+            bool: 是否已处理完毕
+        """
+        if not self.use_thread:
+            ports = [port_name] if port_name is not None else list(self._queues.keys())
+            for port in ports:
+                self._process_port(port)
+            return True
+        with self._cond:
+            if self._thread is None or not self._thread.is_alive():
+                return False
+            return self._cond.wait_for(lambda: not self._active and not self._has_data(port_name), timeout)
+
+    def get_statistics(self, port_name):
+        """
+        获取串口队列统计
+
+        Args:
+            port_name: 串口名称
+
+        Returns:
+            dict: 队列统计，串口不存在时为空字典
+        """
+        queue = self._queues.get(port_name)
+        return queue.get_statistics() if queue is not None else {}
+
+    def _has_data(self, port_name=None):
+        """队列中是否还有数据（调用者持有锁）"""
+        if port_name is not None:
+            queue = self._queues.get(port_name)
+            return queue is not None and len(queue) > 0
+        return any(len(queue) for queue in self._queues.values())
+
+    def _work_loop(self):
+        """工作线程主循环"""
+        while True:
+            with self._cond:
+                while self._running and not self._has_data():
+                    self._cond.wait()
+                if not self._running and not self._has_data():
+                    return
+                self._active = True
+                ports = list(self._queues.keys())
+            try:
+                for port_name in ports:
+                    self._process_port(port_name)
+            finally:
+                with self._cond:
+                    self._active = False
+                    self._cond.notify_all()
+
+    def _process_port(self, port_name):
+        """取出串口队列中的所有批次并处理"""
+        with self._cond:
+            self._notified.discard(port_name)
+            queue = self._queues.get(port_name)
+        if queue is None:
+            return
+        batches = queue.get_all()
+        if not batches:
+            return
+        if self.on_space is not None:
+            self.on_space(port_name)
+        if self.coalesce:
+            batches = [batches[0] if len(batches) == 1 else b''.join(batches)]
+        for data in batches:
+            try:
+                self.callback(port_name, data)
+            except Exception as e:
+                print(f"消费者 {self.name} 处理串口 {port_name} 数据失败: {str(e)}")
+
+
+class ConsumerBus:
+    """数据分发总线
+
+    合并后的接收数据批次发布到总线，由总线复制给每个订阅的消费者（显示、保存、解码器等）。
+    每个消费者为每个串口维护自己的有界队列，发布不会被任何消费者阻塞；
+    只有block策略的串口会按最慢消费者的剩余空间限制发布方取出数据的速度。
+    """
+
+    def __init__(self, on_space=None):
+        """
+        初始化数据分发总线
+
+        Args:
+            on_space: 任一消费者取空某串口队列后的回调 on_space(port_name)
+        """
+        self.on_space = on_space
+        self.consumers = {}  # 消费者 {name: DataConsumer}
+        self.port_policies = {}  # 已注册串口的溢出策略 {port_name: policy}
+        self._lock = threading.Lock()
+
+    def subscribe(self, name, callback, use_thread=True, max_items=64,
+                  max_bytes=4 * 1024 * 1024, coalesce=True):
+        """
+        订阅接收数据（须在GUI线程中调用）
+
+        Args:
+            name: 消费者名称，已存在时替换原消费者
+            callback: 处理函数 callback(port_name, data)
+            use_thread: True在独立工作线程中处理，False在GUI线程中处理
+            max_items: 每个串口队列的最大批次数
+            max_bytes: 每个串口队列的最大字节数
+            coalesce: 是否把一次取出的多个批次合并后再交给处理函数
+
+        Returns:
+            DataConsumer: 消费者对象
+        """
+        self.unsubscribe(name)
+        consumer = DataConsumer(name, callback, use_thread, max_items, max_bytes,
+                                coalesce, self.on_space)
+        with self._lock:
+            for port_name, policy in self.port_policies.items():
+                consumer.add_port(port_name, policy)
+            self.consumers[name] = consumer
+        consumer.start()
+        return consumer
+
+    def unsubscribe(self, name):
+        """
+        取消订阅（处理完已排队的数据后停止）
+
+        Args:
+            name: 消费者名称
+        """
+        with self._lock:
+            consumer = self.consumers.pop(name, None)
+        if consumer is not None:
+            consumer.stop()
+
+    def register_port(self, port_name, policy=POLICY_DROP_OLDEST):
+        """
+        注册串口，为每个消费者创建队列
+
+        Args:
+            port_name: 串口名称
+            policy: 溢出策略
+        """
+        with self._lock:
+            self.port_policies[port_name] = policy
+            for consumer in self.consumers.values():
+                consumer.add_port(port_name, policy)
+
+    def unregister_port(self, port_name):
+        """
+        注销串口，移除各消费者的队列
+
+        Args:
+            port_name: 串口名称
+        """
+        with self._lock:
+            self.port_policies.pop(port_name, None)
+            consumers = list(self.consumers.values())
+        for consumer in consumers:
+            consumer.remove_port(port_name)
+
+    def set_policy(self, port_name, policy):
+        """
+        设置串口的溢出策略
+
+        Args:
+            port_name: 串口名称
+            policy: 溢出策略
+        """
+        with self._lock:
+            if port_name not in self.port_policies:
+                return
+            self.port_policies[port_name] = policy
+            consumers = list(self.consumers.values())
+        for consumer in consumers:
+            queue = consumer.get_queue(port_name)
+            if queue is not None:
+                queue.set_policy(policy)
+
+    def publish(self, port_name, data):
+        """
+        发布数据批次给所有消费者（不阻塞）
+
+        Args:
+            port_name: 串口名称
+            data: 字节数据
+        """
+        for consumer in list(self.consumers.values()):
+            consumer.put(port_name, data)
+
+    def room(self, port_name):
+        """
+        block策略下所有消费者都能放入的字节数
+
+        Args:
+            port_name: 串口名称
+
+        Returns:
+            int: 可放入的字节数，没有block策略的队列时返回None（不限制）
+        """
+        rooms = [room for room in (consumer.room(port_name) for consumer in list(self.consumers.values()))
+                 if room is not None]
+        return min(rooms) if rooms else None
+
+    def drain(self, port_name=None, timeout=1.0):
+        """
+        等待所有消费者处理完已排队的数据
+
+        Args:
+            port_name: 串口名称，为None时处理所有串口
+            timeout: 每个线程消费者的最长等待时间（秒）
+        """
+        for consumer in list(self.consumers.values()):
+            consumer.drain(port_name, timeout)
+
+    def get_drop_counts(self, port_name):
+        """
+        获取串口在所有消费者队列中的丢弃计数
+
+        Args:
+            port_name: 串口名称
+
+        Returns:
+            tuple: (丢弃字节数, 丢弃批次数)
+        """
+        dropped_bytes = dropped_items = 0
+        for consumer in list(self.consumers.values()):
+            queue = consumer.get_queue(port_name)
+            if queue is not None:
+                nbytes, nitems = queue.get_drop_counts()
+                dropped_bytes += nbytes
+                dropped_items += nitems
+        return dropped_bytes, dropped_items
+
+    def get_statistics(self, port_name):
+        """
+        获取串口在各消费者队列中的统计
+
+        Args:
+            port_name: 串口名称
+
+        Returns:
+            dict: {消费者名称: 队列统计}
+        """
+        return {name: consumer.get_statistics(port_name)
+                for name, consumer in list(self.consumers.items())}
+
+    def close(self):
+        """处理完剩余数据后停止所有消费者"""
+        for name in list(self.consumers.keys()):
+            self.unsubscribe(name)
@@ -1,27 +1,294 @@
+import io
 import os
 import time
-from datetime import datetime
+import codecs
+import bisect
+import struct
+import threading
+from datetime import datetime, timedelta
 from pathlib import Path
+from .bounded_queue import BoundedQueue, POLICY_BLOCK
+from .record_log import DIRECTION_RX, encode_file_header, encode_record, encode_sync
+from .log_compression import (COMPRESS_NONE, COMPRESS_LZMA, COMPRESS_STREAM, COMPRESS_ROTATED, COMPRESSION_MODES,
+                              COMPRESSION_SUFFIXES, COMPRESS_JOURNAL, CompressionWorker, check_compression,
+                              open_compressed_writer, open_log)
+from .log_janitor import LogJanitor, LOG_SUFFIXES, TEMP_SUFFIX
+from .log_rotation import RotationWorker
+from .durable_log import COMMIT_CLOSED, COMMIT_MAGIC, COMMIT_SUFFIX, CommitWriter, encode_commit, recover_sessions
+from .time_index import (INDEXED_RECORD, INDEXED_TEXT, TIME_INDEX_SUFFIX, SessionTimeIndex,
+                         encode_time_index_entry, encode_time_index_header)
+
+
+# 刷新策略
+FLUSH_ALWAYS = 'always'      # 每次写入后刷新
+FLUSH_BYTES = 'bytes'        # 未刷新数据达到指定字节数时刷新
+FLUSH_INTERVAL = 'interval'  # 距上次刷新超过指定时间时刷新
+FLUSH_ROTATION = 'rotation'  # 仅在切换/关闭文件时刷新
+FLUSH_POLICIES = (FLUSH_ALWAYS, FLUSH_BYTES, FLUSH_INTERVAL, FLUSH_ROTATION)
+
+# 按时间切换文件
+ROTATE_NONE = 'none'      # 不按时间切换
+ROTATE_HOURLY = 'hourly'  # 每个整点切换
+ROTATE_DAILY = 'daily'    # 每天零点切换
+ROTATION_INTERVALS = (ROTATE_NONE, ROTATE_HOURLY, ROTATE_DAILY)
+
+# 保存格式
+SAVE_TEXT = 'text'  # 带时间戳的文本记录 (.txt)
+SAVE_RAW = 'raw'    # 原始字节 (.bin) 及时间索引 (.idx)
+SAVE_BOTH = 'both'  # 原始字节及索引，同时生成文本记录
+SAVE_RECORD = 'record'  # 带长度前缀的收发记录日志 (.rec)，格式见record_log
+SAVE_FORMATS = (SAVE_TEXT, SAVE_RAW, SAVE_BOTH, SAVE_RECORD)
+
+# 文本记录 (.txt) 格式：以'#'开头的文件头和结束信息，之间每行为 "[时:分:秒.毫秒] 数据"
+TEXT_TIME_FORMAT = '%H:%M:%S.%f'               # 行首时间戳（去掉末尾三位即为毫秒）
+TEXT_HEADER_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'  # 文件头中的开始/结束时间
+TEXT_PORT_PREFIX = '# 串口: '
+TEXT_START_PREFIX = '# 开始时间: '
+
+# 原始字节索引文件 (.idx) 格式：
+# 文件头为 魔数、开始时的系统时间(ns)、开始时的单调时间(ns)，
+# 之后每个数据块一条记录：到达单调时间(ns)、在.bin文件中的偏移、长度
+INDEX_MAGIC = b'SRIDX001'
+INDEX_HEADER = struct.Struct('<8sqq')
+INDEX_RECORD = struct.Struct('<QQI')
+
+
+def load_capture_index(index_path):
+    """
+    读取原始字节索引文件（压缩的文件自动解压）
+    
+    Args:
+        index_path: 索引文件路径
+        
+    Returns:
+        tuple: (开始系统时间ns, 开始单调时间ns, [(到达单调时间ns, 偏移, 长度), ...])
+        
+    Raises:
+        ValueError: 文件格式无效
+    """
+    with open_log(index_path) as f:
+        data = f.read()
+    if len(data) < INDEX_HEADER.size:
+        raise ValueError(f"索引文件不完整: {index_path}")
+    magic, wall_ns, monotonic_ns = INDEX_HEADER.unpack_from(data)
+    if magic != INDEX_MAGIC:
+        raise ValueError(f"无效的索引文件: {index_path}")
+    # 忽略异常结束时末尾不完整的记录
+    body = memoryview(data)[INDEX_HEADER.size:]
+    body = body[:len(body) - len(body) % INDEX_RECORD.size]
+    return wall_ns, monotonic_ns, list(INDEX_RECORD.iter_unpack(body))
+
+
+def parse_text_header(lines):
+    """
+    解析文本记录的文件头
+    
+    Args:
+        lines: 文件开头的若干行
+        
+    Returns:
+        dict: {'port': 串口名称, 'start': 开始时间datetime}，缺少的项为None
+    """
+    header = {'port': None, 'start': None}
+    for line in lines:
+        if not line.startswith('#'):
+            if line.strip():
+                break
+            continue
+        if line.startswith(TEXT_PORT_PREFIX):
+            header['port'] = line[len(TEXT_PORT_PREFIX):].strip()
+        elif line.startswith(TEXT_START_PREFIX):
+            try:
+                header['start'] = datetime.strptime(line[len(TEXT_START_PREFIX):].strip(),
+                                                    TEXT_HEADER_TIME_FORMAT)
+            except ValueError:
+                pass
+    return header
+
+
+def parse_text_line(line):
+    """
+    解析文本记录中的一行数据
+    
+    Args:
+        line: 一行文本（不含换行符）
+        
+    Returns:
+        tuple: (时间datetime.time, 数据)，文件头、结束信息和空行返回None
+    """
+    if not line.startswith('[') or line[13:15] != '] ':
+        return None
+    try:
+        time_of_day = datetime.strptime(line[1:13], TEXT_TIME_FORMAT).time()
+    except ValueError:
+        return None
+    return time_of_day, line[15:]
+
+
+def find_capture_offset(entries, timestamp_ns):
+    """
+    按时间查找原始字节文件中的位置
+    
+    Args:
+        entries: load_capture_index()返回的索引记录
+        timestamp_ns: 单调时间(ns)
+        
+    Returns:
+        int: 第一个在该时间及之后到达的数据块的偏移，都早于该时间时返回文件末尾
+    """
+    i = bisect.bisect_left(entries, (timestamp_ns,))
+    if i < len(entries):
+        return entries[i][1]
+    if entries:
+        _, offset, length = entries[-1]
+        return offset + length
+    return 0
 
 
 class DataSaver:
-    """数据保存管理器，负责将串口数据保存到文件"""
+    """数据保存管理器，负责将串口数据保存到文件
     
-    def __init__(self, base_dir="serial_logs"):
+    保存格式可以是带时间戳的文本、原始字节或两者兼有：原始字节格式把收到的字节原样写入.bin文件，
+    并为每个数据块在.idx索引文件中记录到达时间、偏移和长度，文本记录只是它的一种派生视图。
+    记录日志格式把收发数据逐块写成[时间戳, 方向, 长度, 数据]记录，可用RecordLogReader精确回放。
+    文件可以在写入时流式压缩，也可以先写未压缩文件，关闭后交给后台压缩线程压缩。
+    文件按大小和/或整点、零点切换，旧文件由后台清理线程按保留天数和磁盘配额删除或归档。
+    文本记录和记录日志另有稀疏时间索引 (.tix)，每隔一定字节数或时间记录一次行首位置，
+    可用get_time_index()按时间直接定位到任意文件（包括切换出的多个文件）中的位置。
+    文件接近切换条件时由后台切换线程提前创建下一组文件，切换时写入线程只交换文件对象，
+    旧文件的结束信息、刷新、fsync和关闭也交给切换线程完成。
+    异步模式下save_data()只把数据连同到达时间放入写入队列，
+    由一个后台写入线程成批取出，格式化后按串口合并为一次大块写入；
+    写入队列已满时save_data()阻塞，直到写入线程跟上。
+    文件使用大块缓冲，何时把缓冲写入操作系统（以及是否fsync到磁盘）由刷新策略决定。
+    持久模式下每隔一定时间或数据量设置一个提交点：fsync所有文件后在提交日志 (.cmt) 中
+    记录各文件的大小和CRC32；进程异常退出后，启动时recover()按提交点截断或修复不完整的文件末尾。
+    """
+    
+    WRITE_BUFFER_SIZE = 1024 * 1024  # 文件写缓冲区大小
+    RECORD_SYNC_INTERVAL = 64 * 1024 # 记录日志中同步标记的间隔（字节）
+    IDLE_POLL_INTERVAL = 0.5         # 按时间刷新时写入线程空闲检查的最长间隔（秒）
+    PREOPEN_RATIO = 0.9              # 文件达到最大文件大小的该比例时提前创建下一组文件
+    PREOPEN_LEAD = 5.0               # 距按时间切换不足该时间（秒）时提前创建下一组文件
+    ROTATION_WAIT = 30.0             # 关闭时等待切换线程收尾的最长时间（秒）
+    COMPRESSION_WAIT = 60.0          # 关闭时等待后台压缩的最长时间（秒），未压缩完的文件下次启动时继续压缩
+    STOP_FLUSH_WAIT = 5.0            # 停止一个串口的保存时等待其已入队数据写完的最长时间（秒）
+    CLOSE_FLUSH_WAIT = 30.0          # 关闭所有保存时等待写入队列写完的最长时间（秒）
+    TX_QUEUE_TIMEOUT = 0.05          # 发送数据入队的最长等待时间（秒），超时计为丢弃，不阻塞GUI线程
+    
+    def __init__(self, base_dir="serial_logs", async_mode=False,
+                 queue_max_items=4096, queue_max_bytes=16 * 1024 * 1024):
         """
         初始化数据保存管理器
         
         Args:
             base_dir: 保存目录，默认为当前目录下的serial_logs文件夹
+            async_mode: 是否使用后台写入线程
+            queue_max_items: 写入队列最大记录数（异步模式）
+            queue_max_bytes: 写入队列最大字节数（异步模式）
         """
         self.base_dir = Path(base_dir)
-        self.current_files = {}  # 当前打开的文件 {port_name: file_object}
-        self.file_sizes = {}     # 文件大小 {port_name: current_size}
+        self.port_formats = {}   # 正在保存的串口及其保存格式 {port_name: save_format}
+        self.current_files = {}  # 当前打开的文本文件 {port_name: file_object}
+        self.file_sizes = {}     # 文本文件大小 {port_name: current_size}
+        self.raw_files = {}      # 当前打开的原始字节文件 {port_name: file_object}
+        self.index_files = {}    # 当前打开的索引文件 {port_name: file_object}
+        self.raw_sizes = {}      # 原始字节文件大小，即下一个数据块的偏移 {port_name: current_size}
+        self.record_files = {}   # 当前打开的记录日志文件 {port_name: file_object}
+        self.record_sizes = {}   # 记录日志文件大小 {port_name: current_size}
+        self.record_sync = {}    # 记录日志中最近一个同步标记的偏移 {port_name: offset}
+        self.port_configs = {}   # 串口配置（写入记录日志文件头） {port_name: dict}
         self.port_baudrates = {} # 串口波特率 {port_name: baudrate}
+        self.decoders = {}       # 增量解码器 {port_name: IncrementalDecoder}
+        self.line_start = {}     # 下一个字符是否位于行首 {port_name: bool}
+        self.time_index_files = {}  # 当前打开的时间索引文件 {port_name: file_object}
+        self.time_index_state = {}  # 时间索引状态 {port_name: {'offset', 'time', 'line'}}
+        self.commit_files = {}   # 当前打开的提交日志 {port_name: file_object}
+        self.commit_state = {}   # 提交状态 {port_name: {'writers', 'seq', 'uncommitted', 'last_commit'}}
         self.max_file_size = 500 * 1024 * 1024  # 500MB
+        self.rotation = {
+            'by_size': True,          # 文件超过max_file_size时切换
+            'interval': ROTATE_NONE   # 按时间切换 'none'、'hourly' 或 'daily'
+        }
+        self.rotate_at = {}      # 下次按时间切换的时刻 {port_name: 时间戳}
+        self.next_files = {}     # 提前创建的下一组文件 {port_name: {'files', 'done'}}
+        self.rotator = RotationWorker()
+        self._name_lock = threading.Lock()  # 选择文件名并创建文件，避免两组文件使用同一文件名
+        self.save_format = SAVE_TEXT  # 新开始保存的串口使用的保存格式
+        
+        # 压缩设置（对之后创建的文件生效）
+        self.compression = {
+            'method': COMPRESS_NONE,   # 压缩方式 'none'、'gzip'、'zlib' 或 'lzma'
+            'level': 6,                # 压缩等级
+            'mode': COMPRESS_STREAM    # 'stream' 写入时压缩，'rotated' 关闭后后台压缩
+        }
+        # 排队中的文件记录在日志目录中，上次没有压缩完的文件启动时继续压缩
+        self.compressor = CompressionWorker(str(self.base_dir / COMPRESS_JOURNAL))
+        
+        # 稀疏时间索引设置（对之后创建的文件生效）
+        self.time_index = {
+            'enabled': True,       # 是否为文本记录和记录日志生成时间索引
+            'bytes': 64 * 1024,    # 距上一条索引超过该字节数时记录一条
+            'interval': 1.0        # 距上一条索引超过该时间（秒）时记录一条
+        }
+        
+        # 刷新策略
+        self.flush_policy = {
+            'mode': FLUSH_INTERVAL,       # 刷新方式
+            'bytes': 1024 * 1024,         # FLUSH_BYTES：未刷新数据达到该字节数时刷新
+            'interval': 1.0,              # FLUSH_INTERVAL：刷新间隔（秒）
+            'fsync_interval': 0.0         # fsync间隔（秒），0表示不调用fsync
+        }
+        self.flush_state = {}    # 刷新状态 {port_name: {'unflushed', 'synced', 'last_flush', 'last_fsync'}}
+        
+        # 持久模式（对之后创建的文件生效，写入时压缩的文件不记录提交点）
+        self.durability = {
+            'enabled': False,            # 是否写入提交点
+            'interval': 1.0,             # 距上一提交点超过该时间（秒）时提交
+            'bytes': 4 * 1024 * 1024     # 未提交数据达到该字节数时提交
+        }
+        self.recovery_reports = []  # 启动时恢复的会话，见durable_log.recover_session()
+        
+        # 文件锁：写入线程写文件时，其他线程不能打开/关闭文件
+        self._file_lock = threading.RLock()
+        
+        # 异步写入
+        self.async_mode = async_mode
+        self.write_queue = None   # 写入队列，元素为 (port_name, data, 到达时间, 到达单调时间ns, 方向)
+        self._writer_thread = None
+        self._pending = 0         # 已入队但尚未写入的记录数
+        self._pending_ports = {}  # 各串口已入队但尚未写入的记录数 {port_name: count}
+        self._pending_cond = threading.Condition()
+        # 写入线程统计
+        self.writer_stats = {
+            'batches': 0,           # 写入批次数
+            'records': 0,           # 写入记录数
+            'bytes': 0,             # 写入字节数（原始数据）
+            'last_latency': 0.0,    # 最近一批最早记录从入队到写完的时间（秒）
+            'max_latency': 0.0,     # 最大写入延迟（秒）
+            'total_latency': 0.0,   # 各批写入延迟之和（秒）
+            'last_write_time': 0.0  # 最近一批的写入耗时（秒）
+        }
         
         # 确保保存目录存在
         self.base_dir.mkdir(exist_ok=True)
+        
+        # 恢复上次异常退出时未正常关闭的文件
+        self.recover()
+        
+        # 继续压缩上次退出时还在压缩队列中的文件
+        resumed = self.compressor.resume()
+        if resumed:
+            print(f"继续压缩上次未完成的 {resumed} 个日志文件")
+        
+        # 日志清理线程：按保留天数和磁盘配额清理旧文件（默认不清理）
+        self.janitor = LogJanitor(self.base_dir, self.get_open_paths)
+        self.janitor.start()
+        
+        if async_mode:
+            self.write_queue = BoundedQueue(queue_max_items, queue_max_bytes, POLICY_BLOCK)
+            self._writer_thread = threading.Thread(target=self._writer_loop, daemon=True)
+            self._writer_thread.start()
     
     def update_max_file_size(self, max_size_mb):
         """
@@ -32,170 +299,1226 @@ class DataSaver:
         """
         self.max_file_size = max_size_mb * 1024 * 1024
     
-    def _generate_filename(self, port_name, baudrate):
+    def set_rotation(self, by_size=None, interval=None):
+        """
+        设置文件切换规则
+        
+        Args:
+            by_size: 是否在文件超过最大文件大小时切换
+            interval: 按时间切换 'none'、'hourly' 或 'daily'
+            
+        Returns:
+            bool: 是否设置成功
+        """
+        try:
+            with self._file_lock:
+                if interval is not None and interval != self.rotation['interval']:
+                    if interval not in ROTATION_INTERVALS:
+                        raise ValueError(f"无效的切换间隔: {interval}")
+                    self.rotation['interval'] = interval
+                    for port_name in list(self.port_formats.keys()):
+                        self.rotate_at[port_name] = self._next_rotation_time()
+                if by_size is not None:
+                    self.rotation['by_size'] = bool(by_size)
+            return True
+        except Exception as e:
+            print(f"设置文件切换规则失败: {str(e)}")
+            return False
+    
+    def set_retention(self, retention_days=None, quota_mb=None, action=None, archive_dir=None):
+        """
+        设置旧文件清理规则
+        
+        Args:
+            retention_days: 保留天数，0表示不按时间清理
+            quota_mb: 所有串口共用的磁盘配额（MB），0表示不限制
+            action: 'delete' 删除，'archive' 移动到归档目录
+            archive_dir: 归档目录
+            
+        Returns:
+            bool: 是否设置成功
+        """
+        return self.janitor.configure(retention_days, quota_mb, action, archive_dir)
+    
+    def get_open_paths(self):
+        """
+        获取仍在写入、等待收尾或等待压缩的文件路径
+        
+        Returns:
+            set: 文件路径集合
+        """
+        with self._file_lock:
+            paths = set()
+            for port_name in list(self.port_formats.keys()):
+                paths.update(str(file_obj.name) for file_obj in self._port_files(port_name))
+            for slot in self.next_files.values():
+                if slot['files'] is not None:
+                    paths.update(slot['files']['paths'])
+        return paths | self.compressor.pending_paths() | self.rotator.pending_paths()
+    
+    def _next_rotation_time(self):
+        """下一次按时间切换文件的时刻，不按时间切换时返回None"""
+        interval = self.rotation['interval']
+        if interval == ROTATE_NONE:
+            return None
+        now = datetime.now()
+        if interval == ROTATE_HOURLY:
+            boundary = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        else:
+            boundary = now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        return boundary.timestamp()
+    
+    def _current_size(self, port_name):
+        """串口当前文件中最大的文件大小（调用者持有文件锁）"""
+        return max(self.file_sizes.get(port_name, 0), self.raw_sizes.get(port_name, 0),
+                   self.record_sizes.get(port_name, 0))
+    
+    def _rotation_reason(self, port_name):
+        """需要切换文件时返回原因，否则返回None（调用者持有文件锁）"""
+        if self.rotation['by_size']:
+            if self._current_size(port_name) >= self.max_file_size:
+                return f"文件大小超过{self.max_file_size / (1024 * 1024):g}MB，创建新文件"
+        rotate_at = self.rotate_at.get(port_name)
+        if rotate_at is not None and time.time() >= rotate_at:
+            if self.rotation['interval'] == ROTATE_HOURLY:
+                return "到达整点，创建新文件"
+            return "到达新的一天，创建新文件"
+        return None
+    
+    def set_flush_policy(self, mode=None, flush_bytes=None, interval=None, fsync_interval=None):
+        """
+        设置刷新策略
+        
+        Args:
+            mode: 刷新方式 'always'、'bytes'、'interval' 或 'rotation'
+            flush_bytes: 按数据量刷新的字节数
+            interval: 按时间刷新的间隔（秒）
+            fsync_interval: fsync间隔（秒），0表示不调用fsync
+            
+        Returns:
+            bool: 是否设置成功
+        """
+        try:
+            with self._file_lock:
+                if mode is not None:
+                    if mode not in FLUSH_POLICIES:
+                        raise ValueError(f"无效的刷新策略: {mode}")
+                    self.flush_policy['mode'] = mode
+                if flush_bytes is not None:
+                    self.flush_policy['bytes'] = max(1, int(flush_bytes))
+                if interval is not None:
+                    self.flush_policy['interval'] = max(0.0, float(interval))
+                if fsync_interval is not None:
+                    self.flush_policy['fsync_interval'] = max(0.0, float(fsync_interval))
+                # 立即按新策略检查一次
+                if self.flush_policy['mode'] == FLUSH_ALWAYS:
+                    for port_name in list(self.port_formats.keys()):
+                        self._flush_file(port_name)
+                self._flush_idle()
+            return True
+        except Exception as e:
+            print(f"设置刷新策略失败: {str(e)}")
+            return False
+    
+    def set_save_format(self, save_format):
+        """
+        设置保存格式（对之后开始保存的串口生效）
+        
+        Args:
+            save_format: 'text'、'raw'、'both' 或 'record'
+            
+        Returns:
+            bool: 是否设置成功
+        """
+        if save_format not in SAVE_FORMATS:
+            print(f"无效的保存格式: {save_format}")
+            return False
+        self.save_format = save_format
+        return True
+    
+    def set_compression(self, method=None, level=None, mode=None):
+        """
+        设置压缩方式（对之后创建的文件生效）
+        
+        Args:
+            method: 压缩方式 'none'、'gzip'、'zlib' 或 'lzma'
+            level: 压缩等级（gzip/zlib为1-9，lzma为0-9）
+            mode: 'stream' 写入时压缩，'rotated' 先写未压缩文件、关闭后后台压缩
+            
+        Returns:
+            bool: 是否设置成功
+        """
+        try:
+            with self._file_lock:
+                old = dict(self.compression)
+                if method is not None:
+                    self.compression['method'] = check_compression(method)
+                if level is not None:
+                    self.compression['level'] = min(9, max(0, int(level)))
+                if mode is not None:
+                    if mode not in COMPRESSION_MODES:
+                        raise ValueError(f"无效的压缩时机: {mode}")
+                    self.compression['mode'] = mode
+                if self.compression != old:
+                    # 提前创建的文件按旧设置创建，需要重新创建
+                    self._drop_prepared()
+            return True
+        except Exception as e:
+            print(f"设置压缩方式失败: {str(e)}")
+            return False
+    
+    def set_time_index(self, enabled=None, index_bytes=None, interval=None):
+        """
+        设置稀疏时间索引（对之后创建的文件生效）
+        
+        Args:
+            enabled: 是否生成时间索引
+            index_bytes: 每隔多少字节记录一条索引
+            interval: 每隔多少秒记录一条索引
+            
+        Returns:
+            bool: 是否设置成功
+        """
+        try:
+            with self._file_lock:
+                old = dict(self.time_index)
+                if enabled is not None:
+                    self.time_index['enabled'] = bool(enabled)
+                if index_bytes is not None:
+                    self.time_index['bytes'] = max(1, int(index_bytes))
+                if interval is not None:
+                    self.time_index['interval'] = max(0.0, float(interval))
+                if self.time_index != old:
+                    self._drop_prepared()
+            return True
+        except Exception as e:
+            print(f"设置时间索引失败: {str(e)}")
+            return False
+    
+    def set_durability(self, enabled=None, interval=None, commit_bytes=None):
+        """
+        设置持久模式（对之后创建的文件生效）
+        
+        每个提交点都要fsync会话的所有文件，间隔越短异常退出时丢失的数据越少，但写入吞吐越低。
+        
+        Args:
+            enabled: 是否写入提交点
+            interval: 提交间隔（秒）
+            commit_bytes: 未提交数据达到该字节数时提交
+            
+        Returns:
+            bool: 是否设置成功
+        """
+        try:
+            with self._file_lock:
+                old = dict(self.durability)
+                if enabled is not None:
+                    self.durability['enabled'] = bool(enabled)
+                if interval is not None:
+                    self.durability['interval'] = max(0.0, float(interval))
+                if commit_bytes is not None:
+                    self.durability['bytes'] = max(1, int(commit_bytes))
+                if self.durability != old:
+                    self._drop_prepared()
+            return True
+        except Exception as e:
+            print(f"设置持久模式失败: {str(e)}")
+            return False
+    
+    def recover(self):
+        """
+        恢复上次异常退出时未正常关闭的会话（启动时调用）
+        
+        按提交日志截断或修复不完整的文件末尾，并写入结束信息，正在写入的会话不受影响。
+        
+        Returns:
+            list: 各会话的恢复结果
+        """
+        try:
+            reports = recover_sessions(self.base_dir, self.get_open_paths())
+        except Exception as e:
+            print(f"恢复日志失败: {str(e)}")
+            return []
+        for report in reports:
+            lost = sum(size - new_size for size, new_size in report['files'].values() if size > new_size)
+            print(f"已恢复未正常关闭的日志: {report['session']}，截断 {lost} 字节"
+                  f"{'' if report['verified'] else '（最后提交点校验失败）'}")
+        self.recovery_reports.extend(reports)
+        return reports
+    
+    def get_time_index(self, port_name):
+        """
+        获取串口所有文件（包括切换出的旧文件和正在写入的文件）的时间索引
+        
+        正在写入的文件会先刷新，刚切换出的文件等待切换线程收尾，使索引指向的数据都可以读到。
+        
+        Args:
+            port_name: 串口名称
+            
+        Returns:
+            SessionTimeIndex: 跨文件的时间索引，用locate()/locate_range()按时间查找
+        """
+        with self._file_lock:
+            if port_name in self.flush_state:
+                self._flush_file(port_name)
+        self.rotator.wait(self.ROTATION_WAIT)
+        return SessionTimeIndex.for_port(self.base_dir, port_name)
+    
+    def _open_output(self, path, binary=True, buffering=WRITE_BUFFER_SIZE, writers=None):
+        """
+        按压缩设置创建输出文件
+        
+        Args:
+            path: 未压缩时的文件路径，流式压缩时自动添加压缩扩展名
+            binary: 是否以二进制方式打开，否则为UTF-8文本
+            buffering: 未压缩时的写缓冲区大小
+            writers: 持久模式下的 {扩展名: CommitWriter}，新文件的CommitWriter加入其中
+            
+        Returns:
+            文件对象
+        """
+        method = self.compression['method']
+        if method == COMPRESS_NONE or self.compression['mode'] != COMPRESS_STREAM:
+            if writers is not None:
+                # 统计写入量和CRC32，写入提交点
+                writer = CommitWriter(open(path, 'wb', buffering=buffering))
+                writers[Path(path).suffix] = writer
+                if binary:
+                    return writer
+                return io.TextIOWrapper(writer, encoding='utf-8')
+            if binary:
+                return open(path, 'wb', buffering=buffering)
+            return open(path, 'w', encoding='utf-8', buffering=buffering)
+        
+        path = str(path) + COMPRESSION_SUFFIXES[method]
+        level = self.compression['level']
+        if method != COMPRESS_LZMA:
+            level = max(1, level)
+        file_obj = open_compressed_writer(path, method, level, buffering)
+        if binary:
+            return file_obj
+        return io.TextIOWrapper(file_obj, encoding='utf-8')
+    
+    def _generate_filename(self, port_name, baudrate, suffix='.txt', when=None):
         """
         生成文件名
         
         Args:
             port_name: 串口名称
             baudrate: 波特率
+            suffix: 文件扩展名
+            when: 文件名中的时间，默认为当前时间
             
         Returns:
             str: 生成的文件名
         """
-        now = datetime.now()
+        now = when or datetime.now()
         date_str = now.strftime("%Y%m%d")
         time_str = now.strftime("%H%M%S")
-        return f"{port_name}_{baudrate}_{date_str}_{time_str}.txt"
+        return f"{port_name}_{baudrate}_{date_str}_{time_str}{suffix}"
     
-    def _get_new_file_path(self, port_name, baudrate):
+    def _get_new_file_path(self, port_name, baudrate, suffix='.txt', when=None):
         """
         获取新的文件路径
         
         Args:
             port_name: 串口名称
             baudrate: 波特率
+            suffix: 文件扩展名
+            when: 文件名中的时间，默认为当前时间
             
         Returns:
             Path: 文件路径
         """
-        filename = self._generate_filename(port_name, baudrate)
+        filename = self._generate_filename(port_name, baudrate, suffix, when)
         return self.base_dir / filename
     
-    def start_saving(self, port_name, baudrate):
+    def _new_session_base(self, port_name, baudrate, when=None):
+        """
+        获取一组新文件的路径（不含扩展名）
+        
+        同一秒内多次切换文件时在文件名后加序号，避免覆盖已有文件。
+        
+        Args:
+            port_name: 串口名称
+            baudrate: 波特率
+            when: 文件名中的时间，默认为当前时间
+            
+        Returns:
+            str: 不含扩展名的文件路径
+        """
+        base = str(self._get_new_file_path(port_name, baudrate, '', when))
+        suffixes = [suffix + compressed + temp
+                    for suffix in LOG_SUFFIXES
+                    for compressed in ('',) + tuple(COMPRESSION_SUFFIXES.values())
+                    for temp in ('', TEMP_SUFFIX)]
+        candidate = base
+        n = 1
+        while any(os.path.exists(candidate + suffix) for suffix in suffixes):
+            candidate = f"{base}_{n}"
+            n += 1
+        return candidate
+    
+    def start_saving(self, port_name, baudrate, save_format=None, serial_config=None):
         """
         开始保存数据
         
         Args:
             port_name: 串口名称
             baudrate: 波特率
+            save_format: 保存格式，为None时使用当前的默认保存格式
+            serial_config: 串口配置 {'bytesize', 'parity', 'stopbits', ...}，写入记录日志文件头
             
         Returns:
             bool: 是否成功开始保存
         """
         try:
             # 如果已经有文件在保存，先关闭
-            if port_name in self.current_files:
+            if port_name in self.port_formats:
                 self.stop_saving(port_name)
             
-            # 创建新文件
-            file_path = self._get_new_file_path(port_name, baudrate)
-            file_obj = open(file_path, 'w', encoding='utf-8')
+            with self._file_lock:
+                if save_format is None:
+                    save_format = self.save_format
+                elif save_format not in SAVE_FORMATS:
+                    raise ValueError(f"无效的保存格式: {save_format}")
+                self.port_formats[port_name] = save_format
+                self.port_baudrates[port_name] = baudrate
+                self.port_configs[port_name] = dict(serial_config or {})
+                try:
+                    self._open_files(port_name)
+                except Exception:
+                    self._discard_port(port_name)
+                    raise
+            
+            return True
+            
+        except Exception as e:
+            print(f"开始保存数据失败: {str(e)}")
+            return False
+    
+    def _open_files(self, port_name, reason=''):
+        """
+        按串口的保存格式创建新文件并写入文件头（调用者持有文件锁）
+        
+        Args:
+            port_name: 串口名称
+            reason: 创建新文件的原因，非空时写入文本文件头
+        """
+        files = self._create_session(port_name, self.port_formats[port_name])
+        self._install_files(port_name, files, reason)
+        # 不在写入路径上，文件头立即写入（持久模式下作为第一个提交点）
+        if port_name in self.commit_files:
+            self._commit(port_name)
+        else:
+            self._flush_file(port_name)
+    
+    def _create_session(self, port_name, save_format, when=None):
+        """
+        选择新的文件名并创建一组空文件（可在切换线程中调用）
+        
+        Args:
+            port_name: 串口名称
+            save_format: 保存格式
+            when: 文件名中的时间，默认为当前时间
+            
+        Returns:
+            dict: 见_create_files()
+        """
+        baudrate = self.port_baudrates.get(port_name, 115200)
+        with self._name_lock:
+            return self._create_files(self._new_session_base(port_name, baudrate, when), save_format)
+    
+    def _create_files(self, base, save_format):
+        """
+        按保存格式创建一组空文件（不修改保存状态，可在切换线程中调用）
+        
+        Args:
+            base: 不含扩展名的文件路径
+            save_format: 保存格式
+            
+        Returns:
+            dict: {'base': 路径, 'writers': 持久模式下的{扩展名: CommitWriter}或None, 'paths': 文件路径列表,
+                   扩展名: 文件对象, ...}
+        """
+        # 持久模式：写入时压缩的文件无法按偏移截断，不记录提交点
+        writers = None
+        if self.durability['enabled'] and (self.compression['method'] == COMPRESS_NONE or
+                                           self.compression['mode'] != COMPRESS_STREAM):
+            writers = {}
+        suffixes = []
+        if save_format == SAVE_RECORD:
+            suffixes.append('.rec')
+        if save_format in (SAVE_RAW, SAVE_BOTH):
+            suffixes += ['.bin', '.idx']
+        if save_format in (SAVE_TEXT, SAVE_BOTH):
+            suffixes.append('.txt')
+        if self.time_index['enabled'] and save_format != SAVE_RAW:
+            # 文本记录和记录日志的稀疏时间索引
+            suffixes.append(TIME_INDEX_SUFFIX)
+        
+        # 流式压缩时_open_output()会在文件名后添加压缩扩展名
+        method = self.compression['method']
+        compressed = COMPRESSION_SUFFIXES[method] if (method != COMPRESS_NONE and
+                                                      self.compression['mode'] == COMPRESS_STREAM) else ''
+        
+        files = {'base': base, 'writers': writers, 'paths': []}
+        try:
+            for suffix in suffixes:
+                files['paths'].append(base + suffix + compressed)
+                if suffix == '.txt':
+                    files[suffix] = self._open_output(base + suffix, binary=False, writers=writers)
+                elif suffix in ('.idx', TIME_INDEX_SUFFIX):
+                    files[suffix] = self._open_output(base + suffix, buffering=-1, writers=writers)
+                else:
+                    files[suffix] = self._open_output(base + suffix, writers=writers)
+            if writers is not None:
+                files['paths'].append(base + COMMIT_SUFFIX)
+                files[COMMIT_SUFFIX] = open(base + COMMIT_SUFFIX, 'wb')
+        except Exception:
+            self._discard_files(files)
+            raise
+        return files
+    
+    def _discard_files(self, files):
+        """关闭并删除_create_files()创建的文件（未写入数据）"""
+        for key, file_obj in files.items():
+            if key.startswith('.'):
+                try:
+                    file_obj.close()
+                except Exception as e:
+                    print(f"关闭未使用的日志文件失败: {str(e)}")
+        for path in files['paths']:
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"删除未使用的日志文件失败: {str(e)}")
+    
+    def _install_files(self, port_name, files, reason=''):
+        """
+        写入文件头并开始使用一组新文件（调用者持有文件锁）
+        
+        文件头只写入缓冲区，由刷新策略决定何时写入操作系统，切换文件时不产生磁盘操作。
+        
+        Args:
+            port_name: 串口名称
+            files: _create_files()创建的文件
+            reason: 创建新文件的原因，非空时写入文本文件头
+        """
+        baudrate = self.port_baudrates.get(port_name, 115200)
+        header_bytes = 0
+        lines = 0
+        
+        if '.rec' in files:
+            record_obj = files['.rec']
+            monotonic_ns = time.monotonic_ns()
+            header = encode_file_header(port_name, baudrate, self.port_configs.get(port_name),
+                                        time.time_ns(), monotonic_ns)
+            # 数据前先写一个同步标记
+            sync = encode_sync(monotonic_ns, len(header))
+            record_obj.write(header + sync)
+            self.record_files[port_name] = record_obj
+            self.record_sizes[port_name] = len(header) + len(sync)
+            self.record_sync[port_name] = len(header)
+            header_bytes += len(header) + len(sync)
+        
+        if '.bin' in files:
+            index_header = INDEX_HEADER.pack(INDEX_MAGIC, time.time_ns(), time.monotonic_ns())
+            files['.idx'].write(index_header)
+            self.raw_files[port_name] = files['.bin']
+            self.index_files[port_name] = files['.idx']
+            self.raw_sizes[port_name] = 0
+            header_bytes += len(index_header)
+        
+        if '.txt' in files:
+            file_obj = files['.txt']
             
             # 写入文件头信息
-            header = f"# 串口数据记录文件\n"
-            header += f"# 串口: {port_name}\n"
+            header = f"# 串口数据记录文件{'（续）' if reason else ''}\n"
+            header += f"{TEXT_PORT_PREFIX}{port_name}\n"
             header += f"# 波特率: {baudrate}\n"
-            header += f"# 开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+            header += f"{TEXT_START_PREFIX}{datetime.now().strftime(TEXT_HEADER_TIME_FORMAT)}\n"
+            if reason:
+                header += f"# {reason}\n"
             header += f"# {'='*50}\n\n"
             
             file_obj.write(header)
-            file_obj.flush()
             
-            # 保存文件对象和大小
             self.current_files[port_name] = file_obj
             self.file_sizes[port_name] = len(header.encode('utf-8'))
-            self.port_baudrates[port_name] = baudrate
-            
-            return True
+            # 切换文件时沿用原解码器，跨文件的多字节字符不会被截断
+            if port_name not in self.decoders:
+                self.decoders[port_name] = codecs.getincrementaldecoder('utf-8')(errors='replace')
+            self.line_start[port_name] = True
+            header_bytes += self.file_sizes[port_name]
+            lines = header.count('\n')
+        
+        if TIME_INDEX_SUFFIX in files:
+            index_header = encode_time_index_header(INDEXED_RECORD if '.rec' in files else INDEXED_TEXT)
+            files[TIME_INDEX_SUFFIX].write(index_header)
+            self.time_index_files[port_name] = files[TIME_INDEX_SUFFIX]
+            self.time_index_state[port_name] = {
+                'offset': None,  # 上一条索引的偏移，None表示还没有索引
+                'time': 0,       # 上一条索引的系统时间(ns)
+                'line': lines    # 下一行的行号（记录日志为下一条记录的序号）
+            }
+            header_bytes += len(index_header)
+        
+        self.rotate_at[port_name] = self._next_rotation_time()
+        self._reset_flush_state(port_name)
+        self.flush_state[port_name]['unflushed'] = header_bytes
+        
+        if COMMIT_SUFFIX in files:
+            commit_obj = files[COMMIT_SUFFIX]
+            commit_obj.write(COMMIT_MAGIC)
+            self.commit_files[port_name] = commit_obj
+            self.commit_state[port_name] = {
+                'writers': files['writers'],  # {扩展名: CommitWriter}
+                'seq': 0,                     # 下一个提交点的序号
+                'uncommitted': header_bytes,  # 上一提交点之后写入的字节数
+                'last_commit': time.monotonic()
+            }
+    
+    def _time_index_due(self, state, offset, wall_ns):
+        """距上一条时间索引是否已超过索引间隔"""
+        return (state['offset'] is None or
+                offset - state['offset'] >= self.time_index['bytes'] or
+                wall_ns - state['time'] >= self.time_index['interval'] * 1e9)
+    
+    def _index_text(self, port_name, encoded, offset, at_line_start, arrival_time):
+        """
+        为一次写入的文本记录时间索引（调用者持有文件锁）
+        
+        索引只指向行首：写入前不在行首时，索引记在这批文本中第一个换行之后。
+        
+        Args:
+            port_name: 串口名称
+            encoded: 写入的文本（UTF-8编码）
+            offset: 写入前的文件大小
+            at_line_start: 写入前是否位于行首
+            arrival_time: 这批数据中最早的到达时间
             
-        except Exception as e:
-            print(f"开始保存数据失败: {str(e)}")
-            return False
+        Returns:
+            int: 写入索引文件的字节数
+        """
+        state = self.time_index_state[port_name]
+        wall_ns = int(arrival_time.timestamp() * 1e9)
+        nbytes = 0
+        if self._time_index_due(state, offset, wall_ns):
+            pos = 0 if at_line_start else encoded.find(b'\n') + 1
+            if at_line_start or (0 < pos < len(encoded)):
+                line = state['line'] + (0 if at_line_start else 1)
+                entry = encode_time_index_entry(wall_ns, offset + pos, line)
+                self.time_index_files[port_name].write(entry)
+                state['offset'] = offset + pos
+                state['time'] = wall_ns
+                nbytes = len(entry)
+        state['line'] += encoded.count(b'\n')
+        return nbytes
+    
+    def _port_files(self, port_name):
+        """串口当前打开的所有文件（调用者持有文件锁）"""
+        return [files[port_name] for files in (self.current_files, self.raw_files, self.index_files,
+                                               self.record_files, self.time_index_files, self.commit_files)
+                if port_name in files]
     
-    def save_data(self, port_name, data):
+    def save_data(self, port_name, data, direction=DIRECTION_RX):
         """
-        保存数据到文件
+        保存数据到文件（异步模式下只放入写入队列）
         
         Args:
             port_name: 串口名称
-            data: 要保存的数据
+            data: 原始字节数据
+            direction: 数据方向，发送的数据只写入记录日志
             
         Returns:
-            bool: 是否成功保存
+            bool: 是否成功保存（异步模式下为是否成功入队）
         """
         try:
-            if port_name not in self.current_files:
+            save_format = self.port_formats.get(port_name)
+            if save_format is None:
+                return False
+            if direction != DIRECTION_RX and save_format != SAVE_RECORD:
+                # 其他保存格式只保存接收的数据，发送的数据不占用写入队列
                 return False
             
-            file_obj = self.current_files[port_name]
-            current_size = self.file_sizes[port_name]
-            
-            # 检查文件大小是否超过限制
-            if current_size >= self.max_file_size:
-                # 关闭当前文件
-                file_obj.close()
-                del self.current_files[port_name]
-                del self.file_sizes[port_name]
-                
-                # 获取波特率信息
-                baudrate = self.port_baudrates.get(port_name, 115200)
-                
-                # 重新创建文件
-                new_file_path = self._get_new_file_path(port_name, baudrate)
-                new_file_obj = open(new_file_path, 'w', encoding='utf-8')
-                
-                # 写入新文件头信息
-                header = f"# 串口数据记录文件（续）\n"
-                header += f"# 串口: {port_name}\n"
-                header += f"# 波特率: {baudrate}\n"
-                header += f"# 开始时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-                header += f"# 文件大小超过500MB，创建新文件\n"
-                header += f"# {'='*50}\n\n"
-                
-                new_file_obj.write(header)
-                new_file_obj.flush()
-                
-                # 保存新文件对象和大小
-                self.current_files[port_name] = new_file_obj
-                self.file_sizes[port_name] = len(header.encode('utf-8'))
-                self.port_baudrates[port_name] = baudrate
-                
-                print(f"文件大小超过500MB，创建新文件: {port_name} -> {new_file_path}")
-            
-            # 添加时间戳
-            timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-            data_with_timestamp = f"[{timestamp}] {data}"
-            
-            # 写入数据
-            file_obj = self.current_files[port_name]
-            file_obj.write(data_with_timestamp)
-            file_obj.flush()
-            
-            # 更新文件大小
-            data_size = len(data_with_timestamp.encode('utf-8'))
-            self.file_sizes[port_name] += data_size
+            if self.async_mode:
+                with self._pending_cond:
+                    self._pending += 1
+                    self._pending_ports[port_name] = self._pending_ports.get(port_name, 0) + 1
+                record = (port_name, data, datetime.now(), time.monotonic_ns(), direction)
+                # 发送数据在GUI线程中保存：队列满时只短暂等待，超时计为丢弃
+                timeout = None if direction == DIRECTION_RX else self.TX_QUEUE_TIMEOUT
+                if not self.write_queue.put(record, timeout=timeout, size=len(data)):
+                    self._finish_records({port_name: 1})
+                    return False
+                return True
             
+            with self._file_lock:
+                self._write_port(port_name, [(data, datetime.now(), time.monotonic_ns(), direction)])
             return True
             
         except Exception as e:
             print(f"保存数据失败: {str(e)}")
             return False
     
+    def flush(self, timeout=None, port_name=None):
+        """
+        等待写入队列中已有的数据写入文件（异步模式）
+        
+        只等待一个串口时不受其他串口持续接收的影响。
+        
+        Args:
+            timeout: 最长等待时间（秒），为None时一直等待
+            port_name: 只等待该串口的数据，为None时等待所有串口
+            
+        Returns:
+            bool: 是否已全部写入
+        """
+        if not self.async_mode:
+            return True
+        with self._pending_cond:
+            if port_name is None:
+                return self._pending_cond.wait_for(lambda: self._pending == 0, timeout)
+            return self._pending_cond.wait_for(lambda: not self._pending_ports.get(port_name), timeout)
+    
+    def get_writer_statistics(self):
+        """
+        获取写入线程统计
+        
+        Returns:
+            dict: 队列深度、丢弃的记录数、批次数、写入量及写入延迟（毫秒）
+        """
+        stats = dict(self.writer_stats)
+        queue_stats = self.write_queue.get_statistics() if self.write_queue is not None else {}
+        batches = stats['batches']
+        return {
+            'async_mode': self.async_mode,
+            'queue_depth': queue_stats.get('items', 0),
+            'queue_bytes': queue_stats.get('bytes', 0),
+            'queue_high_water': queue_stats.get('high_water', 0),
+            'dropped_records': queue_stats.get('dropped_items', 0),
+            'dropped_bytes': queue_stats.get('dropped_bytes', 0),
+            'batches': batches,
+            'records': stats['records'],
+            'bytes': stats['bytes'],
+            'last_latency_ms': stats['last_latency'] * 1000,
+            'max_latency_ms': stats['max_latency'] * 1000,
+            'avg_latency_ms': stats['total_latency'] * 1000 / batches if batches else 0.0,
+            'last_write_ms': stats['last_write_time'] * 1000
+        }
+    
+    def _writer_loop(self):
+        """写入线程主循环：成批取出记录并写入，空闲时按刷新策略刷新，队列关闭后退出"""
+        while True:
+            record = self.write_queue.get(self._idle_timeout())
+            if record is None and self.write_queue.closed:
+                break
+            if record is None:
+                # 空闲超时：刷新到期的文件
+                try:
+                    with self._file_lock:
+                        self._flush_idle()
+                except Exception as e:
+                    print(f"刷新数据失败: {str(e)}")
+                continue
+            records = [record] + self.write_queue.get_all()
+            counts = {}
+            for port_name, *_ in records:
+                counts[port_name] = counts.get(port_name, 0) + 1
+            try:
+                self._write_records(records)
+            except Exception as e:
+                print(f"保存数据失败: {str(e)}")
+            finally:
+                self._finish_records(counts)
+    
+    def _idle_timeout(self):
+        """写入线程空闲时的等待时间，不需要定时刷新时返回None"""
+        policy = self.flush_policy
+        timeouts = [self.IDLE_POLL_INTERVAL]
+        if policy['mode'] == FLUSH_INTERVAL:
+            timeouts.append(policy['interval'])
+        elif not policy['fsync_interval'] and not self.commit_state:
+            return None
+        if policy['fsync_interval']:
+            timeouts.append(policy['fsync_interval'])
+        if self.commit_state:
+            timeouts.append(self.durability['interval'])
+        return max(0.01, min(timeouts))
+    
+    def _reset_flush_state(self, port_name):
+        """新文件的刷新状态（调用者持有文件锁）"""
+        now = time.monotonic()
+        self.flush_state[port_name] = {
+            'unflushed': 0,     # 已写入缓冲区但尚未刷新的字节数
+            'synced': True,     # 已刷新的数据是否都已fsync
+            'last_flush': now,
+            'last_fsync': now
+        }
+    
+    def _after_write(self, port_name, nbytes):
+        """写入后按刷新策略决定是否刷新（调用者持有文件锁）"""
+        state = self.flush_state[port_name]
+        state['unflushed'] += nbytes
+        if port_name in self.commit_state:
+            self.commit_state[port_name]['uncommitted'] += nbytes
+        mode = self.flush_policy['mode']
+        if mode == FLUSH_ALWAYS or (mode == FLUSH_BYTES and state['unflushed'] >= self.flush_policy['bytes']):
+            self._flush_file(port_name)
+        self._flush_port_if_due(port_name, time.monotonic())
+    
+    def _flush_idle(self):
+        """检查所有文件是否到了按时间刷新或fsync的时间（调用者持有文件锁）"""
+        now = time.monotonic()
+        for port_name in list(self.port_formats.keys()):
+            self._flush_port_if_due(port_name, now)
+    
+    def _flush_port_if_due(self, port_name, now):
+        """按时间刷新和fsync（调用者持有文件锁）"""
+        state = self.flush_state.get(port_name)
+        if state is None:
+            return
+        policy = self.flush_policy
+        if (policy['mode'] == FLUSH_INTERVAL and state['unflushed'] and
+                now - state['last_flush'] >= policy['interval']):
+            self._flush_file(port_name)
+        if (policy['fsync_interval'] and not state['synced'] and
+                now - state['last_fsync'] >= policy['fsync_interval']):
+            self._flush_file(port_name, fsync=True)
+        commit = self.commit_state.get(port_name)
+        if commit is not None and commit['uncommitted'] and (
+                commit['uncommitted'] >= self.durability['bytes'] or
+                now - commit['last_commit'] >= self.durability['interval']):
+            self._commit(port_name)
+    
+    def _flush_file(self, port_name, fsync=False):
+        """
+        把文件缓冲写入操作系统（调用者持有文件锁）
+        
+        Args:
+            port_name: 串口名称
+            fsync: 是否同时调用os.fsync写入磁盘
+        """
+        files = self._port_files(port_name)
+        state = self.flush_state[port_name]
+        now = time.monotonic()
+        if state['unflushed']:
+            for file_obj in files:
+                file_obj.flush()
+            state['unflushed'] = 0
+            state['synced'] = False
+            state['last_flush'] = now
+        if fsync and not state['synced']:
+            for file_obj in files:
+                os.fsync(file_obj.fileno())
+            state['synced'] = True
+            state['last_fsync'] = now
+    
+    def _commit(self, port_name, flags=0):
+        """
+        设置提交点：刷新并fsync所有文件，再在提交日志中记录各文件的大小和CRC32（调用者持有文件锁）
+        
+        Args:
+            port_name: 串口名称
+            flags: 提交记录标志，关闭文件时为COMMIT_CLOSED
+        """
+        now = self._write_commit(self._port_files(port_name), self.commit_files[port_name],
+                                 self.commit_state[port_name], flags)
+        flush_state = self.flush_state[port_name]
+        flush_state['unflushed'] = 0
+        flush_state['synced'] = True
+        flush_state['last_flush'] = now
+        flush_state['last_fsync'] = now
+    
+    def _write_commit(self, files, commit_obj, state, flags=0):
+        """
+        刷新并fsync一组文件，在提交日志中写入提交记录
+        
+        Args:
+            files: 会话的所有文件（包括提交日志）
+            commit_obj: 提交日志
+            state: 提交状态
+            flags: 提交记录标志
+            
+        Returns:
+            float: 提交时刻（单调时间）
+        """
+        for file_obj in files:
+            file_obj.flush()
+        for file_obj in files:
+            if file_obj is not commit_obj:
+                os.fsync(file_obj.fileno())
+        entries = [(suffix, *writer.commit()) for suffix, writer in state['writers'].items()]
+        commit_obj.write(encode_commit(state['seq'], time.time_ns(), flags, entries))
+        commit_obj.flush()
+        os.fsync(commit_obj.fileno())
+        
+        now = time.monotonic()
+        state['seq'] += 1
+        state['uncommitted'] = 0
+        state['last_commit'] = now
+        return now
+    
+    def _close_file(self, port_name, footer=''):
+        """
+        写入结束信息并关闭串口的所有文件，按fsync设置同步到磁盘（调用者持有文件锁）
+        
+        Args:
+            port_name: 串口名称
+            footer: 写入文本文件末尾的结束信息
+        """
+        self._finalize_files(self._detach_files(port_name), footer)
+    
+    def _detach_files(self, port_name):
+        """
+        取下串口当前的文件，清除文件状态，文件仍保持打开（调用者持有文件锁）
+        
+        Args:
+            port_name: 串口名称
+            
+        Returns:
+            dict: 交给_finalize_files()关闭的文件 {'files', 'text', 'commit'}
+        """
+        closing = {
+            'files': self._port_files(port_name),
+            'text': self.current_files.get(port_name),
+            'commit': ((self.commit_files[port_name], self.commit_state[port_name])
+                       if port_name in self.commit_files else None)
+        }
+        for files in (self.current_files, self.file_sizes, self.raw_files, self.index_files,
+                      self.raw_sizes, self.record_files, self.record_sizes, self.record_sync,
+                      self.time_index_files, self.time_index_state, self.commit_files, self.commit_state,
+                      self.rotate_at):
+            files.pop(port_name, None)
+        self.flush_state.pop(port_name, None)
+        return closing
+    
+    def _finalize_files(self, closing, footer=''):
+        """
+        写入结束信息并关闭_detach_files()取下的文件（可在切换线程中调用）
+        
+        Args:
+            closing: _detach_files()的返回值
+            footer: 写入文本文件末尾的结束信息
+        """
+        if footer and closing['text'] is not None:
+            closing['text'].write(footer)
+        if closing['commit'] is not None:
+            # 最后一个提交点标记文件已正常关闭，启动时不需要恢复
+            commit_obj, state = closing['commit']
+            self._write_commit(closing['files'], commit_obj, state, COMMIT_CLOSED)
+        closed = []
+        for file_obj in closing['files']:
+            file_obj.flush()
+            if self.flush_policy['fsync_interval']:
+                os.fsync(file_obj.fileno())
+            file_obj.close()
+            closed.append(str(file_obj.name))
+        
+        # 关闭后压缩：交给后台压缩线程，不占用写入线程
+        method = self.compression['method']
+        if method != COMPRESS_NONE and self.compression['mode'] == COMPRESS_ROTATED:
+            for path in closed:
+                if not path.endswith(tuple(COMPRESSION_SUFFIXES.values())):
+                    self.compressor.submit(path, method, self.compression['level'])
+    
+    def _text_footer(self, note):
+        """文本文件末尾的结束信息"""
+        footer = f"\n# {'='*50}\n"
+        footer += f"# 结束时间: {datetime.now().strftime(TEXT_HEADER_TIME_FORMAT)}\n"
+        footer += f"# {note}\n"
+        return footer
+    
+    def _discard_port(self, port_name):
+        """关闭串口已打开的文件并清除其保存状态（调用者持有文件锁）"""
+        for file_obj in self._port_files(port_name):
+            file_obj.close()
+        self._drop_prepared(port_name)
+        for state in (self.port_formats, self.current_files, self.file_sizes, self.raw_files,
+                      self.index_files, self.raw_sizes, self.record_files, self.record_sizes,
+                      self.record_sync, self.time_index_files, self.time_index_state, self.commit_files,
+                      self.commit_state, self.rotate_at, self.port_baudrates, self.port_configs,
+                      self.decoders, self.line_start, self.flush_state):
+            state.pop(port_name, None)
+    
+    def _finish_records(self, counts):
+        """
+        记录已处理完毕，某个串口或所有串口的记录处理完时唤醒等待flush()的线程
+        
+        Args:
+            counts: 各串口处理完的记录数 {port_name: count}
+        """
+        with self._pending_cond:
+            notify = False
+            for port_name, count in counts.items():
+                self._pending -= count
+                left = self._pending_ports.get(port_name, 0) - count
+                if left > 0:
+                    self._pending_ports[port_name] = left
+                else:
+                    self._pending_ports.pop(port_name, None)
+                    notify = True
+            if notify or self._pending <= 0:
+                self._pending_cond.notify_all()
+    
+    def _write_records(self, records):
+        """
+        写入一批记录（写入线程）
+        
+        Args:
+            records: [(port_name, data, 到达时间, 到达单调时间ns, 方向), ...]
+        """
+        start = time.monotonic()
+        
+        # 按串口分组，保持各串口内的先后顺序
+        by_port = {}
+        total_bytes = 0
+        for port_name, data, arrival_time, arrival_ns, direction in records:
+            by_port.setdefault(port_name, []).append((data, arrival_time, arrival_ns, direction))
+            total_bytes += len(data)
+        
+        with self._file_lock:
+            for port_name, items in by_port.items():
+                if port_name in self.port_formats:
+                    self._write_port(port_name, items)
+        
+        # 更新统计（仅写入线程修改）
+        now = time.monotonic()
+        latency = now - records[0][3] / 1e9
+        stats = self.writer_stats
+        stats['batches'] += 1
+        stats['records'] += len(records)
+        stats['bytes'] += total_bytes
+        stats['last_latency'] = latency
+        stats['max_latency'] = max(stats['max_latency'], latency)
+        stats['total_latency'] += latency
+        stats['last_write_time'] = now - start
+    
+    def _write_port(self, port_name, items):
+        """
+        写入一个串口的若干数据块（调用者持有文件锁）
+        
+        Args:
+            port_name: 串口名称
+            items: [(原始字节数据, 到达时间, 到达单调时间ns, 方向), ...]
+        """
+        # 检查是否需要切换文件（按大小或时间）
+        reason = self._rotation_reason(port_name)
+        if reason:
+            self._rotate_file(port_name, reason)
+        
+        nbytes = 0
+        
+        # 记录日志：收发数据逐块写成记录，每隔RECORD_SYNC_INTERVAL字节插入一个同步标记
+        if port_name in self.record_files:
+            nbytes += self._write_records_log(port_name, items)
+        
+        # 原始字节和文本记录只保存接收的数据
+        items = [item for item in items if item[3] == DIRECTION_RX]
+        
+        # 原始字节原样写入，每个数据块在索引中记录一条
+        if port_name in self.raw_files:
+            offset = self.raw_sizes[port_name]
+            index = bytearray()
+            for data, _, arrival_ns, _ in items:
+                if data:
+                    index += INDEX_RECORD.pack(arrival_ns, offset, len(data))
+                    offset += len(data)
+            raw_bytes = offset - self.raw_sizes[port_name]
+            if raw_bytes:
+                self.raw_files[port_name].write(b''.join(data for data, _, _, _ in items))
+                self.index_files[port_name].write(index)
+                self.raw_sizes[port_name] = offset
+                nbytes += raw_bytes + len(index)
+        
+        # 文本记录：格式化后合并为一次写入
+        if port_name in self.current_files:
+            at_line_start = self.line_start[port_name]
+            text = ''.join(self._format_data(port_name, data, arrival_time)
+                           for data, arrival_time, _, _ in items)
+            if text:
+                # 写入缓冲区，是否刷新由刷新策略决定
+                self.current_files[port_name].write(text)
+                encoded = text.encode('utf-8')
+                offset = self.file_sizes[port_name]
+                self.file_sizes[port_name] += len(encoded)
+                nbytes += len(encoded)
+                if port_name in self.time_index_files:
+                    nbytes += self._index_text(port_name, encoded, offset, at_line_start, items[0][1])
+        
+        if nbytes:
+            self._after_write(port_name, nbytes)
+            self._maybe_prepare(port_name)
+    
+    def _write_records_log(self, port_name, items):
+        """
+        把数据块写入记录日志（调用者持有文件锁）
+        
+        Args:
+            port_name: 串口名称
+            items: [(原始字节数据, 到达时间, 到达单调时间ns, 方向), ...]
+            
+        Returns:
+            int: 写入的字节数
+        """
+        offset = self.record_sizes[port_name]
+        parts = []
+        index_state = self.time_index_state.get(port_name)
+        index = bytearray()
+        for data, arrival_time, arrival_ns, direction in items:
+            if not data:
+                continue
+            if offset - self.record_sync[port_name] >= self.RECORD_SYNC_INTERVAL:
+                sync = encode_sync(arrival_ns, offset)
+                parts.append(sync)
+                self.record_sync[port_name] = offset
+                offset += len(sync)
+            if index_state is not None:
+                # 时间索引指向记录开头，行号为记录序号
+                wall_ns = int(arrival_time.timestamp() * 1e9)
+                if self._time_index_due(index_state, offset, wall_ns):
+                    index += encode_time_index_entry(wall_ns, offset, index_state['line'])
+                    index_state['offset'] = offset
+                    index_state['time'] = wall_ns
+                index_state['line'] += 1
+            header = encode_record(arrival_ns, direction, data)
+            parts.append(header)
+            parts.append(data)
+            offset += len(header) + len(data)
+        nbytes = offset - self.record_sizes[port_name]
+        if nbytes:
+            self.record_files[port_name].write(b''.join(parts))
+            self.record_sizes[port_name] = offset
+        if index:
+            self.time_index_files[port_name].write(index)
+            nbytes += len(index)
+        return nbytes
+    
+    def _maybe_prepare(self, port_name):
+        """文件接近切换条件时，交给切换线程提前创建下一组文件（调用者持有文件锁）"""
+        if port_name in self.next_files:
+            return
+        due = self.rotation['by_size'] and self._current_size(port_name) >= self.max_file_size * self.PREOPEN_RATIO
+        when = None
+        rotate_at = self.rotate_at.get(port_name)
+        if rotate_at is not None and time.time() >= rotate_at - self.PREOPEN_LEAD:
+            # 按时间切换的文件以切换时刻命名
+            due = True
+            when = datetime.fromtimestamp(rotate_at)
+        if due:
+            slot = {'files': None, 'done': threading.Event()}
+            self.next_files[port_name] = slot
+            self.rotator.submit(self._prepare_files, port_name, slot, self.port_formats[port_name], when)
+    
+    def _prepare_files(self, port_name, slot, save_format, when):
+        """提前创建下一组文件（切换线程）"""
+        try:
+            slot['files'] = self._create_session(port_name, save_format, when)
+        finally:
+            slot['done'].set()
+    
+    def _drop_prepared(self, port_name=None):
+        """
+        放弃提前创建的文件（调用者持有文件锁）
+        
+        Args:
+            port_name: 串口名称，为None时放弃所有串口的
+        """
+        for name in ([port_name] if port_name is not None else list(self.next_files.keys())):
+            slot = self.next_files.pop(name, None)
+            if slot is not None:
+                # 切换线程按顺序执行，删除时文件已创建完成
+                self.rotator.submit(self._discard_prepared, slot)
+    
+    def _discard_prepared(self, slot):
+        """删除提前创建但未使用的文件（切换线程）"""
+        if slot['files'] is not None:
+            self._discard_files(slot['files'])
+    
+    def _rotate_file(self, port_name, reason):
+        """
+        切换到新文件（调用者持有文件锁）
+        
+        优先使用切换线程提前创建的文件，还没有创建好时才在这里创建；
+        旧文件的结束信息、刷新和关闭交给切换线程，写入线程不等待磁盘操作。
+        
+        Args:
+            port_name: 串口名称
+            reason: 切换原因，写入新文件头和旧文件末尾
+        """
+        slot = self.next_files.pop(port_name, None)
+        files = None
+        if slot is not None:
+            if slot['done'].is_set():
+                files = slot['files']
+            else:
+                self.rotator.submit(self._discard_prepared, slot)
+        if files is None:
+            files = self._create_session(port_name, self.port_formats[port_name])
+        
+        closing = self._detach_files(port_name)
+        self._install_files(port_name, files, reason)
+        footer = self._text_footer(f"{reason}: {Path(files['base']).name}")
+        self.rotator.submit(self._finish_rotated, closing, footer,
+                            paths=[file_obj.name for file_obj in closing['files']])
+        
+        print(f"{reason}: {port_name}")
+    
+    def _finish_rotated(self, closing, footer):
+        """关闭切换出的旧文件，再检查是否超出保留期限或磁盘配额（切换线程）"""
+        self._finalize_files(closing, footer)
+        self.janitor.run_now()
+    
+    def _format_data(self, port_name, data, arrival_time):
+        """
+        解码数据并在每行行首添加时间戳
+        
+        Args:
+            port_name: 串口名称
+            data: 原始字节数据
+            arrival_time: 数据到达时间
+            
+        Returns:
+            str: 格式化后的文本
+        """
+        # 增量解码（跨块的多字节字符可正确拼接）
+        text = self.decoders[port_name].decode(data)
+        if not text:
+            return ''
+        
+        # 在每行行首添加时间戳
+        timestamp = arrival_time.strftime(TEXT_TIME_FORMAT)[:-3]
+        prefix = f"[{timestamp}] "
+        data_with_timestamp = text.replace('\n', '\n' + prefix)
+        if self.line_start[port_name]:
+            data_with_timestamp = prefix + data_with_timestamp
+        self.line_start[port_name] = text.endswith('\n')
+        if self.line_start[port_name]:
+            data_with_timestamp = data_with_timestamp[:-len(prefix)]
+        return data_with_timestamp
+    
     def stop_saving(self, port_name):
         """
-        停止保存数据
+        停止保存数据（异步模式下先等待该串口已入队的数据写完，最多等待STOP_FLUSH_WAIT）
+        
+        在GUI线程中调用，不等待其他串口的数据；超时后仍未写入的该串口数据被丢弃。
         
         Args:
             port_name: 串口名称
         """
         try:
-            if port_name in self.current_files:
-                file_obj = self.current_files[port_name]
-                
-                # 写入结束信息
-                footer = f"\n# {'='*50}\n"
-                footer += f"# 结束时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-                footer += f"# 文件结束\n"
-                
-                file_obj.write(footer)
-                file_obj.close()
-                
-                del self.current_files[port_name]
-                if port_name in self.file_sizes:
-                    del self.file_sizes[port_name]
-                if port_name in self.port_baudrates:
-                    del self.port_baudrates[port_name]
+            if port_name in self.port_formats and not self.flush(self.STOP_FLUSH_WAIT, port_name):
+                print(f"等待串口 {port_name} 的数据写入超时，未写入的数据将被丢弃")
+            
+            with self._file_lock:
+                if port_name in self.port_formats:
+                    # 写入结束信息
+                    try:
+                        self._close_file(port_name, self._text_footer("文件结束"))
+                    finally:
+                        self._discard_port(port_name)
+                    self.janitor.run_now()
                     
         except Exception as e:
             print(f"停止保存数据失败: {str(e)}")
@@ -210,7 +1533,7 @@ class DataSaver:
         Returns:
             bool: 是否正在保存
         """
-        return port_name in self.current_files
+        return port_name in self.port_formats
     
     def get_save_status(self, port_name):
         """
@@ -222,25 +1545,59 @@ class DataSaver:
         Returns:
             dict: 保存状态信息
         """
-        if port_name not in self.current_files:
-            return {'saving': False, 'file_size': 0, 'file_path': None}
-        
-        file_obj = self.current_files[port_name]
-        current_size = self.file_sizes.get(port_name, 0)
+        with self._file_lock:
+            if port_name not in self.port_formats:
+                return {'saving': False, 'file_size': 0, 'file_path': None}
+            
+            text_obj = self.current_files.get(port_name)
+            raw_obj = self.raw_files.get(port_name)
+            index_obj = self.index_files.get(port_name)
+            record_obj = self.record_files.get(port_name)
+            time_index_obj = self.time_index_files.get(port_name)
+            commit_obj = self.commit_files.get(port_name)
+            status = {
+                'saving': True,
+                'save_format': self.port_formats[port_name],
+                'file_size': self.file_sizes.get(port_name, self.raw_sizes.get(
+                    port_name, self.record_sizes.get(port_name, 0))),
+                'file_path': str((text_obj or raw_obj or record_obj).name),
+                'raw_size': self.raw_sizes.get(port_name, 0),
+                'raw_path': str(raw_obj.name) if raw_obj is not None else None,
+                'index_path': str(index_obj.name) if index_obj is not None else None,
+                'record_path': str(record_obj.name) if record_obj is not None else None,
+                'time_index_path': str(time_index_obj.name) if time_index_obj is not None else None,
+                'commit_path': str(commit_obj.name) if commit_obj is not None else None
+            }
         
-        return {
-            'saving': True,
-            'file_size': current_size,
-            'file_path': str(file_obj.name)
-        }
+        return status
     
     def close_all(self):
-        """关闭所有保存的文件"""
+        """
+        关闭所有保存的文件
+        
+        异步模式下先等待写入队列写完，再等待切换出的旧文件关闭和后台压缩完成（有最长等待时间，
+        未压缩完的文件下次启动时继续压缩）。
+        """
         try:
-            for port_name in list(self.current_files.keys()):
+            if not self.flush(self.CLOSE_FLUSH_WAIT):
+                print("等待写入队列写完超时")
+            for port_name in list(self.port_formats.keys()):
                 try:
                     self.stop_saving(port_name)
                 except Exception as e:
                     print(f"关闭串口 {port_name} 的数据保存时发生错误: {str(e)}")
+            if not self.rotator.wait(self.ROTATION_WAIT):
+                print("等待切换出的日志文件关闭超时")
+            if not self.compressor.wait(self.COMPRESSION_WAIT):
+                print(f"等待日志文件压缩超时，剩余 {self.compressor.pending()} 个文件下次启动时继续压缩")
         except Exception as e:
             print(f"关闭所有数据保存时发生错误: {str(e)}")
+    
+    def shutdown(self):
+        """关闭所有保存的文件，并停止写入线程和日志清理线程（程序退出时调用）"""
+        self.close_all()
+        self.janitor.stop()
+        if self._writer_thread is not None:
+            self.write_queue.close()
+            self._writer_thread.join(timeout=1.0)
+            self._writer_thread = None
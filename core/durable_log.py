@@ -0,0 +1,345 @@
+import io
+import os
+import struct
+import zlib
+from datetime import datetime
+from .record_log import FILE_HEADER, FILE_MAGIC
+from .time_index import TIME_INDEX_ENTRY, TIME_INDEX_HEADER, INDEXED_SUFFIXES
+
+
+# 提交日志 (.cmt) 格式：
+# 文件头为魔数，之后每个提交点一条记录：
+# [序号, 系统时间ns, 标志, 文件数] + 每个文件 [扩展名, 提交时的大小, 上一提交点到本提交点之间数据的CRC32]
+# + 整条记录的CRC32。提交点写入前，会话的所有数据文件都已fsync。
+# 正常关闭时写入带COMMIT_CLOSED标志的最后一条记录，没有该记录的会话在启动时需要恢复。
+COMMIT_MAGIC = b'SRCMT001'
+COMMIT_RECORD = struct.Struct('<QqBB')
+COMMIT_ENTRY = struct.Struct('<8sQI')
+COMMIT_CRC = struct.Struct('<I')
+COMMIT_SUFFIX = '.cmt'
+
+COMMIT_CLOSED = 0x01  # 会话已正常关闭
+
+# 原始字节索引 (.idx)：与data_saver中的格式相同
+INDEX_MAGIC = b'SRIDX001'
+INDEX_HEADER_SIZE = struct.calcsize('<8sqq')
+
+SCAN_CHUNK = 1024 * 1024  # 恢复时读取/校验的块大小
+
+
+class CommitWriter(io.BufferedIOBase):
+    """记录写入量和CRC32的写入包装
+
+    包在未压缩的数据文件外层，统计文件大小和自上一提交点以来写入数据的CRC32，
+    由commit()取出后写入提交日志。
+    """
+
+    def __init__(self, fileobj):
+        """
+        Args:
+            fileobj: 已以二进制写方式打开的文件对象
+        """
+        super().__init__()
+        self.fileobj = fileobj
+        self.name = fileobj.name
+        self.size = 0   # 已写入的字节数
+        self._crc = 0   # 自上一提交点以来写入数据的CRC32
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._crc = zlib.crc32(data, self._crc)
+        self.size += len(data)
+        return self.fileobj.write(data)
+
+    def flush(self):
+        self.fileobj.flush()
+
+    def fileno(self):
+        return self.fileobj.fileno()
+
+    def commit(self):
+        """
+        结束一个提交段
+
+        Returns:
+            tuple: (文件大小, 本段数据的CRC32)
+        """
+        crc = self._crc
+        self._crc = 0
+        return self.size, crc
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            # IOBase.close()会先调用flush()，须在底层文件关闭前
+            super().close()
+        finally:
+            self.fileobj.close()
+
+
+def encode_commit(seq, wall_ns, flags, files):
+    """
+    生成一条提交记录
+
+    Args:
+        seq: 提交序号
+        wall_ns: 系统时间(ns)
+        flags: 标志
+        files: [(扩展名, 大小, CRC32), ...]
+
+    Returns:
+        bytes: 提交记录
+    """
+    body = COMMIT_RECORD.pack(seq, wall_ns, flags, len(files)) + b''.join(
+        COMMIT_ENTRY.pack(suffix.encode('ascii'), size, crc) for suffix, size, crc in files)
+    return body + COMMIT_CRC.pack(zlib.crc32(body))
+
+
+def load_commits(commit_path):
+    """
+    读取提交日志，忽略末尾不完整或CRC错误的记录
+
+    Args:
+        commit_path: 提交日志路径
+
+    Returns:
+        tuple: ([(序号, 系统时间ns, 标志, {扩展名: (大小, CRC32)}), ...], 有效部分的长度)
+
+    Raises:
+        ValueError: 文件格式无效
+    """
+    with open(commit_path, 'rb') as f:
+        data = f.read()
+    if data[:len(COMMIT_MAGIC)] != COMMIT_MAGIC:
+        raise ValueError(f"无效的提交日志文件: {commit_path}")
+    commits = []
+    pos = len(COMMIT_MAGIC)
+    while pos + COMMIT_RECORD.size <= len(data):
+        seq, wall_ns, flags, count = COMMIT_RECORD.unpack_from(data, pos)
+        end = pos + COMMIT_RECORD.size + count * COMMIT_ENTRY.size
+        if end + COMMIT_CRC.size > len(data):
+            break
+        (crc,) = COMMIT_CRC.unpack_from(data, end)
+        if crc != zlib.crc32(data[pos:end]):
+            break
+        files = {}
+        for i in range(count):
+            suffix, size, file_crc = COMMIT_ENTRY.unpack_from(data, pos + COMMIT_RECORD.size + i * COMMIT_ENTRY.size)
+            files[suffix.rstrip(b'\x00').decode('ascii', errors='replace')] = (size, file_crc)
+        commits.append((seq, wall_ns, flags, files))
+        pos = end + COMMIT_CRC.size
+    return commits, pos
+
+
+def _file_crc(f, start, end):
+    """计算文件[start, end)的CRC32，文件长度不足时返回None"""
+    f.seek(start)
+    crc = 0
+    remaining = end - start
+    while remaining > 0:
+        chunk = f.read(min(remaining, SCAN_CHUNK))
+        if not chunk:
+            return None
+        crc = zlib.crc32(chunk, crc)
+        remaining -= len(chunk)
+    return crc
+
+
+def _verify_commit(base, commits, k):
+    """第k个提交点相对上一提交点写入的数据是否都能通过CRC校验"""
+    previous = commits[k - 1][3] if k > 0 else {}
+    for suffix, (size, crc) in commits[k][3].items():
+        start = previous.get(suffix, (0, 0))[0]
+        try:
+            with open(base + suffix, 'rb') as f:
+                if _file_crc(f, start, size) != crc:
+                    return False
+        except OSError:
+            return False
+    return True
+
+
+def _salvage_text(f, start, size):
+    """文本：保留到最后一个完整的行（忽略断电后末尾填充的0字节）"""
+    f.seek(start)
+    tail = f.read(size - start).rstrip(b'\x00')
+    return start + tail.rfind(b'\n') + 1
+
+
+def _salvage_records(f, start, size):
+    """
+    记录日志：记录没有逐条校验，断电后末尾的0字节也能组成结构上完整的记录，
+    因此未提交的记录不保留；还没有提交点时只保留有效的文件头
+    """
+    if start > 0:
+        return start
+    header = f.read(FILE_HEADER.size)
+    if len(header) < FILE_HEADER.size or FILE_HEADER.unpack(header)[0] != FILE_MAGIC:
+        return 0
+    return min(FILE_HEADER.unpack(header)[2], size)
+
+
+def _salvage_index(f, start, size, data_start):
+    """
+    原始字节索引：条目指向的.bin数据可能是断电后填充的0字节，无法校验，
+    因此未提交的条目和数据都不保留；还没有提交点时只保留有效的索引文件头。
+    返回(索引大小, 数据大小)
+    """
+    if start > 0:
+        return start, data_start
+    if size < INDEX_HEADER_SIZE or f.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+        return 0, data_start
+    return INDEX_HEADER_SIZE, data_start
+
+
+def _salvage_time_index(f, start, size, indexed_size):
+    """时间索引：保留偏移递增、指向保留的数据范围内的完整条目（断电后填充的0字节不是有效条目）"""
+    start = max(start, TIME_INDEX_HEADER.size)
+    previous = 0
+    if start > TIME_INDEX_HEADER.size:
+        f.seek(start - TIME_INDEX_ENTRY.size)
+        entry = f.read(TIME_INDEX_ENTRY.size)
+        if len(entry) == TIME_INDEX_ENTRY.size:
+            previous = TIME_INDEX_ENTRY.unpack(entry)[1]
+    f.seek(start)
+    body = f.read(size - start)
+    count = 0
+    for wall_ns, offset, _ in TIME_INDEX_ENTRY.iter_unpack(body[:len(body) - len(body) % TIME_INDEX_ENTRY.size]):
+        if wall_ns <= 0 or offset < previous or offset >= indexed_size:
+            break
+        previous = offset
+        count += 1
+    return start + count * TIME_INDEX_ENTRY.size
+
+
+def recover_session(commit_path):
+    """
+    恢复一个未正常关闭的会话
+
+    从最后一个提交点向前找到数据全部通过CRC校验的提交点。最后一个提交点有效时，
+    其后未提交的文本保留完整的行（去掉末尾的0字节）；二进制文件（记录日志、原始字节及索引）
+    的未提交部分无法校验，截断到提交点；时间索引只保留指向保留数据的条目。
+    最后一个提交点无效时，所有文件截断到有效的提交点。
+    恢复后在文本文件末尾写入结束信息，并写入关闭记录。
+    成本只与最后一个提交段和未提交的数据量有关，与文件大小无关。
+
+    Args:
+        commit_path: 提交日志路径
+
+    Returns:
+        dict: 恢复结果 {'session', 'verified', 'commit_time', 'files': {扩展名: (原大小, 恢复后大小)}}，
+              会话已正常关闭时返回None
+    """
+    commit_path = str(commit_path)
+    commits, valid_end = load_commits(commit_path)
+    if commits and commits[-1][2] & COMMIT_CLOSED:
+        return None
+    base = commit_path[:-len(COMMIT_SUFFIX)]
+
+    # 找到数据全部通过校验的最后一个提交点
+    k = len(commits) - 1
+    while k >= 0 and not _verify_commit(base, commits, k):
+        k -= 1
+    verified = k == len(commits) - 1
+    committed = commits[k][3] if k >= 0 else {}
+    suffixes = list(commits[-1][3]) if commits else [
+        suffix for suffix in ('.txt', '.rec', '.bin', '.idx', '.tix') if os.path.exists(base + suffix)]
+
+    # 各文件恢复后的大小
+    sizes = {}
+    new_sizes = {}
+    for suffix in suffixes:
+        path = base + suffix
+        sizes[suffix] = os.path.getsize(path) if os.path.exists(path) else 0
+        new_sizes[suffix] = committed.get(suffix, (0, 0))[0]
+    if verified:
+        # 最后一个提交点之后的数据按格式检查，保留完整的部分
+        for suffix in ('.txt', '.rec'):
+            if suffix not in sizes:
+                continue
+            with open(base + suffix, 'rb') as f:
+                if suffix == '.txt':
+                    new_sizes[suffix] = _salvage_text(f, new_sizes[suffix], sizes[suffix])
+                else:
+                    new_sizes[suffix] = _salvage_records(f, new_sizes[suffix], sizes[suffix])
+        if '.idx' in sizes and '.bin' in sizes:
+            with open(base + '.idx', 'rb') as f:
+                new_sizes['.idx'], new_sizes['.bin'] = _salvage_index(
+                    f, new_sizes['.idx'], sizes['.idx'], new_sizes['.bin'])
+        if '.tix' in sizes:
+            with open(base + '.tix', 'rb') as f:
+                header = f.read(TIME_INDEX_HEADER.size)
+                indexed = None
+                if len(header) == TIME_INDEX_HEADER.size:
+                    indexed = INDEXED_SUFFIXES.get(TIME_INDEX_HEADER.unpack(header)[1])
+                new_sizes['.tix'] = _salvage_time_index(f, new_sizes['.tix'], sizes['.tix'],
+                                                        new_sizes.get(indexed, 0))
+
+    # 截断，写入结束信息和关闭记录
+    commit_time = datetime.fromtimestamp(commits[k][1] / 1e9) if k >= 0 else None
+    entries = []
+    for suffix in suffixes:
+        path = base + suffix
+        if not os.path.exists(path):
+            continue
+        start = committed.get(suffix, (0, 0))[0]
+        with open(path, 'r+b') as f:
+            f.truncate(new_sizes[suffix])
+            if suffix == '.txt':
+                f.seek(0, os.SEEK_END)
+                footer = f"\n# {'='*50}\n"
+                footer += f"# 异常结束，恢复时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
+                if commit_time is not None:
+                    footer += f"# 最后提交时间: {commit_time.strftime('%Y-%m-%d %H:%M:%S')}\n"
+                footer += f"# 文件结束\n"
+                f.write(footer.encode('utf-8'))
+                new_sizes[suffix] = f.tell()
+            f.flush()
+            os.fsync(f.fileno())
+            entries.append((suffix, new_sizes[suffix], _file_crc(f, min(start, new_sizes[suffix]),
+                                                                 new_sizes[suffix]) or 0))
+    with open(commit_path, 'r+b') as f:
+        f.truncate(valid_end)
+        f.seek(valid_end)
+        seq = commits[-1][0] + 1 if commits else 0
+        f.write(encode_commit(seq, int(datetime.now().timestamp() * 1e9), COMMIT_CLOSED, entries))
+        f.flush()
+        os.fsync(f.fileno())
+
+    return {
+        'session': base,
+        'verified': verified,
+        'commit_time': commit_time,
+        'files': {suffix: (sizes[suffix], new_sizes[suffix]) for suffix in sizes}
+    }
+
+
+def recover_sessions(base_dir, exclude=()):
+    """
+    扫描日志目录，恢复所有未正常关闭的会话
+
+    Args:
+        base_dir: 日志目录
+        exclude: 仍在写入的文件路径，这些会话不会被恢复
+
+    Returns:
+        list: 各会话的恢复结果，见recover_session()
+    """
+    reports = []
+    if not os.path.isdir(base_dir):
+        return reports
+    exclude = set(str(path) for path in exclude)
+    for entry in os.scandir(base_dir):
+        if not entry.is_file() or not entry.name.endswith(COMMIT_SUFFIX) or entry.path in exclude:
+            continue
+        try:
+            report = recover_session(entry.path)
+        except (OSError, ValueError) as e:
+            print(f"恢复日志失败: {entry.path}: {str(e)}")
+            continue
+        if report is not None:
+            reports.append(report)
+    return reports
@@ -0,0 +1,139 @@
+import bisect
+from array import array
+from collections import OrderedDict
+from datetime import datetime
+
+
+HEX_ROW_WIDTHS = (16, 32)  # 每行字节数
+
+# 可打印ASCII字符原样显示，其余字节显示为'.'
+ASCII_TABLE = bytes(b if 32 <= b < 127 else 0x2E for b in range(256))
+
+
+class HexDump:
+    """LineRing中字节数据的十六进制+ASCII显示行
+
+    与LineRing提供相同的按行访问接口（first_line、next_line、line_text()），
+    可以直接作为ReceiveLogModel的数据源。第r行固定为绝对偏移[r*width, (r+1)*width)的字节，
+    显示为：偏移  首字节到达时间  十六进制  ASCII。
+    数据写入后不会改变，已写满的行格式化一次后按行号缓存（LRU），
+    滚动和重绘时不再重新格式化；只有最后一行还在增长，每次访问时重新格式化。
+    """
+
+    CACHE_ROWS = 4096    # 最多缓存的格式化行数
+    MAX_MARKS = 65536    # 最多保留的到达时间记录数
+
+    def __init__(self, lines, width=16):
+        """
+        Args:
+            lines: LineRing
+            width: 每行字节数，16或32
+        """
+        self.lines = lines
+        self.width = self._check_width(width)
+        self._mark_offsets = array('q')  # 数据块的起始偏移（递增）
+        self._mark_times = array('d')    # 数据块的到达时间（时间戳）
+        self._cache = OrderedDict()      # 行号 -> 格式化后的行
+
+    @staticmethod
+    def _check_width(width):
+        """检查每行字节数"""
+        if width not in HEX_ROW_WIDTHS:
+            raise ValueError(f"无效的每行字节数: {width}")
+        return width
+
+    def set_width(self, width):
+        """
+        设置每行字节数（行号随之改变，缓存清空）
+
+        Args:
+            width: 16或32
+        """
+        self.width = self._check_width(width)
+        self._cache.clear()
+
+    def mark(self, offset, wall_time):
+        """
+        记录从offset开始的数据的到达时间
+
+        Args:
+            offset: LineRing字节环中的绝对偏移
+            wall_time: 到达时间（时间戳）
+        """
+        if self._mark_offsets and offset <= self._mark_offsets[-1]:
+            return
+        self._mark_offsets.append(offset)
+        self._mark_times.append(wall_time)
+        if len(self._mark_offsets) > 2 * self.MAX_MARKS:
+            del self._mark_offsets[:self.MAX_MARKS]
+            del self._mark_times[:self.MAX_MARKS]
+
+    def _start_offset(self):
+        """仍保留的最早偏移"""
+        lines = self.lines
+        data = lines.data
+        return max(data.oldest_valid(), data.head - lines.max_bytes, lines.start_offset)
+
+    @property
+    def first_line(self):
+        """最早一行的行号"""
+        return self._start_offset() // self.width
+
+    @property
+    def next_line(self):
+        """下一行的行号（最后一行可能未写满）"""
+        return -(-self.lines.data.head // self.width)
+
+    def __len__(self):
+        """保留的行数"""
+        if self._start_offset() >= self.lines.data.head:
+            return 0
+        return self.next_line - self.first_line
+
+    def line_text(self, row, limit=None):
+        """
+        获取一行的显示文本
+
+        Args:
+            row: 行号（first_line ~ next_line-1）
+            limit: 与LineRing.line_text()保持一致，不使用
+
+        Returns:
+            str: 显示文本，行号超出范围时为空字符串
+        """
+        width = self.width
+        start = row * width
+        begin = max(start, self._start_offset())
+        if begin == start:
+            text = self._cache.get(row)
+            if text is not None:
+                self._cache.move_to_end(row)
+                return text
+        end = min(start + width, self.lines.data.head)
+        if begin >= end:
+            return ''
+        views = self.lines.data.views(begin, end)
+        data = views[0].tobytes() if len(views) == 1 else b''.join(views)
+        pad = '   ' * (begin - start)
+        hex_text = pad + data.hex(' ').upper()
+        ascii_text = ' ' * (begin - start) + data.translate(ASCII_TABLE).decode('ascii')
+        text = f"{start:08X}  {self._time_text(begin)}  {hex_text:<{width * 3 - 1}}  {ascii_text}"
+        if begin == start and end == start + width:
+            # 已写满的行不会再改变
+            self._cache[row] = text
+            if len(self._cache) > self.CACHE_ROWS:
+                self._cache.popitem(last=False)
+        return text
+
+    def _time_text(self, offset):
+        """offset处数据的到达时间"""
+        i = bisect.bisect_right(self._mark_offsets, offset) - 1
+        if i < 0:
+            return ' ' * 12
+        return datetime.fromtimestamp(self._mark_times[i]).strftime('%H:%M:%S.%f')[:-3]
+
+    def clear(self):
+        """清空缓存和到达时间记录（LineRing清空时调用）"""
+        self._cache.clear()
+        del self._mark_offsets[:]
+        del self._mark_times[:]
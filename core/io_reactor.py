@@ -0,0 +1,221 @@
+import os
+import queue
+import selectors
+import socket
+import threading
+from .bounded_queue import POLICY_BLOCK
+
+
+class SerialIOReactor:
+    """单线程串口I/O反应器
+
+    把所有已打开串口的文件描述符注册到selectors（Linux下为epoll），
+    由一个I/O线程统一等待，只有串口有数据可读时才被唤醒，并用os.readv
+    直接读入该串口的接收环形缓冲区。
+    block策略的环形缓冲区写满时暂停监听该串口，数据留在驱动缓冲区中，
+    消费者腾出空间后再恢复。
+    仅支持可以提供文件描述符的POSIX平台。
+    """
+
+    DEFAULT_READ_SIZE = 64 * 1024
+    PAUSE_POLL_INTERVAL = 0.01  # 有暂停的串口时检查缓冲区空间的间隔（秒）
+
+    def __init__(self, on_data, on_error, read_size=DEFAULT_READ_SIZE):
+        """
+        初始化I/O反应器
+
+        Args:
+            on_data: 数据回调 on_data(port_name, nbytes)，数据写入环形缓冲区后在I/O线程中调用
+            on_error: 错误回调 on_error(port_name, error_message)，在I/O线程中调用
+            read_size: 单次读取的最大字节数
+        """
+        self.on_data = on_data
+        self.on_error = on_error
+        self.read_size = read_size
+
+        self._selector = None
+        self._commands = queue.Queue()  # 跨线程的注册/注销命令
+        self._wake_r, self._wake_w = socket.socketpair()
+        self._wake_r.setblocking(False)
+        self._wake_w.setblocking(False)
+        self._ports = {}  # 已注册串口 {port_name: (serial_port, ring)}（仅I/O线程访问）
+        self._paused = {}  # 因缓冲区满而暂停监听的串口 {port_name: fd}（仅I/O线程访问）
+        self._running = False
+        self._thread = None
+
+    @staticmethod
+    def is_supported():
+        """
+        检查当前平台是否支持
+
+        Returns:
+            bool: 是否支持
+        """
+        return os.name == 'posix'
+
+    def start(self):
+        """启动I/O线程"""
+        if self._running:
+            return
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._wake_r, selectors.EVENT_READ, None)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止I/O线程"""
+        if not self._running:
+            return
+        self._running = False
+        self._wakeup()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def register(self, port_name, serial_port, ring, timeout=1.0):
+        """
+        注册串口（可在任意线程调用，等待I/O线程完成注册）
+
+        Args:
+            port_name: 串口名称
+            serial_port: 已打开的串口对象
+            ring: ByteRingBuffer 串口的接收环形缓冲区
+            timeout: 等待注册完成的超时时间（秒）
+
+        Returns:
+            bool: 是否注册成功
+        """
+        return self._call('register', port_name, (serial_port, ring), timeout)
+
+    def unregister(self, port_name, timeout=1.0):
+        """
+        注销串口（可在任意线程调用，返回后I/O线程不再访问该串口）
+
+        Args:
+            port_name: 串口名称
+            timeout: 等待注销完成的超时时间（秒）
+
+        Returns:
+            bool: 是否注销成功
+        """
+        return self._call('unregister', port_name, None, timeout)
+
+    def get_registered_ports(self):
+        """获取已注册的串口名称列表"""
+        return list(self._ports.keys())
+
+    def _call(self, action, port_name, target, timeout):
+        """向I/O线程提交命令并等待结果"""
+        if not self._running:
+            return False
+        done = threading.Event()
+        result = {'ok': False}
+        self._commands.put((action, port_name, target, done, result))
+        self._wakeup()
+        if not done.wait(timeout):
+            return False
+        return result['ok']
+
+    def _wakeup(self):
+        """唤醒I/O线程"""
+        try:
+            self._wake_w.send(b'\x00')
+        except (BlockingIOError, OSError):
+            # 唤醒缓冲区已满说明I/O线程已有待处理的唤醒
+            pass
+
+    def _process_commands(self):
+        """处理注册/注销命令（I/O线程）"""
+        try:
+            while True:
+                self._wake_r.recv(4096)
+        except (BlockingIOError, OSError):
+            pass
+
+        while True:
+            try:
+                action, port_name, target, done, result = self._commands.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                if action == 'register':
+                    self._remove_port(port_name)
+                    serial_port, _ = target
+                    self._selector.register(serial_port.fileno(), selectors.EVENT_READ, port_name)
+                    self._ports[port_name] = target
+                    result['ok'] = True
+                elif action == 'unregister':
+                    self._remove_port(port_name)
+                    result['ok'] = True
+            except Exception as e:
+                self.on_error(port_name, f"I/O反应器{action}失败: {str(e)}")
+            finally:
+                done.set()
+
+    def _remove_port(self, port_name):
+        """从选择器中移除串口（I/O线程）"""
+        if self._ports.pop(port_name, None) is None:
+            return
+        if self._paused.pop(port_name, None) is not None:
+            return
+        for key in list(self._selector.get_map().values()):
+            if key.data == port_name:
+                self._selector.unregister(key.fileobj)
+                break
+
+    def _read_port(self, port_name, fd):
+        """读取串口中已到达的数据到环形缓冲区（I/O线程）"""
+        _, ring = self._ports[port_name]
+        if ring.policy == POLICY_BLOCK and ring.is_full():
+            self._pause_port(port_name, fd)
+            return
+        try:
+            nbytes = ring.fill_from(lambda view: os.readv(fd, [view]), self.read_size)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as e:
+            self._remove_port(port_name)
+            self.on_error(port_name, f"接收数据错误: {str(e)}")
+            return
+
+        if not nbytes:
+            # 设备报告可读却读不到数据，说明设备已断开
+            self._remove_port(port_name)
+            self.on_error(port_name, "接收数据错误: 设备已断开")
+            return
+
+        self.on_data(port_name, nbytes)
+
+    def _pause_port(self, port_name, fd):
+        """暂停监听串口，直到其环形缓冲区有空间（I/O线程）"""
+        self._selector.unregister(fd)
+        self._paused[port_name] = fd
+
+    def _resume_ports(self):
+        """恢复监听已有缓冲区空间的串口（I/O线程）"""
+        for port_name, fd in list(self._paused.items()):
+            _, ring = self._ports[port_name]
+            if ring.policy != POLICY_BLOCK or not ring.is_full():
+                del self._paused[port_name]
+                self._selector.register(fd, selectors.EVENT_READ, port_name)
+
+    def _run(self):
+        """I/O线程主循环"""
+        try:
+            while self._running:
+                if self._paused:
+                    self._resume_ports()
+                timeout = self.PAUSE_POLL_INTERVAL if self._paused else None
+                for key, _ in self._selector.select(timeout):
+                    if key.data is None:
+                        self._process_commands()
+                    elif key.data in self._ports:
+                        self._read_port(key.data, key.fd)
+        except Exception as e:
+            self.on_error("", f"I/O反应器线程错误: {str(e)}")
+        finally:
+            self._running = False
+            self._ports.clear()
+            self._paused.clear()
+            self._selector.close()
@@ -0,0 +1,93 @@
+LINE_LF = 'lf'      # 按\n分行
+LINE_CRLF = 'crlf'  # 按\r\n分行
+LINE_CR = 'cr'      # 按\r分行
+
+LINE_DELIMITERS = {
+    LINE_LF: b'\n',
+    LINE_CRLF: b'\r\n',
+    LINE_CR: b'\r'
+}
+
+
+def check_delimiter(delimiter):
+    """
+    检查并转换行分隔符
+
+    Args:
+        delimiter: 'lf'、'crlf'、'cr' 或非空的字节串
+
+    Returns:
+        bytes: 分隔符
+
+    Raises:
+        ValueError: 无效的分隔符
+    """
+    if isinstance(delimiter, str):
+        if delimiter not in LINE_DELIMITERS:
+            raise ValueError(f"无效的行分隔符: {delimiter}")
+        return LINE_DELIMITERS[delimiter]
+    delimiter = bytes(delimiter)
+    if not delimiter:
+        raise ValueError("行分隔符不能为空")
+    return delimiter
+
+
+class LineIndexer:
+    """字节环中的行索引器
+
+    数据写入ByteRingBuffer后调用scan()，直接在环的底层缓冲区上查找分隔符（不复制、不解码），
+    返回新结束的各行的起止偏移（绝对偏移，不含分隔符）。
+    最后一个分隔符之后的数据是还没有结束的行，开头记在line_start，之后写入的数据接在它后面；
+    多字节分隔符被拆在两次写入之间或跨过缓冲区末尾时也能找到。
+    """
+
+    def __init__(self, ring, delimiter=LINE_LF):
+        """
+        Args:
+            ring: ByteRingBuffer
+            delimiter: 行分隔符，见check_delimiter()
+        """
+        self.ring = ring
+        self.delimiter = check_delimiter(delimiter)
+        self.line_start = ring.head  # 还没有结束的行的开头
+        self.scanned = ring.head     # 已查找过的位置
+
+    def set_delimiter(self, delimiter):
+        """
+        设置行分隔符，还没有结束的行按新的分隔符重新查找
+
+        Args:
+            delimiter: 行分隔符，见check_delimiter()
+        """
+        self.delimiter = check_delimiter(delimiter)
+        self.scanned = self.line_start
+
+    def scan(self):
+        """
+        查找新写入的数据中的分隔符
+
+        Returns:
+            list: 新结束的行 [(行首偏移, 行尾偏移), ...]
+        """
+        ring = self.ring
+        head = ring.head
+        delimiter = self.delimiter
+        oldest = ring.oldest_valid()
+        if self.line_start < oldest:
+            # 还没有结束的行开头已被覆盖
+            self.line_start = oldest
+        # 分隔符可能从上次查找的末尾之前开始
+        pos = max(self.scanned - len(delimiter) + 1, self.line_start)
+        lines = []
+        while True:
+            found = ring.find(delimiter, pos, head)
+            if found < 0:
+                break
+            lines.append((self.line_start, found))
+            self.line_start = pos = found + len(delimiter)
+        self.scanned = head
+        return lines
+
+    def reset(self):
+        """丢弃还没有结束的行，从最新写入的位置开始"""
+        self.line_start = self.scanned = self.ring.head
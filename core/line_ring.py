@@ -0,0 +1,209 @@
+from array import array
+from .ring_buffer import ByteRingBuffer
+from .line_index import LINE_LF, LineIndexer
+
+
+class LineRing:
+    """按行访问的接收数据环形缓冲区（用于接收窗口的显示）
+
+    原始字节存放在固定容量的ByteRingBuffer中，写满后覆盖最旧的数据；
+    另有固定容量的行偏移环，按绝对行号记录每行在字节环中的起止偏移（绝对偏移，不含分隔符）。
+    分行由LineIndexer直接在字节环上查找分隔符完成，写入之外不再复制数据。
+    内存占用固定为字节环加上行偏移环，与收到的数据量无关。
+    行号单调递增，first_line为仍保留的最早一行；超出行数上限、字节上限或数据已被覆盖的行从头部删除。
+    行首、行尾偏移都随行号递增，删除时二分查找第一条保留的行，一次移动first_line，
+    与删除的行数无关；保留的字节数由偏移直接算出，不需要逐行累加。
+    最后一行可能还没有分隔符，之后收到的数据接在它后面，跨多次读取的行不会被拆开。
+    文本只在line_text()时解码，iter_lines()逐行取出原始字节用于导出。
+    """
+
+    MAX_ROW_BYTES = 4096  # 单行最多显示的字节数，超长的行截断显示
+
+    def __init__(self, capacity, max_lines, delimiter=LINE_LF):
+        """
+        Args:
+            capacity: 字节环容量（字节），也是最多保留的字节数
+            max_lines: 最多保留的行数
+            delimiter: 行分隔符，见line_index.check_delimiter()
+        """
+        self.data = ByteRingBuffer(capacity)
+        self.indexer = LineIndexer(self.data, delimiter)
+        self.max_lines = max(1, int(max_lines))
+        self.max_bytes = self.data.capacity  # 最多保留的字节数（不超过字节环容量）
+        self._slots = self.max_lines          # 行偏移环的大小
+        self._starts = array('q', bytes(8 * self._slots))  # 行号 % _slots -> 行首偏移
+        self._ends = array('q', bytes(8 * self._slots))    # 行号 % _slots -> 行尾偏移
+        self.first_line = 0    # 最早一行的行号
+        self.next_line = 0     # 下一行的行号
+        self.line_open = False  # 最后一行是否还没有分隔符
+        self.start_offset = 0   # 最近一次清空时的偏移，之前的数据不再显示
+
+    def __len__(self):
+        """保留的行数"""
+        return self.next_line - self.first_line
+    
+    def byte_count(self):
+        """
+        保留的字节数（从最早一行的行首到最新数据，包括分隔符）
+        
+        Returns:
+            int: 字节数
+        """
+        if self.first_line == self.next_line:
+            return 0
+        return self.data.head - self._starts[self.first_line % self._slots]
+    
+    def set_limits(self, max_lines=None, max_bytes=None):
+        """
+        设置保留的行数和字节数上限，超出的旧行一次删除
+        
+        Args:
+            max_lines: 最多保留的行数
+            max_bytes: 最多保留的字节数，超过字节环容量时按容量计
+        """
+        if max_lines is not None:
+            max_lines = max(1, int(max_lines))
+            if max_lines > self._slots:
+                self._resize(max_lines)
+            self.max_lines = max_lines
+            self.first_line = max(self.first_line, self.next_line - self.max_lines)
+        if max_bytes is not None:
+            self.max_bytes = min(self.data.capacity, max(1, int(max_bytes)))
+        self._trim()
+    
+    def _resize(self, slots):
+        """扩大行偏移环，保留现有的行"""
+        starts = array('q', bytes(8 * slots))
+        ends = array('q', bytes(8 * slots))
+        for line in range(self.first_line, self.next_line):
+            starts[line % slots] = self._starts[line % self._slots]
+            ends[line % slots] = self._ends[line % self._slots]
+        self._starts = starts
+        self._ends = ends
+        self._slots = slots
+
+    def append(self, data):
+        """
+        追加接收的数据，按分隔符分行
+
+        Args:
+            data: 字节数据（bytes/bytearray/memoryview）
+        """
+        if not len(data):
+            return
+        self.data.write(data)
+        self._index()
+
+    def set_delimiter(self, delimiter):
+        """
+        设置行分隔符（对还没有结束的最后一行和之后的数据生效）
+
+        Args:
+            delimiter: 行分隔符，见line_index.check_delimiter()
+        """
+        self.indexer.set_delimiter(delimiter)
+        self._index()
+
+    def _index(self):
+        """把新结束的行和还没有结束的最后一行记入行偏移环"""
+        for start, end in self.indexer.scan():
+            if self.line_open:
+                # 还没有结束的最后一行现在结束了
+                self._ends[(self.next_line - 1) % self._slots] = end
+                self.line_open = False
+            else:
+                self._add_line(start, end)
+        head = self.data.head
+        if self.indexer.line_start < head:
+            if self.line_open:
+                self._ends[(self.next_line - 1) % self._slots] = head
+            else:
+                self._add_line(self.indexer.line_start, head)
+                self.line_open = True
+        # 一块数据中的行数超过上限时，行偏移环中最早的行已被覆盖
+        self.first_line = max(self.first_line, self.next_line - self.max_lines)
+        self._trim()
+
+    def _add_line(self, start, end):
+        """在行偏移环末尾新增一行"""
+        slot = self.next_line % self._slots
+        self._starts[slot] = start
+        self._ends[slot] = end
+        self.next_line += 1
+
+    def _trim(self):
+        """
+        删除超出字节上限或数据已被覆盖的行（二分查找，一次删除）
+        
+        最早一行只有开头超出时，从未超出的部分开始显示。
+        """
+        oldest = max(self.data.oldest_valid(), self.data.head - self.max_bytes)
+        lo, hi = self.first_line, self.next_line
+        while lo < hi:
+            mid = (lo + hi) // 2
+            slot = mid % self._slots
+            if self._ends[slot] > oldest or self._starts[slot] >= oldest:
+                hi = mid
+            else:
+                lo = mid + 1
+        self.first_line = lo
+        if lo < self.next_line:
+            slot = lo % self._slots
+            if self._starts[slot] < oldest:
+                self._starts[slot] = oldest
+
+    def line_bytes(self, line, limit=None):
+        """
+        获取一行的原始字节
+
+        Args:
+            line: 行号（first_line ~ next_line-1）
+            limit: 最多返回的字节数，为None时不限制
+
+        Returns:
+            bytes: 行内容（不含换行符），行号超出范围时为b''
+        """
+        if line < self.first_line or line >= self.next_line:
+            return b''
+        slot = line % self._slots
+        start = self._starts[slot]
+        end = self._ends[slot]
+        if limit is not None:
+            end = min(end, start + limit)
+        return b''.join(self.data.views(start, end))
+
+    def line_text(self, line, limit=MAX_ROW_BYTES):
+        """
+        获取一行的显示文本
+
+        Args:
+            line: 行号（first_line ~ next_line-1）
+            limit: 最多解码的字节数，超出时截断显示，为None时不限制
+
+        Returns:
+            str: 行文本，行号超出范围时为空字符串
+        """
+        if line < self.first_line or line >= self.next_line:
+            return ''
+        slot = line % self._slots
+        truncated = limit is not None and self._ends[slot] - self._starts[slot] > limit
+        text = self.line_bytes(line, limit).decode('utf-8', errors='replace').rstrip('\r')
+        return text + ' …' if truncated else text
+
+    def iter_lines(self):
+        """
+        逐行取出保留的行（用于导出，每次只复制一行）
+
+        Yields:
+            bytes: 行内容（不含分隔符）
+        """
+        for line in range(self.first_line, self.next_line):
+            yield self.line_bytes(line)
+
+    def clear(self):
+        """删除所有行"""
+        self.data.clear()
+        self.indexer.reset()
+        self.start_offset = self.data.head
+        self.first_line = self.next_line
+        self.line_open = False
@@ -0,0 +1,408 @@
+import io
+import os
+import lzma
+import zlib
+import shutil
+import tempfile
+from .task_worker import TaskWorker
+
+
+# 压缩方式
+COMPRESS_NONE = 'none'
+COMPRESS_GZIP = 'gzip'
+COMPRESS_ZLIB = 'zlib'
+COMPRESS_LZMA = 'lzma'
+COMPRESSIONS = (COMPRESS_NONE, COMPRESS_GZIP, COMPRESS_ZLIB, COMPRESS_LZMA)
+
+# 压缩时机
+COMPRESS_STREAM = 'stream'    # 写入时直接压缩
+COMPRESS_ROTATED = 'rotated'  # 先写未压缩文件，文件关闭后由后台线程压缩
+COMPRESSION_MODES = (COMPRESS_STREAM, COMPRESS_ROTATED)
+
+# 压缩文件扩展名
+COMPRESSION_SUFFIXES = {
+    COMPRESS_GZIP: '.gz',
+    COMPRESS_ZLIB: '.zz',
+    COMPRESS_LZMA: '.xz'
+}
+
+COPY_CHUNK_SIZE = 1024 * 1024  # 压缩/解压复制的块大小
+COMPRESS_JOURNAL = '.compress_queue'  # 日志目录中的压缩队列记录文件名
+
+
+class OpenCancelled(Exception):
+    """open_seekable()解压被取消"""
+
+
+def check_compression(method):
+    """
+    检查压缩方式是否有效
+
+    Args:
+        method: 压缩方式
+
+    Returns:
+        str: 有效的压缩方式
+
+    Raises:
+        ValueError: 压缩方式无效
+    """
+    if method not in COMPRESSIONS:
+        raise ValueError(f"无效的压缩方式: {method}")
+    return method
+
+
+def detect_compression(path):
+    """
+    根据文件开头的魔数判断压缩方式
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        str: 压缩方式，未压缩时为'none'
+    """
+    with open(path, 'rb') as f:
+        magic = f.read(6)
+    if magic[:2] == b'\x1f\x8b':
+        return COMPRESS_GZIP
+    if magic == b'\xfd7zXZ\x00':
+        return COMPRESS_LZMA
+    # zlib头：CMF为0x78，且(CMF*256+FLG)能被31整除
+    if len(magic) >= 2 and magic[0] == 0x78 and (magic[0] * 256 + magic[1]) % 31 == 0:
+        if str(path).endswith(COMPRESSION_SUFFIXES[COMPRESS_ZLIB]):
+            return COMPRESS_ZLIB
+    return COMPRESS_NONE
+
+
+class CompressWriter(io.BufferedIOBase):
+    """流式压缩写入
+
+    gzip和zlib在flush()时输出同步点，之前写入的数据都可以被解压；
+    lzma不支持同步点，关闭后文件才完整。
+    """
+
+    def __init__(self, fileobj, method, level=6):
+        """
+        Args:
+            fileobj: 已以二进制写方式打开的文件对象
+            method: 压缩方式 'gzip'、'zlib' 或 'lzma'
+            level: 压缩等级（gzip/zlib为1-9，lzma为预设等级0-9）
+        """
+        super().__init__()
+        self.fileobj = fileobj
+        self.name = fileobj.name
+        self.method = method
+        if method == COMPRESS_GZIP:
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        elif method == COMPRESS_LZMA:
+            self._compressor = lzma.LZMACompressor(preset=level)
+        else:
+            self._compressor = zlib.compressobj(level)
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.fileobj.write(self._compressor.compress(data))
+        return len(data)
+
+    def flush(self):
+        if self._compressor is None:
+            return
+        if self.method != COMPRESS_LZMA:
+            self.fileobj.write(self._compressor.flush(zlib.Z_SYNC_FLUSH))
+        self.fileobj.flush()
+
+    def fileno(self):
+        return self.fileobj.fileno()
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            if self._compressor is not None:
+                self.fileobj.write(self._compressor.flush())
+                self._compressor = None
+        finally:
+            self.fileobj.close()
+            super().close()
+
+
+class DecompressReader(io.RawIOBase):
+    """流式解压读取
+
+    可以读取尚在写入或未正常结束的压缩流（读到已写入的部分为止），
+    支持多个压缩流首尾相接的文件。
+    """
+
+    def __init__(self, fileobj, method):
+        """
+        Args:
+            fileobj: 已以二进制读方式打开的文件对象
+            method: 压缩方式 'gzip'、'zlib' 或 'lzma'
+        """
+        super().__init__()
+        self.fileobj = fileobj
+        self.name = fileobj.name
+        self.method = method
+        self._decompressor = self._new_decompressor()
+        self._buffer = b''
+
+    def _new_decompressor(self):
+        """创建解压器"""
+        if self.method == COMPRESS_GZIP:
+            return zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if self.method == COMPRESS_LZMA:
+            return lzma.LZMADecompressor()
+        return zlib.decompressobj()
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while not self._buffer:
+            if self._decompressor.eof:
+                # 一个压缩流结束，后面可能还有下一个
+                chunk = self._decompressor.unused_data
+                self._decompressor = self._new_decompressor()
+            else:
+                chunk = b''
+            if not chunk:
+                chunk = self.fileobj.read(COPY_CHUNK_SIZE)
+            if not chunk:
+                return 0
+            self._buffer = self._decompressor.decompress(chunk)
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+    def close(self):
+        if not self.closed:
+            self.fileobj.close()
+        super().close()
+
+
+def open_compressed_writer(path, method, level=6, buffering=COPY_CHUNK_SIZE):
+    """
+    以流式压缩方式打开二进制文件用于写入
+
+    Args:
+        path: 文件路径（不会自动添加扩展名）
+        method: 压缩方式
+        level: 压缩等级 1-9（lzma为预设等级0-9）
+        buffering: 底层文件的写缓冲区大小
+
+    Returns:
+        二进制写文件对象，未压缩时为普通文件
+    """
+    check_compression(method)
+    fileobj = open(path, 'wb', buffering=buffering)
+    if method == COMPRESS_NONE:
+        return fileobj
+    return CompressWriter(fileobj, method, level)
+
+
+def open_log(path):
+    """
+    以二进制读方式打开日志文件，压缩文件自动解压（可读取正在写入的压缩文件）
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        二进制读文件对象
+    """
+    method = detect_compression(path)
+    if method == COMPRESS_NONE:
+        return open(path, 'rb')
+    return io.BufferedReader(DecompressReader(open(path, 'rb'), method), COPY_CHUNK_SIZE)
+
+
+def open_log_text(path, encoding='utf-8', errors='replace'):
+    """
+    以文本方式打开日志文件，压缩文件自动解压
+
+    Args:
+        path: 文件路径
+        encoding: 文本编码
+        errors: 解码错误处理方式
+
+    Returns:
+        文本读文件对象
+    """
+    return io.TextIOWrapper(open_log(path), encoding=encoding, errors=errors)
+
+
+def open_seekable(path, cancelled=None):
+    """
+    以可随机访问、可映射的方式打开日志文件，压缩文件先解压到临时文件（关闭时自动删除）
+
+    Args:
+        path: 文件路径
+        cancelled: 解压大文件时每复制一块检查一次的函数，返回True时停止解压
+
+    Returns:
+        二进制读文件对象（有fileno()）
+
+    Raises:
+        OpenCancelled: 解压被取消
+    """
+    if detect_compression(path) == COMPRESS_NONE:
+        return open(path, 'rb')
+    temp = tempfile.TemporaryFile()
+    try:
+        with open_log(path) as src:
+            while True:
+                if cancelled is not None and cancelled():
+                    raise OpenCancelled(f"已取消打开: {path}")
+                chunk = src.read(COPY_CHUNK_SIZE)
+                if not chunk:
+                    break
+                temp.write(chunk)
+        temp.flush()
+    except Exception:
+        temp.close()
+        raise
+    return temp
+
+
+def strip_compression_suffix(path):
+    """
+    去掉压缩扩展名
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        str: 去掉压缩扩展名后的路径
+    """
+    path = str(path)
+    for suffix in COMPRESSION_SUFFIXES.values():
+        if path.endswith(suffix):
+            return path[:-len(suffix)]
+    return path
+
+
+def compress_file(path, method, level=6):
+    """
+    压缩文件，完成后删除原文件
+
+    先写入临时文件再改名，中途中断时原文件保持不变。
+
+    Args:
+        path: 未压缩文件路径
+        method: 压缩方式
+        level: 压缩等级
+
+    Returns:
+        str: 压缩后的文件路径
+    """
+    path = str(path)
+    target = path + COMPRESSION_SUFFIXES[check_compression(method)]
+    temp = target + '.tmp'
+    try:
+        with open(path, 'rb') as src, open_compressed_writer(temp, method, level) as dst:
+            shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+        os.replace(temp, target)
+    except Exception:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+    os.remove(path)
+    return target
+
+
+class CompressionWorker(TaskWorker):
+    """后台压缩线程：依次压缩已关闭的日志文件，不占用写入线程的时间
+
+    给出队列记录文件时，排队中的文件记录在其中（每行 压缩方式\t压缩等级\t路径），
+    压缩完（或失败）后移除；程序退出或异常结束时还没压缩完的文件，下次启动时由resume()继续压缩。
+    """
+
+    def __init__(self, journal_path=None):
+        """
+        Args:
+            journal_path: 队列记录文件路径，为None时不记录
+        """
+        super().__init__()
+        self.journal_path = journal_path
+        self._jobs = {}  # 排队中和正在压缩的文件 {path: (method, level)}
+
+    def submit(self, path, method, level=6):
+        """
+        提交一个待压缩的文件
+
+        Args:
+            path: 未压缩文件路径
+            method: 压缩方式
+            level: 压缩等级
+        """
+        path = str(path)
+        with self._lock:
+            self._jobs[path] = (check_compression(method), level)
+            self._append_journal(path, method, level)
+        super().submit(self._compress, path, method, level, paths=(path,))
+
+    def resume(self):
+        """
+        继续压缩队列记录文件中上次没有压缩完的文件（启动时调用）
+
+        Returns:
+            int: 重新提交的文件数
+        """
+        if self.journal_path is None or not os.path.exists(self.journal_path):
+            return 0
+        jobs = []
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                parts = line.rstrip('\n').split('\t', 2)
+                if len(parts) == 3 and parts[0] in COMPRESSION_SUFFIXES and parts[1].isdigit():
+                    jobs.append((parts[2], parts[0], int(parts[1])))
+        jobs = {path: (method, level) for path, method, level in jobs if os.path.exists(path)}
+        with self._lock:
+            self._write_journal()
+        for path, (method, level) in jobs.items():
+            self.submit(path, method, level)
+        return len(jobs)
+
+    def _compress(self, path, method, level):
+        """压缩一个文件并从队列记录中移除（压缩线程）"""
+        try:
+            compress_file(path, method, level)
+        finally:
+            with self._lock:
+                self._jobs.pop(path, None)
+                self._write_journal()
+
+    def _append_journal(self, path, method, level):
+        """在队列记录文件末尾添加一个文件（调用者持有锁）"""
+        if self.journal_path is None:
+            return
+        try:
+            with open(self.journal_path, 'a', encoding='utf-8') as f:
+                f.write(f"{method}\t{level}\t{path}\n")
+        except OSError as e:
+            print(f"写入压缩队列记录失败: {str(e)}")
+
+    def _write_journal(self):
+        """按排队中的文件重写队列记录文件，队列为空时删除（调用者持有锁）"""
+        if self.journal_path is None:
+            return
+        try:
+            if not self._jobs:
+                if os.path.exists(self.journal_path):
+                    os.remove(self.journal_path)
+                return
+            temp = self.journal_path + '.tmp'
+            with open(temp, 'w', encoding='utf-8') as f:
+                for path, (method, level) in self._jobs.items():
+                    f.write(f"{method}\t{level}\t{path}\n")
+            os.replace(temp, self.journal_path)
+        except OSError as e:
+            print(f"写入压缩队列记录失败: {str(e)}")
+
+    def _report_error(self, args, error):
+        """输出压缩失败的文件和原因"""
+        print(f"压缩日志文件失败: {args[0]}: {str(error)}")
@@ -0,0 +1,276 @@
+import bisect
+import csv
+import io
+import json
+import os
+import re
+from datetime import datetime, timedelta
+from pathlib import Path
+from .data_saver import load_capture_index, parse_text_header, parse_text_line
+from .log_compression import (COMPRESS_NONE, COMPRESSION_SUFFIXES, detect_compression, open_log, open_log_text,
+                              strip_compression_suffix)
+from .record_log import RecordLogReader, DIRECTION_TX
+from .time_index import TIME_INDEX_SUFFIX, load_time_index, open_log_at
+
+
+# 输出格式
+OUTPUT_CSV = 'csv'
+OUTPUT_NDJSON = 'ndjson'
+OUTPUT_FORMATS = (OUTPUT_CSV, OUTPUT_NDJSON)
+OUTPUT_FIELDS = ('timestamp', 'port', 'direction', 'length', 'text', 'hex')
+
+CONVERT_SUFFIXES = ('.txt', '.rec', '.bin')  # 可转换的日志文件类型
+DEFAULT_CHUNK_SIZE = 16 * 1024 * 1024          # 默认分块大小（字节）
+
+# 日志文件名：串口_波特率_日期_时间[_序号].扩展名
+LOG_NAME_PATTERN = re.compile(r'^(?P<port>.+)_\d+_\d{8}_\d{6}(?:_\d+)?$')
+
+
+def collect_log_files(paths):
+    """
+    收集要转换的日志文件，目录中的文件按名称排序
+
+    Args:
+        paths: 文件或目录路径列表
+
+    Returns:
+        list: 日志文件路径（.bin只在有对应.idx时收集）
+    """
+    files = []
+    for path in paths:
+        path = Path(path)
+        candidates = sorted(path.iterdir()) if path.is_dir() else [path]
+        for candidate in candidates:
+            if candidate.is_file() and strip_compression_suffix(candidate).endswith(CONVERT_SUFFIXES):
+                if strip_compression_suffix(candidate).endswith('.bin') and _capture_index_path(candidate) is None:
+                    continue
+                files.append(str(candidate))
+    return files
+
+
+def _capture_index_path(bin_path):
+    """原始字节文件对应的索引文件（可能已被压缩），不存在时返回None"""
+    base = strip_compression_suffix(bin_path)[:-len('.bin')]
+    for candidate in [base + '.idx'] + [base + '.idx' + suffix for suffix in COMPRESSION_SUFFIXES.values()]:
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def _port_from_name(path):
+    """从文件名中取出串口名称"""
+    stem = Path(strip_compression_suffix(path)).stem
+    match = LOG_NAME_PATTERN.match(stem)
+    return match.group('port') if match else stem
+
+
+def plan_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    把日志文件按记录或行的边界划分为若干块
+
+    压缩的文件无法随机访问，整个文件作为一块。
+
+    Args:
+        path: 日志文件路径
+        chunk_size: 每块的大致字节数
+
+    Returns:
+        list: 转换任务（dict），按文件中的顺序排列，每个任务的'bytes'为该块的输入字节数
+    """
+    path = str(path)
+    kind = Path(strip_compression_suffix(path)).suffix
+    compressed = detect_compression(path) != COMPRESS_NONE
+    size = os.path.getsize(path)
+
+    if kind == '.rec':
+        with RecordLogReader(path) as reader:
+            port = reader.port_name
+            bounds = [reader.data_offset]
+            if not compressed:
+                # 在同步标记处分块，每块从一条完整的记录开始
+                pos = reader.data_offset + chunk_size
+                while pos < reader.size:
+                    sync = reader.find_sync(pos)
+                    if sync < 0:
+                        break
+                    if sync > bounds[-1]:
+                        bounds.append(sync)
+                    pos = sync + chunk_size
+            bounds.append(reader.size)
+        return [{'kind': kind, 'path': path, 'port': port, 'start': start, 'end': end,
+                 'bytes': (end - start) if not compressed else size}
+                for start, end in zip(bounds, bounds[1:])]
+
+    if kind == '.bin':
+        wall_ns, monotonic_ns, entries = load_capture_index(_capture_index_path(path))
+        port = _port_from_name(path)
+        tasks = []
+        first = 0
+        while first < len(entries):
+            last = first
+            total = 0
+            while last < len(entries) and (compressed or total < chunk_size):
+                total += entries[last][2]
+                last += 1
+            tasks.append({'kind': kind, 'path': path, 'port': port, 'entries': entries[first:last],
+                          'wall_ns': wall_ns, 'monotonic_ns': monotonic_ns,
+                          'bytes': total if not compressed else size})
+            first = last
+        return tasks
+
+    # 文本记录：在换行处分块，每块带上块开头的参考时间，用于补全行首时间戳中的日期
+    with open_log_text(path) as f:
+        header = parse_text_header([f.readline() for _ in range(10)])
+    port = header['port'] or _port_from_name(path)
+    start_time = header['start'] or datetime.fromtimestamp(os.path.getmtime(path))
+    time_index = _load_text_time_index(path)
+    bounds = [0]
+    if not compressed:
+        with open(path, 'rb') as f:
+            pos = chunk_size
+            while pos < size:
+                f.seek(pos)
+                end = pos + len(f.readline())
+                if end >= size:
+                    break
+                bounds.append(end)
+                pos = end + chunk_size
+        bounds.append(size)
+    else:
+        bounds.append(None)
+    tasks = []
+    for start, end in zip(bounds, bounds[1:]):
+        reference = start_time
+        if time_index and start:
+            i = bisect.bisect_right(time_index, (start, float('inf'))) - 1
+            if i >= 0:
+                reference = time_index[i][1]
+        tasks.append({'kind': kind, 'path': path, 'port': port, 'start': start, 'end': end,
+                      'reference': reference, 'bytes': (end - start) if end is not None else size})
+    return tasks
+
+
+def _load_text_time_index(path):
+    """读取文本记录的时间索引，返回[(偏移, 时间datetime), ...]，没有时返回None"""
+    index_path = strip_compression_suffix(path)[:-len('.txt')] + TIME_INDEX_SUFFIX
+    if not os.path.exists(index_path):
+        return None
+    try:
+        _, entries = load_time_index(index_path)
+    except (OSError, ValueError):
+        return None
+    return [(offset, datetime.fromtimestamp(wall_ns / 1e9)) for wall_ns, offset, _ in entries]
+
+
+def convert_chunk(task, output_format=OUTPUT_CSV):
+    """
+    转换一块日志（在工作进程中运行）
+
+    Args:
+        task: plan_chunks()返回的转换任务
+        output_format: 'csv' 或 'ndjson'
+
+    Returns:
+        tuple: (输出文本, 行数, 输入字节数)
+    """
+    if task['kind'] == '.rec':
+        rows = _record_rows(task)
+    elif task['kind'] == '.bin':
+        rows = _capture_rows(task)
+    else:
+        rows = _text_rows(task)
+
+    out = io.StringIO()
+    count = 0
+    if output_format == OUTPUT_CSV:
+        writer = csv.writer(out, lineterminator='\n')
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    else:
+        for row in rows:
+            out.write(json.dumps(dict(zip(OUTPUT_FIELDS, row)), ensure_ascii=False))
+            out.write('\n')
+            count += 1
+    return out.getvalue(), count, task['bytes']
+
+
+def _timestamp(value):
+    """输出的时间格式（ISO 8601，毫秒）"""
+    return value.isoformat(timespec='milliseconds')
+
+
+def _record_rows(task):
+    """记录日志：每条记录一行"""
+    port = task['port']
+    with RecordLogReader(task['path']) as reader:
+        for offset, timestamp_ns, direction, payload in reader.records(task['start']):
+            if offset >= task['end']:
+                del payload
+                break
+            data = bytes(payload)
+            del payload
+            yield (_timestamp(datetime.fromtimestamp(reader.wall_time_ns(timestamp_ns) / 1e9)), port,
+                   'TX' if direction == DIRECTION_TX else 'RX', len(data),
+                   data.decode('utf-8', errors='replace'), data.hex())
+
+
+def _capture_rows(task):
+    """原始字节：每个数据块一行"""
+    port = task['port']
+    entries = task['entries']
+    if not entries:
+        return
+    wall_offset = task['wall_ns'] - task['monotonic_ns']
+    with open_log_at(task['path'], entries[0][1]) as f:
+        for arrival_ns, _, length in entries:
+            data = f.read(length)
+            yield (_timestamp(datetime.fromtimestamp((arrival_ns + wall_offset) / 1e9)), port, 'RX', len(data),
+                   data.decode('utf-8', errors='replace'), data.hex())
+
+
+def _text_rows(task):
+    """文本记录：每行数据一行，日期由参考时间推算（时间倒退时视为跨过零点）"""
+    port = task['port']
+    if task['end'] is None:
+        with open_log(task['path']) as f:
+            data = f.read()
+    else:
+        with open(task['path'], 'rb') as f:
+            f.seek(task['start'])
+            data = f.read(task['end'] - task['start'])
+    current = task['reference']
+    for raw in data.split(b'\n'):
+        parsed = parse_text_line(raw.rstrip(b'\r').decode('utf-8', errors='replace'))
+        if parsed is None:
+            continue
+        time_of_day, text = parsed
+        moment = datetime.combine(current.date(), time_of_day)
+        if moment < current - timedelta(seconds=1):
+            moment += timedelta(days=1)
+        current = moment
+        encoded = text.encode('utf-8')
+        yield _timestamp(moment), port, 'RX', len(encoded), text, encoded.hex()
+
+
+def output_path(path, output_dir, output_format):
+    """
+    转换结果的文件路径
+
+    Args:
+        path: 日志文件路径
+        output_dir: 输出目录，为None时与日志文件相同
+        output_format: 'csv' 或 'ndjson'
+
+    Returns:
+        Path: 输出文件路径
+    """
+    name = Path(strip_compression_suffix(path)).name + '.' + output_format
+    return Path(output_dir) / name if output_dir is not None else Path(path).parent / name
+
+
+def output_header(output_format):
+    """输出文件开头（CSV为表头）"""
+    if output_format == OUTPUT_CSV:
+        return ','.join(OUTPUT_FIELDS) + '\n'
+    return ''
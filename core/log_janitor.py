@@ -0,0 +1,264 @@
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from .log_compression import strip_compression_suffix
+
+
+# 清理方式
+JANITOR_DELETE = 'delete'    # 删除
+JANITOR_ARCHIVE = 'archive'  # 移动到归档目录
+JANITOR_ACTIONS = (JANITOR_DELETE, JANITOR_ARCHIVE)
+
+LOG_SUFFIXES = ('.txt', '.bin', '.idx', '.rec', '.tix', '.cmt')  # 日志文件类型（不含压缩扩展名）
+TEMP_SUFFIX = '.tmp'                                             # 后台压缩的临时文件
+STALE_TEMP_AGE = 24 * 3600                                       # 超过该时间未修改的临时文件视为中断遗留（秒）
+
+
+class LogJanitor:
+    """日志清理线程
+
+    定期扫描日志目录，把同一次保存产生的文件（.txt/.bin/.idx/.rec/.tix/.cmt及其压缩文件）视为一个会话，
+    从最旧的会话开始清理：超过保留天数的会话按清理方式删除或归档，
+    超出全局磁盘配额的会话直接删除。归档不释放磁盘空间，归档目录中的会话也计入配额，
+    超出配额时同样从最旧的开始删除。仍在写入的会话不会被清理。
+    """
+
+    def __init__(self, base_dir, get_open_paths=None, check_interval=60.0):
+        """
+        初始化日志清理线程
+
+        Args:
+            base_dir: 日志目录
+            get_open_paths: 返回仍在写入的文件路径集合的函数
+            check_interval: 检查间隔（秒）
+        """
+        self.base_dir = Path(base_dir)
+        self.get_open_paths = get_open_paths
+        self.check_interval = check_interval
+        self.retention_days = 0   # 保留天数，0表示不按时间清理
+        self.quota_bytes = 0      # 全局磁盘配额（字节），0表示不限制
+        self.action = JANITOR_DELETE
+        self.archive_dir = self.base_dir / 'archive'
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._running = False
+        self._thread = None
+        self._quota_warned = False
+        # 清理统计
+        self.stats = {
+            'runs': 0,
+            'removed_sessions': 0,
+            'removed_files': 0,
+            'removed_bytes': 0,
+            'total_bytes': 0,       # 最近一次检查时日志目录（包括归档目录）的总大小
+            'last_run': 0.0
+        }
+
+    def configure(self, retention_days=None, quota_mb=None, action=None, archive_dir=None):
+        """
+        设置清理规则，规则有变化时立即检查一次
+
+        Args:
+            retention_days: 保留天数，0表示不按时间清理
+            quota_mb: 全局磁盘配额（MB），0表示不限制
+            action: 超过保留天数的会话 'delete' 删除，'archive' 移动到归档目录
+            archive_dir: 归档目录
+
+        Returns:
+            bool: 是否设置成功
+        """
+        try:
+            changed = False
+            with self._lock:
+                if action is not None and action != self.action:
+                    if action not in JANITOR_ACTIONS:
+                        raise ValueError(f"无效的清理方式: {action}")
+                    self.action = action
+                    changed = True
+                if retention_days is not None:
+                    retention_days = max(0.0, float(retention_days))
+                    if retention_days != self.retention_days:
+                        self.retention_days = retention_days
+                        changed = True
+                if quota_mb is not None:
+                    quota_bytes = max(0, int(quota_mb)) * 1024 * 1024
+                    if quota_bytes != self.quota_bytes:
+                        self.quota_bytes = quota_bytes
+                        self._quota_warned = False
+                        changed = True
+                if archive_dir is not None and Path(archive_dir) != self.archive_dir:
+                    self.archive_dir = Path(archive_dir)
+                    changed = True
+            if changed:
+                self.run_now()
+            return True
+        except Exception as e:
+            print(f"设置日志清理规则失败: {str(e)}")
+            return False
+
+    def start(self):
+        """启动清理线程"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止清理线程"""
+        if not self._running:
+            return
+        self._running = False
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def run_now(self):
+        """唤醒清理线程立即检查（如切换文件后）"""
+        self._wake.set()
+
+    def get_statistics(self):
+        """
+        获取清理统计
+
+        Returns:
+            dict: 清理次数、清理的会话/文件/字节数、目录总大小
+        """
+        return dict(self.stats)
+
+    def _run(self):
+        """清理线程主循环"""
+        while self._running:
+            self._wake.wait(self.check_interval)
+            self._wake.clear()
+            if not self._running:
+                break
+            try:
+                self.clean()
+            except Exception as e:
+                print(f"清理日志失败: {str(e)}")
+
+    def clean(self):
+        """执行一次清理（清理线程）"""
+        with self._lock:
+            retention = self.retention_days * 86400
+            quota = self.quota_bytes
+            action = self.action
+            archive_dir = self.archive_dir
+
+        open_paths = set()
+        if self.get_open_paths is not None:
+            open_paths = {os.path.abspath(path) for path in self.get_open_paths()}
+        sessions = self._scan_sessions(self.base_dir, open_paths)
+        if archive_dir.resolve() != self.base_dir.resolve():
+            sessions += self._scan_sessions(archive_dir, set(), archived=True)
+        total = sum(session['size'] for session in sessions)
+        now = time.time()
+
+        # 从最旧的会话开始清理：超过保留时间的按清理方式处理（已归档的不再处理），
+        # 超出配额的直接删除（归档只是移动文件，不能让目录总大小降到配额以内）
+        for session in sorted(sessions, key=lambda s: s['mtime']):
+            if session['active']:
+                continue
+            expired = retention and not session['archived'] and now - session['mtime'] > retention
+            over_quota = quota and total > quota
+            if not expired and not over_quota:
+                continue
+            session_action = JANITOR_DELETE if over_quota else action
+            if self._remove_session(session, session_action, archive_dir) and session_action == JANITOR_DELETE:
+                total -= session['size']
+
+        if quota and total > quota and not self._quota_warned:
+            # 只剩仍在写入的会话，无法继续清理
+            self._quota_warned = True
+            print(f"日志目录大小 {total // (1024 * 1024)}MB 超过配额，但剩余文件仍在写入")
+        elif quota and total <= quota:
+            self._quota_warned = False
+
+        self.stats['runs'] += 1
+        self.stats['total_bytes'] = total
+        self.stats['last_run'] = now
+
+    def _scan_sessions(self, directory, open_paths, archived=False):
+        """
+        扫描日志目录或归档目录，按会话分组
+
+        Args:
+            directory: 要扫描的目录（不含子目录）
+            open_paths: 仍在写入的文件路径集合
+            archived: 是否为归档目录
+
+        Returns:
+            list: [{'name', 'files', 'size', 'mtime', 'active', 'archived'}, ...]
+        """
+        sessions = {}
+        if not directory.is_dir():
+            return []
+        now = time.time()
+        for entry in os.scandir(directory):
+            if not entry.is_file():
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            path = entry.path
+            if path.endswith(TEMP_SUFFIX):
+                # 正在压缩的临时文件所在会话不清理，中断遗留的临时文件直接删除
+                name = self._session_name(path[:-len(TEMP_SUFFIX)])
+                if name is not None and now - stat.st_mtime > STALE_TEMP_AGE:
+                    self._remove_file(path)
+                    continue
+                active = True
+            else:
+                name = self._session_name(path)
+                active = os.path.abspath(path) in open_paths
+            if name is None:
+                continue
+            session = sessions.setdefault(name, {'name': name, 'files': [], 'size': 0,
+                                                 'mtime': 0.0, 'active': False, 'archived': archived})
+            session['files'].append((path, stat.st_size))
+            session['size'] += stat.st_size
+            session['mtime'] = max(session['mtime'], stat.st_mtime)
+            session['active'] = session['active'] or active
+        return list(sessions.values())
+
+    @staticmethod
+    def _session_name(path):
+        """文件所属会话名（去掉压缩扩展名和文件类型），不是日志文件时返回None"""
+        path = strip_compression_suffix(path)
+        for suffix in LOG_SUFFIXES:
+            if path.endswith(suffix):
+                return path[:-len(suffix)]
+        return None
+
+    def _remove_session(self, session, action, archive_dir):
+        """删除或归档一个会话的所有文件"""
+        try:
+            if action == JANITOR_ARCHIVE:
+                archive_dir.mkdir(parents=True, exist_ok=True)
+            for path, size in session['files']:
+                if action == JANITOR_ARCHIVE:
+                    shutil.move(path, str(archive_dir / os.path.basename(path)))
+                else:
+                    os.remove(path)
+                self.stats['removed_files'] += 1
+                self.stats['removed_bytes'] += size
+            self.stats['removed_sessions'] += 1
+            print(f"已{'归档' if action == JANITOR_ARCHIVE else '删除'}日志: {os.path.basename(session['name'])}")
+            return True
+        except OSError as e:
+            print(f"清理日志 {session['name']} 失败: {str(e)}")
+            return False
+
+    @staticmethod
+    def _remove_file(path):
+        """删除文件，失败时忽略"""
+        try:
+            os.remove(path)
+        except OSError:
+            pass
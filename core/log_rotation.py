@@ -0,0 +1,11 @@
+from .task_worker import TaskWorker
+
+
+class RotationWorker(TaskWorker):
+    """后台切换线程：提前创建下一组日志文件，关闭并收尾切换下来的旧文件
+
+    文件的创建、关闭、fsync在慢速或网络文件系统上可能很慢，放在这个线程中执行，
+    写入线程切换文件时只需交换文件对象。任务按提交顺序依次执行。
+    """
+
+    ERROR_MESSAGE = "切换日志文件失败"
@@ -0,0 +1,324 @@
+import bisect
+import mmap
+import threading
+from array import array
+from datetime import datetime
+from pathlib import Path
+from .log_compression import OpenCancelled, open_seekable, strip_compression_suffix
+from .record_log import RecordLogReader, DIRECTION_TX
+
+
+# 按行显示的文件类型
+ROWS_TEXT = 'text'      # 文本记录 (.txt)，每行一行
+ROWS_RECORD = 'record'  # 记录日志 (.rec)，每条记录一行
+ROWS_BINARY = 'binary'  # 原始字节 (.bin)，每16字节一行十六进制
+
+ROW_KINDS = {'.txt': ROWS_TEXT, '.rec': ROWS_RECORD, '.bin': ROWS_BINARY}
+
+
+class MappedLog:
+    """内存映射的日志文件，按行随机访问
+
+    打开时只映射文件，不读取内容；行索引由index_step()分块增量建立（通常在LogIndexer线程中），
+    建立过程中已经索引的行即可访问。索引是稀疏的，内存占用与文件大小无关：
+    - 文本：每BLOCK_SIZE字节记录一次此前的换行数，访问某行时从所在块开头向后查找换行
+    - 记录日志：每RECORD_CHECKPOINT条记录记录一次偏移，访问时从检查点向后解析
+    - 原始字节：固定每行BINARY_ROW_BYTES字节，不需要索引
+    压缩的文件先解压到临时文件再映射。
+    row_text()只由GUI线程调用，index_step()只由索引线程调用。
+    """
+
+    BLOCK_SIZE = 4096               # 文本索引块大小（字节）
+    SCAN_CHUNK = 4 * 1024 * 1024    # 每次index_step()扫描的字节数
+    RECORD_CHECKPOINT = 64          # 记录日志每隔多少条记录一个偏移
+    BINARY_ROW_BYTES = 16           # 原始字节每行字节数
+    MAX_ROW_BYTES = 4096            # 单行最多显示的字节数，超长的行截断显示
+
+    def __init__(self, path):
+        """
+        Args:
+            path: 日志文件路径
+
+        Raises:
+            ValueError: 不支持的文件类型
+        """
+        self.path = str(path)
+        self.kind = ROW_KINDS.get(Path(strip_compression_suffix(self.path)).suffix)
+        if self.kind is None:
+            raise ValueError(f"不支持的日志文件类型: {self.path}")
+        self.size = 0
+        self.finished = False    # 索引是否已建立完成
+        self._opened = False
+        self._file = None
+        self._mmap = None
+        self._reader = None
+        self._indexed = 0        # 已扫描到的偏移
+        self._rows = 0           # 已索引的完整行数
+        # 文本：_block_lines[k]为偏移k*BLOCK_SIZE之前的换行数
+        # 记录日志：_checkpoints[k]为第k*RECORD_CHECKPOINT条记录的偏移
+        self._block_lines = array('Q', [0])
+        self._checkpoints = array('Q')
+        self._records = None
+        self._cache = (-1, 0)    # 最近访问的(行号, 行首偏移)，顺序访问相邻行时从这里继续查找
+
+    def open(self, cancelled=None):
+        """
+        映射文件（压缩文件需要先解压，可能较慢，应在后台线程调用）
+
+        Args:
+            cancelled: 解压时检查是否取消的函数，见open_seekable()
+
+        Raises:
+            OSError: 文件无法打开
+            ValueError: 文件格式无效
+            OpenCancelled: 解压被取消
+        """
+        if self.kind == ROWS_RECORD:
+            self._reader = RecordLogReader(self.path, cancelled)
+            self.size = self._reader.size
+            self._indexed = self._reader.data_offset
+            self._records = self._reader.records()
+        else:
+            self._file = open_seekable(self.path, cancelled)
+            try:
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # 空文件无法映射
+                self._mmap = None
+            self.size = len(self._mmap) if self._mmap is not None else 0
+            if self.kind == ROWS_BINARY:
+                self._rows = -(-self.size // self.BINARY_ROW_BYTES)
+                self._indexed = self.size
+        self._opened = True
+        if self._indexed >= self.size:
+            self._finish()
+
+    @property
+    def opened(self):
+        """文件是否已映射"""
+        return self._opened
+
+    @property
+    def progress(self):
+        """索引进度 (0.0 ~ 1.0)"""
+        if self.finished:
+            return 1.0
+        return self._indexed / self.size if self.size else 0.0
+
+    def row_count(self):
+        """
+        获取已索引的行数（建立索引期间会不断增加）
+
+        Returns:
+            int: 行数
+        """
+        return self._rows
+
+    def index_step(self):
+        """
+        继续建立索引，扫描SCAN_CHUNK字节
+
+        Returns:
+            bool: 索引是否已建立完成
+        """
+        if self.finished or not self._opened:
+            return self.finished
+        if self.kind == ROWS_TEXT:
+            self._index_text()
+        elif self.kind == ROWS_RECORD:
+            self._index_records()
+        return self.finished
+
+    def _index_text(self):
+        """按块统计换行数"""
+        block = self.BLOCK_SIZE
+        start = self._indexed
+        end = min(self.size, start + self.SCAN_CHUNK)
+        chunk = self._mmap[start:end]
+        lines = self._block_lines[-1]
+        for pos in range(0, len(chunk), block):
+            lines += chunk.count(b'\n', pos, pos + block)
+            if start + pos + block <= self.size:
+                self._block_lines.append(lines)
+        self._indexed = end
+        if end >= self.size:
+            # 最后一行没有换行时也算一行
+            self._rows = lines + (1 if self.size and self._mmap[self.size - 1] != 0x0A else 0)
+            self._finish()
+        else:
+            self._rows = lines
+
+    def _index_records(self):
+        """解析记录，每RECORD_CHECKPOINT条记录一个偏移"""
+        limit = self._indexed + self.SCAN_CHUNK
+        rows = self._rows
+        for offset, _, _, payload in self._records:
+            del payload
+            if rows % self.RECORD_CHECKPOINT == 0:
+                self._checkpoints.append(offset)
+            rows += 1
+            self._rows = rows
+            if offset >= limit:
+                self._indexed = offset
+                return
+        self._finish()
+
+    def _finish(self):
+        """索引建立完成"""
+        self._indexed = self.size
+        self._records = None
+        self.finished = True
+
+    def row_text(self, row):
+        """
+        获取一行的显示文本
+
+        Args:
+            row: 行号（从0开始）
+
+        Returns:
+            str: 显示文本，行号超出范围时为空字符串
+        """
+        if row < 0 or row >= self._rows:
+            return ''
+        if self.kind == ROWS_TEXT:
+            return self._text_row(row)
+        if self.kind == ROWS_RECORD:
+            return self._record_row(row)
+        return self._binary_row(row)
+
+    def _line_start(self, row):
+        """第row行的行首偏移"""
+        if row == 0:
+            return 0
+        last_row, last_start = self._cache
+        if last_row >= 0 and 0 < row - last_row <= 256:
+            # 顺序访问：从上一次访问的行继续
+            pos, skip = last_start, row - last_row
+        else:
+            # 找到第row个换行所在的块
+            block_lines = self._block_lines
+            k = bisect.bisect_left(block_lines, row, 0, len(block_lines)) - 1
+            pos, skip = k * self.BLOCK_SIZE, row - block_lines[k]
+        find = self._mmap.find
+        for _ in range(skip):
+            pos = find(b'\n', pos) + 1
+        return pos
+
+    def _text_row(self, row):
+        """文本行"""
+        start = self._line_start(row)
+        self._cache = (row, start)
+        limit = min(self.size, start + self.MAX_ROW_BYTES)
+        end = self._mmap.find(b'\n', start, limit)
+        text = self._mmap[start:limit if end < 0 else end].decode('utf-8', errors='replace').rstrip('\r')
+        if end < 0 and limit < self.size:
+            text += ' …'
+        return text
+
+    def _record_row(self, row):
+        """记录日志行：[时间] 方向: 数据"""
+        offset = self._checkpoints[row // self.RECORD_CHECKPOINT]
+        skip = row % self.RECORD_CHECKPOINT
+        for timestamp_ns, direction, payload in self._iter_from(offset, skip):
+            text = bytes(payload[:self.MAX_ROW_BYTES]).decode('utf-8', errors='replace')
+            truncated = len(payload) > self.MAX_ROW_BYTES
+            del payload
+            time_str = datetime.fromtimestamp(self._reader.wall_time_ns(timestamp_ns) / 1e9)
+            return (f"[{time_str.strftime('%H:%M:%S.%f')[:-3]}] "
+                    f"{'TX' if direction == DIRECTION_TX else 'RX'}: {text.rstrip()}"
+                    f"{' …' if truncated else ''}")
+        return ''
+
+    def _iter_from(self, offset, skip):
+        """从offset开始跳过skip条记录后迭代（只取一条）"""
+        for i, (_, timestamp_ns, direction, payload) in enumerate(self._reader.records(offset)):
+            if i == skip:
+                yield timestamp_ns, direction, payload
+                return
+            del payload
+
+    def _binary_row(self, row):
+        """原始字节行：偏移  十六进制  ASCII"""
+        start = row * self.BINARY_ROW_BYTES
+        data = self._mmap[start:start + self.BINARY_ROW_BYTES]
+        ascii_text = ''.join(chr(b) if 32 <= b < 127 else '.' for b in data)
+        return f"{start:08X}  {data.hex(' ').upper():<{self.BINARY_ROW_BYTES * 3}} {ascii_text}"
+
+    def close(self):
+        """关闭文件映射"""
+        self._records = None
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._rows = 0
+        self._opened = False
+
+
+class LogIndexer:
+    """行索引线程
+
+    在后台打开MappedLog并分块建立行索引，GUI线程通过row_count()/progress轮询进度。
+    stop()不等待线程：线程仍在工作时，由线程在当前分块（或解压的当前一块）完成后自己关闭文件；
+    线程已结束时直接关闭。
+    """
+
+    def __init__(self, log):
+        """
+        Args:
+            log: MappedLog
+        """
+        self.log = log
+        self.error = None  # 打开或索引失败时的异常信息
+        self._running = False
+        self._done = True  # 线程是否已结束（或未启动）
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        """启动索引线程"""
+        if self._running:
+            return
+        self._running = True
+        self._done = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止索引线程并关闭文件（不等待线程，之后不能再访问log）"""
+        with self._lock:
+            self._running = False
+            if not self._done:
+                # 线程退出时关闭文件
+                return
+        self.log.close()
+
+    @property
+    def running(self):
+        """索引线程是否仍在工作"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        """索引线程主循环"""
+        try:
+            if not self.log.opened:
+                self.log.open(lambda: not self._running)
+            while self._running and not self.log.index_step():
+                pass
+        except OpenCancelled:
+            pass
+        except Exception as e:
+            self.error = str(e)
+            print(f"建立日志行索引失败: {self.log.path}: {self.error}")
+        finally:
+            with self._lock:
+                self._done = True
+                stopped = not self._running
+            if stopped:
+                self.log.close()
@@ -2,32 +2,46 @@ import serial
 import serial.tools.list_ports
 import threading
 import time
-from PyQt6.QtCore import QObject, pyqtSignal, QTimer
+from PyQt6.QtCore import QObject, pyqtSignal, QTimer, Qt
 from .data_saver import DataSaver
+from .chunk_reader import ChunkReader
+from .signal_batcher import SignalBatcher
+from .port_statistics import StatisticsPublisher
+from .io_reactor import SerialIOReactor
+from .asyncio_backend import AsyncioSerialBackend
+from .ring_buffer import ByteRingBuffer
+from .bounded_queue import check_policy
+from .consumer_bus import ConsumerBus
+from .record_log import DIRECTION_TX
 
 
 class MultiSerialManager(QObject):
     """多串口管理器，负责管理多个串口连接"""
     
     # 定义信号
-    data_received = pyqtSignal(str, str)  # 接收到数据信号 (port_name, data)
+    data_received = pyqtSignal(str, bytes)  # 接收到数据信号 (port_name, raw_bytes)
     connection_changed = pyqtSignal(str, bool)  # 连接状态改变信号 (port_name, connected)
     error_occurred = pyqtSignal(str, str)  # 错误信号 (port_name, error_message)
     port_list_updated = pyqtSignal(list)  # 串口列表更新信号
     statistics_updated = pyqtSignal(str, int, int)  # 统计信息更新信号 (port_name, receive_count, send_count)
+    statistics_snapshot = pyqtSignal(dict)  # 统计快照信号 {port_name: {计数及速率}}
     
     def __init__(self):
         super().__init__()
         self.serial_ports = {}  # 存储串口对象 {port_name: serial_object}
-        self.receive_threads = {}  # 存储接收线程 {port_name: thread}
+        self.receive_threads = {}  # 存储接收线程 {port_name: thread}（线程模式）
+        self.engine_ports = {}  # 由共享I/O引擎服务的串口 {port_name: io_mode}
+        self.io_engines = {}  # 共享I/O引擎 {io_mode: engine}，首次使用时创建
         self.auto_send_timers = {}  # 存储自动发送定时器 {port_name: timer}
         self.auto_send_data = {}  # 存储自动发送数据 {port_name: data}
+        self.receive_rings = {}  # 接收环形缓冲区 {port_name: ByteRingBuffer}
+        self.overflow_policies = {}  # 各串口的溢出策略 {port_name: policy}，断开后保留供重新连接使用
         
-        # 统计信息 {port_name: {'receive_count': 0, 'send_count': 0}}
+        # 统计信息 {port_name: PortCounters}，由发布器定时发布快照
         self.statistics = {}
         
-        # 数据保存器
-        self.data_saver = DataSaver()
+        # 数据保存器（后台写入线程成批写入）
+        self.data_saver = DataSaver(async_mode=True)
         
         # 自动保存配置 {port_name: {'enabled': bool, 'baudrate': int}}
         self.auto_save_config = {}
@@ -35,9 +49,50 @@ class MultiSerialManager(QObject):
         # 全局设置
         self.global_settings = {
             'auto_save_serial': True,  # 默认启用自动保存
-            'file_size_limit': 500     # 默认500MB
+            'file_size_limit': 500,    # 默认500MB
+            'save_format': 'text',     # 保存格式：'text' 文本，'raw' 原始字节及索引，'both' 两者，'record' 收发记录日志
+            'compression': 'none',     # 压缩方式：'none'、'gzip'、'zlib'、'lzma'
+            'compression_level': 6,    # 压缩等级
+            'compression_mode': 'stream',  # 压缩时机：'stream' 写入时压缩，'rotated' 文件关闭后后台压缩
+            'rotate_by_size': True,    # 文件超过大小限制时切换
+            'rotation_interval': 'none',  # 按时间切换：'none'、'hourly' 每小时、'daily' 每天
+            'retention_days': 0,       # 日志保留天数，0表示永久保留
+            'disk_quota_mb': 0,        # 所有串口日志共用的磁盘配额（MB），0表示不限制
+            'cleanup_action': 'delete',  # 超期日志的处理：'delete' 删除，'archive' 移动到归档目录（超出配额的日志总是删除）
+            'time_index': True,        # 为文本记录和记录日志生成稀疏时间索引 (.tix)
+            'time_index_kb': 64,       # 每隔多少KB记录一条时间索引
+            'time_index_interval': 1.0,  # 每隔多少秒记录一条时间索引
+            'commit_interval': 0,      # 持久模式提交点间隔（秒），0表示不启用
+            'batch_window_ms': 20,     # 接收数据合并窗口（毫秒）
+            'batch_max_bytes': 64 * 1024,  # 单批最大字节数
+            'statistics_interval_ms': 250,  # 统计信息发布间隔（毫秒）
+            'receive_ring_size': 4 * 1024 * 1024,  # 每个串口接收环形缓冲区大小（字节）
+            'consumer_queue_items': 64,  # 每个消费者每个串口队列的最大批次数
+            'consumer_queue_bytes': 4 * 1024 * 1024,  # 每个消费者每个串口队列的最大字节数
+            'overflow_policy': 'drop_oldest',  # 默认溢出策略：'drop_oldest' 丢弃最旧，'drop_newest' 丢弃最新，'block' 阻塞读取
+            'io_mode': 'thread'  # 接收方式：'thread' 每串口一个线程，'reactor' 单线程I/O反应器，'asyncio' asyncio事件循环
         }
         
+        # 统计信息发布器：单个定时器按固定频率发布所有串口的统计快照
+        self.stats_publisher = StatisticsPublisher(self.global_settings['statistics_interval_ms'])
+        self.stats_publisher.snapshot_ready.connect(self._on_statistics_snapshot)
+        
+        # 接收数据合并器：合并各串口的数据块，按批次发布到分发总线
+        self.batcher = SignalBatcher(
+            self.global_settings['batch_window_ms'],
+            self.global_settings['batch_max_bytes']
+        )
+        # 行数统计和发布直接在合并线程中按批次进行，不占用接收线程和GUI线程
+        self.batcher.batch_ready.connect(self._process_batch, Qt.ConnectionType.DirectConnection)
+        
+        # 数据分发总线：显示、保存及解码器等消费者各自拥有每个串口的有界队列和处理线程，
+        # 慢的消费者只会让自己积压，不会拖慢其他消费者和串口读取
+        self.consumer_bus = ConsumerBus(on_space=self.batcher.unblock)
+        self.batcher.set_capacity_check(self.consumer_bus.room)
+        self.subscribe_consumer('display', self._deliver_display, use_thread=False)
+        self.subscribe_consumer('saver', self._save_batch)
+        self.batcher.start()
+        
     def get_available_ports(self):
         """获取可用串口列表"""
         try:
@@ -67,6 +122,9 @@ class MultiSerialManager(QObject):
             stopbits = config.get('stopbits', 1)
             parity = config.get('parity', 'N')
             auto_save = config.get('auto_save', self.global_settings['auto_save_serial'])
+            overflow_policy = check_policy(config.get(
+                'overflow_policy',
+                self.overflow_policies.get(port_name, self.global_settings['overflow_policy'])))
             
             # 创建串口对象
             serial_port = serial.Serial(
@@ -75,15 +133,26 @@ class MultiSerialManager(QObject):
                 bytesize=bytesize,
                 stopbits=stopbits,
                 parity=parity,
-                timeout=1
+                timeout=ChunkReader.DEFAULT_BLOCK_TIMEOUT
             )
             
             if serial_port.is_open:
                 # 存储串口对象
                 self.serial_ports[port_name] = serial_port
                 
-                # 初始化统计信息
-                self.statistics[port_name] = {'receive_count': 0, 'send_count': 0}
+                # 创建接收环形缓冲区（接收线程写入，合并线程读取）和各消费者的有界队列，
+                # 两者使用同一溢出策略
+                self.overflow_policies[port_name] = overflow_policy
+                ring = ByteRingBuffer(self.global_settings['receive_ring_size'], overflow_policy)
+                self.receive_rings[port_name] = ring
+                self.batcher.register_port(port_name, ring)
+                self.consumer_bus.register_port(port_name, overflow_policy)
+                
+                # 初始化统计信息（含各级缓冲的丢弃计数）
+                self.statistics[port_name] = self.stats_publisher.register_port(
+                    port_name,
+                    (ring.get_drop_counts, lambda: self.consumer_bus.get_drop_counts(port_name))
+                )
                 
                 # 存储自动保存配置
                 self.auto_save_config[port_name] = {
@@ -97,24 +166,19 @@ class MultiSerialManager(QObject):
                     if self.data_saver.is_saving(port_name):
                         self.data_saver.stop_saving(port_name)
                     # 开始新的保存（创建新文件）
-                    self.data_saver.start_saving(port_name, baudrate)
+                    self.data_saver.start_saving(port_name, baudrate,
+                                                 serial_config=self._serial_config(serial_port))
                 
                 # 创建自动发送定时器
                 auto_send_timer = QTimer()
                 auto_send_timer.timeout.connect(lambda: self.auto_send_data_func(port_name))
                 self.auto_send_timers[port_name] = auto_send_timer
                 
-                # 启动接收线程
-                receive_thread = threading.Thread(
-                    target=self.receive_data_loop, 
-                    args=(port_name,), 
-                    daemon=True
-                )
-                self.receive_threads[port_name] = receive_thread
-                receive_thread.start()
-                
-                # 等待线程启动
-                time.sleep(0.05)
+                # 启动接收（反应器模式注册到I/O线程，否则启动独立接收线程）
+                if not self._start_receiving(port_name, serial_port):
+                    self.disconnect_serial(port_name)
+                    self.error_occurred.emit(port_name, "启动数据接收失败")
+                    return False
                 
                 # 发送连接状态信号
                 self.connection_changed.emit(port_name, True)
@@ -149,9 +213,9 @@ class MultiSerialManager(QObject):
             # 停止自动发送
             self.stop_auto_send(port_name)
             
-            # 停止数据保存
-            if port_name in self.auto_save_config and self.auto_save_config[port_name]['enabled']:
-                self.data_saver.stop_saving(port_name)
+            # 从共享I/O引擎注销（返回后I/O线程不再访问该串口）
+            if port_name in self.engine_ports:
+                self.io_engines[self.engine_ports.pop(port_name)].unregister(port_name)
             
             # 关闭串口
             serial_port = self.serial_ports[port_name]
@@ -169,6 +233,14 @@ class MultiSerialManager(QObject):
                     if thread.is_alive():
                         print(f"警告：接收线程 {port_name} 未能正常结束")
             
+            # 发出尚未合并完成的数据，并等待各消费者处理完毕
+            self.batcher.flush(port_name)
+            self.consumer_bus.drain(port_name)
+            
+            # 停止数据保存
+            if port_name in self.auto_save_config and self.auto_save_config[port_name]['enabled']:
+                self.data_saver.stop_saving(port_name)
+            
             # 清理资源
             if port_name in self.serial_ports:
                 del self.serial_ports[port_name]
@@ -184,10 +256,15 @@ class MultiSerialManager(QObject):
                 print(f"已清理自动发送数据 {port_name}")
             if port_name in self.statistics:
                 del self.statistics[port_name]
+                self.stats_publisher.unregister_port(port_name)
                 print(f"已清理统计信息 {port_name}")
             if port_name in self.auto_save_config:
                 del self.auto_save_config[port_name]
                 print(f"已清理自动保存配置 {port_name}")
+            self.batcher.discard(port_name)
+            if port_name in self.receive_rings:
+                del self.receive_rings[port_name]
+            self.consumer_bus.unregister_port(port_name)
             
             # 发送连接状态信号
             self.connection_changed.emit(port_name, False)
@@ -224,18 +301,22 @@ class MultiSerialManager(QObject):
                 # 普通文本发送
                 data_bytes = data.encode('utf-8')
             
-            # 发送数据
-            serial_port.write(data_bytes)
-            serial_port.flush()
+            # 发送数据（asyncio模式下排队非阻塞写出）
+            if self.engine_ports.get(port_name) == 'asyncio':
+                if not self.io_engines['asyncio'].write(port_name, data_bytes):
+                    self.error_occurred.emit(port_name, "发送数据失败: asyncio后端未运行")
+                    return False
+            else:
+                serial_port.write(data_bytes)
+                serial_port.flush()
             
-            # 更新统计信息
+            # 更新统计信息（由发布器定时发布）
             if port_name in self.statistics:
-                self.statistics[port_name]['send_count'] += len(data_bytes)
-                self.statistics_updated.emit(
-                    port_name, 
-                    self.statistics[port_name]['receive_count'],
-                    self.statistics[port_name]['send_count']
-                )
+                self.statistics[port_name].add_tx(len(data_bytes))
+            
+            # 发送的数据写入记录日志（其他保存格式只保存接收的数据）
+            if self.data_saver.is_saving(port_name):
+                self.data_saver.save_data(port_name, data_bytes, DIRECTION_TX)
             
             return True
             
@@ -243,10 +324,88 @@ class MultiSerialManager(QObject):
             self.error_occurred.emit(port_name, f"发送数据失败: {str(e)}")
             return False
     
+    def _serial_config(self, serial_port):
+        """
+        获取串口配置（写入记录日志文件头）
+        
+        Args:
+            serial_port: 已打开的串口对象
+            
+        Returns:
+            dict: 串口配置
+        """
+        return {
+            'bytesize': serial_port.bytesize,
+            'parity': serial_port.parity,
+            'stopbits': serial_port.stopbits,
+            'xonxoff': serial_port.xonxoff,
+            'rtscts': serial_port.rtscts,
+            'dsrdtr': serial_port.dsrdtr
+        }
+    
+    def _start_receiving(self, port_name, serial_port):
+        """
+        按当前I/O模式启动串口数据接收
+        
+        Args:
+            port_name: 串口名称
+            serial_port: 已打开的串口对象
+            
+        Returns:
+            bool: 是否成功启动
+        """
+        io_mode = self.global_settings['io_mode']
+        engine_classes = {'reactor': SerialIOReactor, 'asyncio': AsyncioSerialBackend}
+        if io_mode in engine_classes:
+            engine_class = engine_classes[io_mode]
+            if engine_class.is_supported():
+                if io_mode not in self.io_engines:
+                    self.io_engines[io_mode] = engine_class(self._handle_received, self.error_occurred.emit)
+                engine = self.io_engines[io_mode]
+                engine.start()
+                if engine.register(port_name, serial_port, self.receive_rings[port_name]):
+                    self.engine_ports[port_name] = io_mode
+                    return True
+                return False
+            print(f"当前平台不支持 {io_mode} 模式，使用线程模式")
+        
+        # 启动接收线程
+        receive_thread = threading.Thread(
+            target=self.receive_data_loop, 
+            args=(port_name,), 
+            daemon=True
+        )
+        self.receive_threads[port_name] = receive_thread
+        receive_thread.start()
+        
+        # 等待线程启动
+        time.sleep(0.05)
+        return True
+    
+    def _handle_received(self, port_name, nbytes):
+        """
+        数据已写入接收环形缓冲区（在接收线程或I/O线程中调用）
+        
+        Args:
+            port_name: 串口名称
+            nbytes: 写入的字节数
+        """
+        counters = self.statistics.get(port_name)
+        if counters is None:
+            return
+        
+        # 更新统计信息（按原始字节数统计）
+        counters.add_rx(nbytes)
+        
+        # 通知合并器，按批次发送接收数据信号
+        self.batcher.notify(port_name)
+    
     def receive_data_loop(self, port_name):
         """接收数据循环"""
         try:
             serial_port = self.serial_ports[port_name]
+            ring = self.receive_rings[port_name]
+            reader = ChunkReader(serial_port)
             
             while port_name in self.serial_ports and serial_port.is_open:
                 try:
@@ -254,32 +413,10 @@ class MultiSerialManager(QObject):
                     if not serial_port.is_open:
                         break
                     
-                    # 读取数据
-                    data = serial_port.readline()
-                    if data is not None and len(data) > 0:
-                        # 转换为字符串
-                        data_str = data.decode('utf-8', errors='ignore')
-                        
-                        # 更新统计信息
-                        if port_name in self.statistics:
-                            self.statistics[port_name]['receive_count'] += len(data)
-                            self.statistics_updated.emit(
-                                port_name,
-                                self.statistics[port_name]['receive_count'],
-                                self.statistics[port_name]['send_count']
-                            )
-                        
-                        # 自动保存数据
-                        if (port_name in self.auto_save_config and 
-                            self.auto_save_config[port_name]['enabled']):
-                            self.data_saver.save_data(port_name, data_str)
-                        
-                        # 发送接收数据信号
-                        self.data_received.emit(port_name, data_str)
-                    
-                    # 添加短暂延时避免CPU占用过高
-                    import time
-                    time.sleep(0.01)
+                    # 分块读取数据到环形缓冲区（阻塞等待，无固定延时）
+                    nbytes = reader.read_into(ring)
+                    if nbytes:
+                        self._handle_received(port_name, nbytes)
                         
                 except Exception as e:
                     if port_name in self.serial_ports:
@@ -294,6 +431,65 @@ class MultiSerialManager(QObject):
         except Exception as e:
             self.error_occurred.emit(port_name, f"接收线程错误: {str(e)}")
     
+    def _process_batch(self, port_name, data):
+        """处理合并后的数据批次（合并线程）"""
+        counters = self.statistics.get(port_name)
+        if counters is not None:
+            counters.add_rx_lines(data.count(b'\n'))
+        
+        # 分发给各消费者（不阻塞）
+        self.consumer_bus.publish(port_name, data)
+    
+    def _deliver_display(self, port_name, data):
+        """显示消费者（GUI线程）"""
+        # 发送接收数据信号（原始字节，解码由显示/导出环节负责）
+        self.data_received.emit(port_name, data)
+    
+    def _save_batch(self, port_name, data):
+        """保存消费者（保存线程）"""
+        # 自动保存数据
+        if (port_name in self.auto_save_config and 
+            self.auto_save_config[port_name]['enabled']):
+            self.data_saver.save_data(port_name, data)
+    
+    def subscribe_consumer(self, name, callback, use_thread=True, coalesce=True):
+        """
+        订阅所有串口的接收数据（如协议解码器），每个消费者拥有独立的队列和处理线程
+        
+        Args:
+            name: 消费者名称，已存在时替换原消费者
+            callback: 处理函数 callback(port_name, data)，data为原始字节
+            use_thread: True在独立线程中处理，False在GUI线程中处理
+            coalesce: 是否把积压的多个批次合并后再交给处理函数
+            
+        Returns:
+            DataConsumer: 消费者对象
+        """
+        return self.consumer_bus.subscribe(
+            name, callback, use_thread,
+            self.global_settings['consumer_queue_items'],
+            self.global_settings['consumer_queue_bytes'],
+            coalesce
+        )
+    
+    def unsubscribe_consumer(self, name):
+        """
+        取消订阅（处理完已排队的数据后停止）
+        
+        Args:
+            name: 消费者名称
+        """
+        self.consumer_bus.unsubscribe(name)
+    
+    def _on_statistics_snapshot(self, snapshot):
+        """统计快照发布（GUI线程，每个发布周期一次）"""
+        self.statistics_snapshot.emit(snapshot)
+        
+        # 兼容旧接口：仅对计数有变化的串口发送统计信息更新信号
+        for port_name, stats in snapshot.items():
+            if stats['changed']:
+                self.statistics_updated.emit(port_name, stats['receive_count'], stats['send_count'])
+    
     def start_auto_send(self, port_name, data, interval_ms, hex_mode=False):
         """开始自动发送"""
         try:
@@ -345,12 +541,12 @@ class MultiSerialManager(QObject):
         """清空统计信息"""
         if port_name:
             if port_name in self.statistics:
-                self.statistics[port_name] = {'receive_count': 0, 'send_count': 0}
+                self.stats_publisher.reset(port_name)
                 self.statistics_updated.emit(port_name, 0, 0)
         else:
             # 清空所有统计信息
+            self.stats_publisher.reset()
             for port in self.statistics:
-                self.statistics[port] = {'receive_count': 0, 'send_count': 0}
                 self.statistics_updated.emit(port, 0, 0)
     
     def get_connection_status(self, port_name):
@@ -359,9 +555,63 @@ class MultiSerialManager(QObject):
     
     def get_statistics(self, port_name):
         """获取统计信息"""
-        if port_name in self.statistics:
-            return self.statistics[port_name]
-        return {'receive_count': 0, 'send_count': 0}
+        return self.stats_publisher.get_snapshot(port_name)
+    
+    def get_batch_statistics(self, port_name=None):
+        """获取接收数据合并统计"""
+        return self.batcher.get_statistics(port_name)
+    
+    def get_saver_statistics(self):
+        """获取数据保存写入线程统计（队列深度、写入延迟等）"""
+        return self.data_saver.get_writer_statistics()
+    
+    def get_time_index(self, port_name):
+        """获取串口日志的跨文件时间索引，用于按时间定位"""
+        return self.data_saver.get_time_index(port_name)
+    
+    def get_buffer_statistics(self, port_name):
+        """
+        获取串口接收路径上各级缓冲的统计
+        
+        Args:
+            port_name: 串口名称
+            
+        Returns:
+            dict: {'ring': 环形缓冲区统计, 'consumers': {消费者名称: 队列统计}}，串口未连接时为空字典
+        """
+        if port_name not in self.receive_rings:
+            return {}
+        return {
+            'ring': self.receive_rings[port_name].get_statistics(),
+            'consumers': self.consumer_bus.get_statistics(port_name)
+        }
+    
+    def get_overflow_policy(self, port_name):
+        """获取串口的溢出策略"""
+        return self.overflow_policies.get(port_name, self.global_settings['overflow_policy'])
+    
+    def set_overflow_policy(self, port_name, policy):
+        """
+        设置串口的溢出策略（已连接的串口立即生效）
+        
+        Args:
+            port_name: 串口名称
+            policy: 'drop_oldest'、'drop_newest' 或 'block'
+            
+        Returns:
+            bool: 是否设置成功
+        """
+        try:
+            self.overflow_policies[port_name] = check_policy(policy)
+            if port_name in self.receive_rings:
+                self.receive_rings[port_name].set_policy(policy)
+                self.consumer_bus.set_policy(port_name, policy)
+                # 恢复可能因block策略暂停的消费
+                self.batcher.unblock(port_name)
+            return True
+        except Exception as e:
+            self.error_occurred.emit(port_name, f"设置溢出策略失败: {str(e)}")
+            return False
     
     def get_all_connected_ports(self):
         """获取所有已连接的串口"""
@@ -384,7 +634,15 @@ class MultiSerialManager(QObject):
                 except Exception as e:
                     print(f"断开串口 {port_name} 时发生错误: {str(e)}")
             
-            # 关闭所有数据保存
+            # 按依赖顺序收尾：先停止I/O引擎（下次连接时重新启动），
+            # 再发出尚未合并的数据并等待各消费者处理完，最后关闭数据保存
+            for io_mode, engine in list(self.io_engines.items()):
+                try:
+                    engine.stop()
+                except Exception as e:
+                    print(f"停止{io_mode}引擎时发生错误: {str(e)}")
+            self.batcher.flush()
+            self.consumer_bus.drain()
             try:
                 self.data_saver.close_all()
             except Exception as e:
@@ -394,6 +652,22 @@ class MultiSerialManager(QObject):
         except Exception as e:
             self.error_occurred.emit("", f"断开所有连接失败: {str(e)}")
             return False 
+    
+    def shutdown(self):
+        """
+        程序退出时调用：断开所有串口，再依次停止合并线程、各消费者、统计发布和数据保存的后台线程
+        
+        不依赖守护线程在退出时被强行终止，避免中断正在进行的发布或写入。
+        """
+        self.disconnect_all()
+        for name, stop in (('合并线程', self.batcher.stop),
+                           ('消费者', self.consumer_bus.close),
+                           ('统计发布', self.stats_publisher.stop),
+                           ('数据保存', self.data_saver.shutdown)):
+            try:
+                stop()
+            except Exception as e:
+                print(f"停止{name}时发生错误: {str(e)}")
 
     def update_auto_save_config(self, port_name, auto_save_enabled):
         """更新自动保存配置"""
@@ -415,7 +689,8 @@ class MultiSerialManager(QObject):
             # 如果启用自动保存且当前没有在保存，开始保存
             if auto_save_enabled and not self.data_saver.is_saving(port_name):
                 baudrate = self.auto_save_config[port_name]['baudrate']
-                self.data_saver.start_saving(port_name, baudrate)
+                self.data_saver.start_saving(port_name, baudrate,
+                                             serial_config=self._serial_config(self.serial_ports[port_name]))
             elif not auto_save_enabled and self.data_saver.is_saving(port_name):
                 # 如果禁用自动保存且当前在保存，停止保存
                 self.data_saver.stop_saving(port_name)
@@ -426,6 +701,22 @@ class MultiSerialManager(QObject):
             self.error_occurred.emit(port_name, f"更新自动保存配置失败: {str(e)}")
             return False 
 
+    def _settings_changed(self, settings, keys):
+        """
+        检查设置中的这些项是否与当前的全局设置不同
+        
+        设置页面每次变更都会发送完整的设置，未变化的项不需要重新应用。
+        
+        Args:
+            settings: 新的设置
+            keys: 要检查的设置项
+            
+        Returns:
+            bool: 是否有变化
+        """
+        return any(key in settings and settings[key] != self.global_settings.get(key)
+                   for key in keys)
+    
     def update_global_settings(self, settings):
         """更新全局设置"""
         try:
@@ -437,6 +728,86 @@ class MultiSerialManager(QObject):
                 # 更新数据保存器的文件大小限制
                 self.data_saver.update_max_file_size(settings['file_size_limit'])
             
+            # 以下各项只在变化时应用：重新设置切换规则会重新计算切换时刻，
+            # 重新设置压缩、时间索引和持久模式会丢弃提前创建的下一组文件
+            if self._settings_changed(settings, ('rotate_by_size', 'rotation_interval')):
+                if self.data_saver.set_rotation(settings.get('rotate_by_size'),
+                                                settings.get('rotation_interval')):
+                    for key in ('rotate_by_size', 'rotation_interval'):
+                        if key in settings:
+                            self.global_settings[key] = settings[key]
+            
+            if self._settings_changed(settings, ('retention_days', 'disk_quota_mb', 'cleanup_action')):
+                # 由数据保存器的后台清理线程执行，规则未变时不触发清理
+                if self.data_saver.set_retention(settings.get('retention_days'),
+                                                 settings.get('disk_quota_mb'),
+                                                 settings.get('cleanup_action')):
+                    for key in ('retention_days', 'disk_quota_mb', 'cleanup_action'):
+                        if key in settings:
+                            self.global_settings[key] = settings[key]
+            
+            if self._settings_changed(settings, ('compression', 'compression_level', 'compression_mode')):
+                # 新的压缩设置对之后创建的文件生效
+                if self.data_saver.set_compression(settings.get('compression'),
+                                                   settings.get('compression_level'),
+                                                   settings.get('compression_mode')):
+                    for key in ('compression', 'compression_level', 'compression_mode'):
+                        if key in settings:
+                            self.global_settings[key] = settings[key]
+            
+            if self._settings_changed(settings, ('time_index', 'time_index_kb', 'time_index_interval')):
+                # 新的时间索引设置对之后创建的文件生效
+                if self.data_saver.set_time_index(
+                        settings.get('time_index'),
+                        settings['time_index_kb'] * 1024 if 'time_index_kb' in settings else None,
+                        settings.get('time_index_interval')):
+                    for key in ('time_index', 'time_index_kb', 'time_index_interval'):
+                        if key in settings:
+                            self.global_settings[key] = settings[key]
+            
+            if 'save_format' in settings:
+                # 新的保存格式对之后开始保存的串口生效
+                if self.data_saver.set_save_format(settings['save_format']):
+                    self.global_settings['save_format'] = settings['save_format']
+            
+            if ('flush_policy' in settings or 'auto_save_interval' in settings or
+                    'flush_bytes_kb' in settings or 'fsync_interval' in settings):
+                # 保存文件刷新策略（自动保存间隔即按时间刷新的间隔，单位秒）
+                self.data_saver.set_flush_policy(
+                    settings.get('flush_policy'),
+                    settings['flush_bytes_kb'] * 1024 if 'flush_bytes_kb' in settings else None,
+                    settings.get('auto_save_interval'),
+                    settings.get('fsync_interval')
+                )
+            
+            if self._settings_changed(settings, ('commit_interval',)):
+                # 持久模式：定期fsync并写入提交点，启动时据此修复异常退出的日志
+                interval = settings['commit_interval']
+                if self.data_saver.set_durability(interval > 0, interval if interval > 0 else None):
+                    self.global_settings['commit_interval'] = interval
+            
+            if 'batch_window_ms' in settings or 'batch_max_bytes' in settings:
+                self.global_settings['batch_window_ms'] = settings.get(
+                    'batch_window_ms', self.global_settings['batch_window_ms'])
+                self.global_settings['batch_max_bytes'] = settings.get(
+                    'batch_max_bytes', self.global_settings['batch_max_bytes'])
+                self.batcher.set_window(
+                    self.global_settings['batch_window_ms'],
+                    self.global_settings['batch_max_bytes']
+                )
+            
+            if 'overflow_policy' in settings:
+                # 默认溢出策略对之后首次连接的串口生效
+                self.global_settings['overflow_policy'] = check_policy(settings['overflow_policy'])
+            
+            if 'io_mode' in settings:
+                # 新的I/O模式对之后连接的串口生效
+                self.global_settings['io_mode'] = settings['io_mode']
+            
+            if 'statistics_interval_ms' in settings:
+                self.global_settings['statistics_interval_ms'] = settings['statistics_interval_ms']
+                self.stats_publisher.set_interval(settings['statistics_interval_ms'])
+            
             return True
         except Exception as e:
             self.error_occurred.emit("", f"更新全局设置失败: {str(e)}")
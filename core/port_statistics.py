@@ -0,0 +1,219 @@
+import time
+from PyQt6.QtCore import QObject, pyqtSignal, QTimer
+
+
+class PortCounters:
+    """单个串口的收发计数器
+
+    每个计数字段只由一个线程写入（接收字节数由接收线程写，接收行数由合并线程写，
+    发送计数由发送所在线程写），在GIL下单写者的整数自增不会丢失更新，因此无需加锁。
+    清零操作不修改计数字段，而是记录一组基准值，读取快照时减去基准值即可。
+    """
+
+    __slots__ = ('rx_bytes', 'rx_lines', 'tx_bytes', '_base')
+
+    def __init__(self):
+        self.rx_bytes = 0   # 接收字节数（接收线程写）
+        self.rx_lines = 0   # 接收行数（合并线程写）
+        self.tx_bytes = 0   # 发送字节数（发送线程写）
+        self._base = (0, 0, 0)  # 清零基准值（GUI线程写，整体替换为原子操作）
+
+    def add_rx(self, nbytes):
+        """
+        累加接收字节数（仅接收线程调用）
+
+        Args:
+            nbytes: 接收字节数
+        """
+        self.rx_bytes += nbytes
+
+    def add_rx_lines(self, nlines):
+        """
+        累加接收行数（仅合并线程调用）
+
+        Args:
+            nlines: 接收行数
+        """
+        self.rx_lines += nlines
+
+    def add_tx(self, nbytes):
+        """
+        累加发送计数（仅发送线程调用）
+
+        Args:
+            nbytes: 发送字节数
+        """
+        self.tx_bytes += nbytes
+
+    def reset(self):
+        """清零计数（记录当前值作为基准）"""
+        self._base = (self.rx_bytes, self.rx_lines, self.tx_bytes)
+
+    def snapshot(self):
+        """
+        获取计数快照
+
+        Returns:
+            tuple: (接收字节数, 接收行数, 发送字节数)
+        """
+        base_rx_bytes, base_rx_lines, base_tx_bytes = self._base
+        return (self.rx_bytes - base_rx_bytes,
+                self.rx_lines - base_rx_lines,
+                self.tx_bytes - base_tx_bytes)
+
+
+class StatisticsPublisher(QObject):
+    """统计信息发布器，由单个定时器按固定频率发布所有串口的统计快照
+
+    除收发计数外，还汇总各串口接收路径上环形缓冲区和有界队列的丢弃计数。
+    """
+
+    # 定义信号
+    snapshot_ready = pyqtSignal(dict)  # 统计快照 {port_name: {...}}
+
+    def __init__(self, interval_ms=250):
+        """
+        初始化统计信息发布器
+
+        Args:
+            interval_ms: 发布间隔（毫秒），默认250ms即4Hz
+        """
+        super().__init__()
+        self.counters = {}      # 计数器 {port_name: PortCounters}
+        self._last = {}         # 上次发布时的计数 {port_name: (rx_bytes, rx_lines, tx_bytes)}
+        self._drop_sources = {}  # 丢弃计数来源 {port_name: [返回(丢弃字节数, 丢弃帧数)的函数]}
+        self._drop_base = {}     # 丢弃计数清零基准值 {port_name: (dropped_bytes, dropped_frames)}
+        self._last_time = time.monotonic()
+        self.latest = {}        # 最近一次发布的快照
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.publish)
+        self.timer.start(interval_ms)
+
+    def stop(self):
+        """停止定时发布"""
+        self.timer.stop()
+
+    def set_interval(self, interval_ms):
+        """
+        设置发布间隔
+
+        Args:
+            interval_ms: 发布间隔（毫秒）
+        """
+        self.timer.setInterval(max(10, int(interval_ms)))
+
+    def register_port(self, port_name, drop_sources=()):
+        """
+        注册串口并返回其计数器
+
+        Args:
+            port_name: 串口名称
+            drop_sources: 丢弃计数来源，每项为返回(丢弃字节数, 丢弃帧数)的函数
+
+        Returns:
+            PortCounters: 串口计数器
+        """
+        counters = PortCounters()
+        self.counters[port_name] = counters
+        self._last[port_name] = (0, 0, 0)
+        self._drop_sources[port_name] = list(drop_sources)
+        self._drop_base[port_name] = (0, 0)
+        return counters
+
+    def unregister_port(self, port_name):
+        """
+        注销串口
+
+        Args:
+            port_name: 串口名称
+        """
+        self.counters.pop(port_name, None)
+        self._last.pop(port_name, None)
+        self._drop_sources.pop(port_name, None)
+        self._drop_base.pop(port_name, None)
+        self.latest.pop(port_name, None)
+
+    def reset(self, port_name=None):
+        """
+        清零统计
+
+        Args:
+            port_name: 串口名称，为None时清零所有串口
+        """
+        ports = [port_name] if port_name else list(self.counters.keys())
+        for port in ports:
+            if port in self.counters:
+                self.counters[port].reset()
+                self._last[port] = (0, 0, 0)
+                self._drop_base[port] = self._sum_drops(port, raw=True)
+        self.publish()
+
+    def get_snapshot(self, port_name):
+        """
+        立即读取串口的统计快照
+
+        Args:
+            port_name: 串口名称
+
+        Returns:
+            dict: 统计信息，串口不存在时计数均为0
+        """
+        if port_name not in self.counters:
+            return {'receive_count': 0, 'send_count': 0, 'receive_lines': 0,
+                    'dropped_bytes': 0, 'dropped_frames': 0}
+        rx_bytes, rx_lines, tx_bytes = self.counters[port_name].snapshot()
+        dropped_bytes, dropped_frames = self._sum_drops(port_name)
+        return {'receive_count': rx_bytes, 'send_count': tx_bytes, 'receive_lines': rx_lines,
+                'dropped_bytes': dropped_bytes, 'dropped_frames': dropped_frames}
+
+    def publish(self):
+        """发布所有串口的统计快照（定时器回调）"""
+        now = time.monotonic()
+        elapsed = max(now - self._last_time, 1e-6)
+        self._last_time = now
+
+        snapshot = {}
+        for port_name, counters in list(self.counters.items()):
+            rx_bytes, rx_lines, tx_bytes = counters.snapshot()
+            dropped_bytes, dropped_frames = self._sum_drops(port_name)
+            last_dropped = self.latest.get(port_name, {}).get('dropped_bytes', 0)
+            last_rx_bytes, last_rx_lines, last_tx_bytes = self._last.get(port_name, (0, 0, 0))
+            self._last[port_name] = (rx_bytes, rx_lines, tx_bytes)
+            snapshot[port_name] = {
+                'receive_count': rx_bytes,
+                'send_count': tx_bytes,
+                'receive_lines': rx_lines,
+                'rx_bytes_per_sec': max(rx_bytes - last_rx_bytes, 0) / elapsed,
+                'rx_lines_per_sec': max(rx_lines - last_rx_lines, 0) / elapsed,
+                'tx_bytes_per_sec': max(tx_bytes - last_tx_bytes, 0) / elapsed,
+                'dropped_bytes': dropped_bytes,
+                'dropped_frames': dropped_frames,
+                'changed': ((rx_bytes, rx_lines, tx_bytes) != (last_rx_bytes, last_rx_lines, last_tx_bytes) or
+                            dropped_bytes != last_dropped)
+            }
+
+        self.latest = snapshot
+        if snapshot:
+            self.snapshot_ready.emit(snapshot)
+
+    def _sum_drops(self, port_name, raw=False):
+        """
+        汇总串口各来源的丢弃计数
+
+        Args:
+            port_name: 串口名称
+            raw: 为True时返回未减去清零基准值的计数
+
+        Returns:
+            tuple: (丢弃字节数, 丢弃帧数)
+        """
+        dropped_bytes = dropped_frames = 0
+        for source in self._drop_sources.get(port_name, ()):
+            nbytes, nframes = source()
+            dropped_bytes += nbytes
+            dropped_frames += nframes
+        if raw:
+            return dropped_bytes, dropped_frames
+        base_bytes, base_frames = self._drop_base.get(port_name, (0, 0))
+        return dropped_bytes - base_bytes, dropped_frames - base_frames
@@ -0,0 +1,280 @@
+import mmap
+import struct
+from .log_compression import open_seekable
+
+
+# 记录日志文件 (.rec) 格式：
+# 文件头：FILE_HEADER + 串口名称(UTF-8)，header_size为文件头总长度
+# 记录：RECORD_HEADER [时间戳ns, 方向, 长度] + 数据
+# 同步标记是方向为DIRECTION_SYNC的记录，数据为 SYNC_MAGIC + 该记录在文件中的偏移，
+# 文件损坏时可以从下一个同步标记处继续读取
+FILE_MAGIC = b'SRLOG001'
+FILE_VERSION = 1
+# 魔数、版本、文件头长度、开始系统时间ns、开始单调时间ns、波特率、数据位、校验位、停止位×10、流控标志
+FILE_HEADER = struct.Struct('<8sHHqqIBcBB')
+RECORD_HEADER = struct.Struct('<QBI')
+SYNC_MAGIC = b'\xa5\x5aSRLOG-SYNC\x5a\xa5\x00\x00'
+SYNC_PAYLOAD = struct.Struct('<16sQ')
+
+# 数据方向
+DIRECTION_RX = 0     # 接收
+DIRECTION_TX = 1     # 发送
+DIRECTION_SYNC = 0xFF  # 同步标记
+
+# 流控标志位
+FLOW_XONXOFF = 0x01
+FLOW_RTSCTS = 0x02
+FLOW_DSRDTR = 0x04
+
+
+def encode_file_header(port_name, baudrate, serial_config, wall_ns, monotonic_ns):
+    """
+    生成记录日志文件头
+
+    Args:
+        port_name: 串口名称
+        baudrate: 波特率
+        serial_config: 串口配置 {'bytesize', 'parity', 'stopbits', 'xonxoff', 'rtscts', 'dsrdtr'}，可为None
+        wall_ns: 开始时的系统时间(ns)
+        monotonic_ns: 开始时的单调时间(ns)
+
+    Returns:
+        bytes: 文件头
+    """
+    config = serial_config or {}
+    flow = ((FLOW_XONXOFF if config.get('xonxoff') else 0) |
+            (FLOW_RTSCTS if config.get('rtscts') else 0) |
+            (FLOW_DSRDTR if config.get('dsrdtr') else 0))
+    name = port_name.encode('utf-8')
+    return FILE_HEADER.pack(
+        FILE_MAGIC, FILE_VERSION, FILE_HEADER.size + len(name), wall_ns, monotonic_ns,
+        int(baudrate), int(config.get('bytesize', 8)),
+        str(config.get('parity', 'N')).encode('ascii')[:1],
+        int(round(float(config.get('stopbits', 1)) * 10)), flow
+    ) + name
+
+
+def encode_record(timestamp_ns, direction, data):
+    """
+    生成一条记录的记录头（数据紧随其后单独写入，避免复制）
+
+    Args:
+        timestamp_ns: 时间戳(ns)
+        direction: 数据方向
+        data: 数据
+
+    Returns:
+        bytes: 记录头
+    """
+    return RECORD_HEADER.pack(timestamp_ns, direction, len(data))
+
+
+def encode_sync(timestamp_ns, offset):
+    """
+    生成一条同步标记记录
+
+    Args:
+        timestamp_ns: 时间戳(ns)
+        offset: 同步标记在文件中的偏移
+
+    Returns:
+        bytes: 完整的同步标记记录
+    """
+    payload = SYNC_PAYLOAD.pack(SYNC_MAGIC, offset)
+    return RECORD_HEADER.pack(timestamp_ns, DIRECTION_SYNC, len(payload)) + payload
+
+
+class RecordLogReader:
+    """记录日志读取器
+
+    用mmap映射整个文件，迭代时返回指向映射区域的memoryview切片，不复制数据。
+    压缩的文件先解压到临时文件再映射。
+    遇到损坏的记录时跳到下一个同步标记继续读取，文件末尾不完整的记录被忽略。
+    迭代得到的memoryview须在close()之前释放，否则映射无法立即关闭。
+    """
+
+    def __init__(self, path, cancelled=None):
+        """
+        打开记录日志文件
+
+        Args:
+            path: 文件路径
+            cancelled: 解压压缩文件时检查是否取消的函数，见open_seekable()
+
+        Raises:
+            ValueError: 文件格式无效
+            OpenCancelled: 解压被取消
+        """
+        self.path = str(path)
+        self._file = open_seekable(self.path, cancelled)
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # 空文件无法映射
+            self._file.close()
+            raise ValueError(f"记录日志文件为空: {self.path}")
+        self._view = memoryview(self._mmap)
+        self.size = len(self._mmap)
+        self.corrupt_regions = 0  # 迭代时跳过的损坏区域数
+        try:
+            self._parse_header()
+        except Exception:
+            self.close()
+            raise
+
+    def _parse_header(self):
+        """解析文件头"""
+        if self.size < FILE_HEADER.size:
+            raise ValueError(f"记录日志文件头不完整: {self.path}")
+        (magic, version, header_size, self.start_wall_ns, self.start_monotonic_ns,
+         self.baudrate, self.bytesize, parity, stopbits, flow) = FILE_HEADER.unpack_from(self._mmap)
+        if magic != FILE_MAGIC:
+            raise ValueError(f"无效的记录日志文件: {self.path}")
+        if version > FILE_VERSION:
+            raise ValueError(f"不支持的记录日志版本: {version}")
+        if header_size < FILE_HEADER.size or header_size > self.size:
+            raise ValueError(f"记录日志文件头不完整: {self.path}")
+        self.version = version
+        self.parity = parity.decode('ascii', errors='replace')
+        self.stopbits = stopbits / 10
+        self.xonxoff = bool(flow & FLOW_XONXOFF)
+        self.rtscts = bool(flow & FLOW_RTSCTS)
+        self.dsrdtr = bool(flow & FLOW_DSRDTR)
+        self.port_name = bytes(self._mmap[FILE_HEADER.size:header_size]).decode('utf-8', errors='replace')
+        self.data_offset = header_size
+
+    def get_serial_config(self):
+        """
+        获取文件头中记录的串口配置
+
+        Returns:
+            dict: 串口配置
+        """
+        return {
+            'port': self.port_name,
+            'baudrate': self.baudrate,
+            'bytesize': self.bytesize,
+            'parity': self.parity,
+            'stopbits': self.stopbits,
+            'xonxoff': self.xonxoff,
+            'rtscts': self.rtscts,
+            'dsrdtr': self.dsrdtr
+        }
+
+    def wall_time_ns(self, timestamp_ns):
+        """
+        把记录的单调时间戳换算为系统时间
+
+        Args:
+            timestamp_ns: 记录时间戳(ns)
+
+        Returns:
+            int: 系统时间(ns，自1970年起)
+        """
+        return self.start_wall_ns + (timestamp_ns - self.start_monotonic_ns)
+
+    def records(self, offset=None, include_sync=False):
+        """
+        从指定位置迭代记录
+
+        Args:
+            offset: 起始偏移（须位于记录边界），为None时从第一条记录开始
+            include_sync: 是否包含同步标记记录
+
+        Yields:
+            tuple: (记录偏移, 时间戳ns, 方向, 数据memoryview)
+        """
+        view = self._view
+        size = self.size
+        pos = self.data_offset if offset is None else offset
+        header_size = RECORD_HEADER.size
+        while pos + header_size <= size:
+            timestamp_ns, direction, length = RECORD_HEADER.unpack_from(view, pos)
+            end = pos + header_size + length
+            if end > size:
+                # 末尾不完整的记录（写入中断），或长度字段损坏
+                next_sync = self.find_sync(pos + 1)
+                if next_sync < 0:
+                    return
+                self.corrupt_regions += 1
+                pos = next_sync
+                continue
+            if direction == DIRECTION_SYNC:
+                if not self._is_sync(pos):
+                    pos = self._skip_corrupt(pos)
+                    continue
+                if include_sync:
+                    yield pos, timestamp_ns, direction, view[pos + header_size:end]
+            elif direction in (DIRECTION_RX, DIRECTION_TX):
+                yield pos, timestamp_ns, direction, view[pos + header_size:end]
+            else:
+                pos = self._skip_corrupt(pos)
+                continue
+            pos = end
+
+    def __iter__(self):
+        """
+        迭代所有数据记录（不含同步标记）
+
+        Yields:
+            tuple: (时间戳ns, 方向, 数据memoryview)
+        """
+        for _, timestamp_ns, direction, payload in self.records():
+            yield timestamp_ns, direction, payload
+
+    def find_sync(self, offset):
+        """
+        查找指定偏移及之后的第一个同步标记
+
+        Args:
+            offset: 起始偏移
+
+        Returns:
+            int: 同步标记记录的偏移，找不到时返回-1
+        """
+        start = max(offset, self.data_offset) + RECORD_HEADER.size
+        while True:
+            found = self._mmap.find(SYNC_MAGIC, start)
+            if found < 0:
+                return -1
+            pos = found - RECORD_HEADER.size
+            if self._is_sync(pos):
+                return pos
+            start = found + 1
+
+    def _is_sync(self, pos):
+        """检查pos处是否为有效的同步标记记录"""
+        end = pos + RECORD_HEADER.size + SYNC_PAYLOAD.size
+        if pos < self.data_offset or end > self.size:
+            return False
+        _, direction, length = RECORD_HEADER.unpack_from(self._view, pos)
+        if direction != DIRECTION_SYNC or length != SYNC_PAYLOAD.size:
+            return False
+        magic, offset = SYNC_PAYLOAD.unpack_from(self._view, pos + RECORD_HEADER.size)
+        return magic == SYNC_MAGIC and offset == pos
+
+    def _skip_corrupt(self, pos):
+        """跳过损坏区域，返回下一个同步标记的偏移（没有时为文件末尾）"""
+        self.corrupt_regions += 1
+        next_sync = self.find_sync(pos + 1)
+        return next_sync if next_sync >= 0 else self.size
+
+    def close(self):
+        """关闭文件映射"""
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # 仍有迭代得到的memoryview未释放，映射在它们被回收后关闭
+                pass
+            self._mmap = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
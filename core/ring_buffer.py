@@ -0,0 +1,360 @@
+import threading
+from .bounded_queue import POLICY_DROP_OLDEST, POLICY_DROP_NEWEST, check_policy
+
+
+class ByteRingBuffer:
+    """固定容量的单生产者/单消费者字节环形缓冲区
+
+    底层为预分配的bytearray，读写位置使用单调递增的绝对偏移量：
+    head只由生产者写，tail只由消费者写，因此一读一写两个线程之间无需加锁。
+    缓冲区写满后按溢出策略处理：
+    drop_oldest（默认）生产者不等待消费者，直接覆盖最旧的未读数据，
+    被覆盖的字节由消费者在读取时发现并计入overwrite_count；
+    drop_newest 新数据读入临时区域后丢弃，计入dropped_bytes；
+    block 不再提供可写区域，生产者通过wait_for_space()等待消费者腾出空间。
+    消费者可以通过memoryview切片零拷贝地访问数据。
+    """
+
+    DISCARD_SIZE = 64 * 1024
+
+    def __init__(self, capacity, policy=POLICY_DROP_OLDEST):
+        """
+        初始化环形缓冲区
+
+        Args:
+            capacity: 缓冲区容量（字节）
+            policy: 溢出策略
+        """
+        self.capacity = int(capacity)
+        if self.capacity <= 0:
+            raise ValueError("缓冲区容量必须大于0")
+        self._buffer = bytearray(self.capacity)
+        self._view = memoryview(self._buffer)
+
+        self.head = 0            # 已提交的写入位置（生产者写）
+        self._reserved = 0       # 正在写入区域的结束位置（生产者写）
+        self.tail = 0            # 读取位置（消费者写）
+        self.high_water = 0      # 未读数据量的历史最高值（生产者写）
+        self.overwrite_count = 0   # 未读即被覆盖的字节数（消费者写）
+        self.overwrite_events = 0  # 发生覆盖的次数（消费者写）
+        self.dropped_bytes = 0     # 缓冲区满时丢弃的新数据字节数（生产者写）
+        self.dropped_frames = 0    # 缓冲区满时丢弃新数据的次数（生产者写）
+
+        self.policy = check_policy(policy)
+        self._discard = None        # drop_newest策略下读取后丢弃数据的临时区域
+        self._discarding = False    # 当前可写区域是否为临时区域（生产者写）
+        self._space = threading.Event()  # 消费者腾出空间时置位（block策略）
+
+    def __len__(self):
+        """未读数据的字节数"""
+        return min(self.head - self.tail, self.capacity)
+
+    def free_space(self):
+        """可写入而不覆盖未读数据的字节数"""
+        return self.capacity - len(self)
+
+    def is_full(self):
+        """缓冲区是否已满"""
+        return self.head - self.tail >= self.capacity
+
+    def set_policy(self, policy):
+        """
+        设置溢出策略
+
+        Args:
+            policy: 溢出策略
+        """
+        self.policy = check_policy(policy)
+        self._space.set()
+
+    # ---- 生产者接口 ----
+
+    def writable_view(self, max_size=None):
+        """
+        获取下一段可写入的连续区域，写入后须调用commit()提交
+
+        Args:
+            max_size: 最大长度，为None时返回到缓冲区末尾的整段区域
+
+        Returns:
+            memoryview: 可写入的区域，block策略下缓冲区已满时长度为0
+        """
+        start = self.head % self.capacity
+        size = self.capacity - start
+        if self.policy != POLICY_DROP_OLDEST:
+            size = min(size, self.free_space())
+        if max_size is not None:
+            size = max(0, min(size, int(max_size)))
+        if size == 0 and self.policy == POLICY_DROP_NEWEST:
+            # 缓冲区已满：数据读入临时区域后丢弃，数据源不会被阻塞
+            size = self.DISCARD_SIZE if max_size is None else max(1, int(max_size))
+            if self._discard is None or len(self._discard) < size:
+                self._discard = memoryview(bytearray(size))
+            self._discarding = True
+            self._reserved = self.head
+            return self._discard[:size]
+        self._discarding = False
+        self._reserved = self.head + size
+        return self._view[start:start + size]
+
+    def commit(self, nbytes):
+        """
+        提交已写入writable_view()区域的字节
+
+        Args:
+            nbytes: 实际写入的字节数
+        """
+        if self._discarding:
+            self._discarding = False
+            if nbytes:
+                self.dropped_bytes += nbytes
+                self.dropped_frames += 1
+            return
+        self.head += nbytes
+        self._reserved = self.head
+        level = self.head - self.tail
+        if level > self.high_water:
+            self.high_water = min(level, self.capacity)
+
+    def fill_from(self, readinto, max_size=None):
+        """
+        直接从数据源读取到缓冲区（如 serial_port.readinto 或 os.readv）
+
+        Args:
+            readinto: 读取函数，参数为可写的memoryview，返回读取的字节数
+            max_size: 本次最大读取字节数
+
+        Returns:
+            int: 读取的字节数
+        """
+        view = self.writable_view(max_size)
+        try:
+            nbytes = readinto(view) or 0
+        except BaseException:
+            self._reserved = self.head
+            self._discarding = False
+            raise
+        finally:
+            view.release()
+        self.commit(nbytes)
+        return nbytes
+
+    def write(self, data):
+        """
+        写入数据，超出容量时按溢出策略覆盖最旧的数据或丢弃新数据
+
+        Args:
+            data: 字节数据（bytes/bytearray/memoryview）
+
+        Returns:
+            int: 写入的字节数
+        """
+        data = memoryview(data)
+        total = data.nbytes
+        if self.policy != POLICY_DROP_OLDEST:
+            # 不覆盖未读数据：放不下的部分计为丢弃（write()不阻塞）
+            free = self.free_space()
+            if total > free:
+                self.dropped_bytes += total - free
+                self.dropped_frames += 1
+                data = data[:free]
+        elif total > self.capacity:
+            # 超过整个缓冲区的部分直接视为被覆盖
+            self.head += total - self.capacity
+            data = data[total - self.capacity:]
+        offset = 0
+        length = len(data)
+        while offset < length:
+            view = self.writable_view(length - offset)
+            size = len(view)
+            view[:] = data[offset:offset + size]
+            view.release()
+            self.commit(size)
+            offset += size
+        return total
+
+    def wait_for_space(self, timeout=None):
+        """
+        等待消费者腾出空间（block策略下生产者调用）
+
+        Args:
+            timeout: 最长等待时间（秒）
+
+        Returns:
+            bool: 是否已有可写空间
+        """
+        self._space.clear()
+        if not self.is_full():
+            return True
+        self._space.wait(timeout)
+        return not self.is_full()
+
+    # ---- 消费者接口 ----
+
+    def views(self, start, end):
+        """
+        获取绝对偏移区间[start, end)对应的memoryview切片（不做有效性检查）
+
+        Args:
+            start: 起始绝对偏移
+            end: 结束绝对偏移
+
+        Returns:
+            list: 1~2段memoryview
+        """
+        if end <= start:
+            return []
+        begin = start % self.capacity
+        length = end - start
+        if begin + length <= self.capacity:
+            return [self._view[begin:begin + length]]
+        first = self.capacity - begin
+        return [self._view[begin:], self._view[:length - first]]
+
+    def find(self, sub, start, end):
+        """
+        在绝对偏移区间[start, end)中查找字节串（直接在底层缓冲区上查找，不复制数据）
+
+        跨过缓冲区末尾的匹配也能找到。
+
+        Args:
+            sub: 要查找的字节串
+            start: 起始绝对偏移
+            end: 结束绝对偏移
+
+        Returns:
+            int: 第一个匹配的绝对偏移，没有时返回-1
+        """
+        if end - start < len(sub):
+            return -1
+        begin = start % self.capacity
+        length = end - start
+        if begin + length <= self.capacity:
+            pos = self._buffer.find(sub, begin, begin + length)
+            return -1 if pos < 0 else start + (pos - begin)
+        pos = self._buffer.find(sub, begin, self.capacity)
+        if pos >= 0:
+            return start + (pos - begin)
+        wrap = start + (self.capacity - begin)  # 缓冲区末尾对应的绝对偏移
+        if len(sub) > 1:
+            # 跨过缓冲区末尾的匹配
+            lo = max(start, wrap - len(sub) + 1)
+            window = b''.join(self.views(lo, min(end, wrap + len(sub) - 1)))
+            pos = window.find(sub)
+            if pos >= 0:
+                return lo + pos
+        pos = self._buffer.find(sub, 0, end - wrap)
+        return -1 if pos < 0 else wrap + pos
+
+    def oldest_valid(self):
+        """
+        获取当前仍保留在缓冲区中的最早绝对偏移
+
+        Returns:
+            int: 最早的有效偏移
+        """
+        return max(0, max(self.head, self._reserved) - self.capacity)
+
+    def is_valid(self, start):
+        """
+        检查从start开始的数据是否仍未被覆盖（用于零拷贝读取后的校验）
+
+        Args:
+            start: 绝对偏移
+
+        Returns:
+            bool: 是否有效
+        """
+        return start >= self.oldest_valid()
+
+    def peek(self, max_size=None):
+        """
+        零拷贝地查看未读数据，不移动读取位置
+
+        Args:
+            max_size: 最大字节数
+
+        Returns:
+            tuple: (起始绝对偏移, memoryview切片列表)
+        """
+        self._skip_overwritten()
+        start = self.tail
+        end = self.head
+        if max_size is not None:
+            end = min(end, start + int(max_size))
+        return start, self.views(start, end)
+
+    def consume(self, nbytes):
+        """
+        标记数据已读取
+
+        Args:
+            nbytes: 已读取的字节数
+        """
+        self.tail = min(self.tail + nbytes, self.head)
+        self._space.set()
+
+    def read(self, max_size=None):
+        """
+        读取并复制未读数据
+
+        Args:
+            max_size: 最大字节数
+
+        Returns:
+            bytes: 读取的数据
+        """
+        start, views = self.peek(max_size)
+        if not views:
+            return b''
+        data = views[0].tobytes() if len(views) == 1 else b''.join(views)
+        # 复制期间如被生产者覆盖，丢弃已失效的开头部分
+        lost = self.oldest_valid() - start
+        if lost > 0:
+            data = data[lost:]
+            self.overwrite_count += lost
+            self.overwrite_events += 1
+        self.tail = start + max(lost, 0) + len(data)
+        self._space.set()
+        return data
+
+    def clear(self):
+        """丢弃所有未读数据（消费者调用）"""
+        self.tail = self.head
+        self._space.set()
+
+    def get_drop_counts(self):
+        """
+        获取丢失数据的计数（覆盖与丢弃合计）
+
+        Returns:
+            tuple: (丢失字节数, 丢失次数)
+        """
+        return (self.overwrite_count + self.dropped_bytes,
+                self.overwrite_events + self.dropped_frames)
+
+    def get_statistics(self):
+        """
+        获取缓冲区统计
+
+        Returns:
+            dict: 容量、溢出策略、未读字节数、高水位、覆盖及丢弃的字节数和次数
+        """
+        return {
+            'capacity': self.capacity,
+            'policy': self.policy,
+            'used': len(self),
+            'high_water': self.high_water,
+            'overwrite_count': self.overwrite_count,
+            'overwrite_events': self.overwrite_events,
+            'dropped_bytes': self.dropped_bytes,
+            'dropped_frames': self.dropped_frames
+        }
+
+    def _skip_overwritten(self):
+        """跳过已被覆盖的未读数据并计数（消费者）"""
+        lost = self.oldest_valid() - self.tail
+        if lost > 0:
+            self.overwrite_count += lost
+            self.overwrite_events += 1
+            self.tail += lost
@@ -0,0 +1,275 @@
+import threading
+import time
+from PyQt6.QtCore import QObject, pyqtSignal
+
+
+class SignalBatcher(QObject):
+    """跨线程信号合并器
+
+    每个串口注册一个接收环形缓冲区，接收线程把数据写入缓冲区后调用notify()，
+    合并线程（缓冲区唯一的消费者）按时间窗口或数据量把积累的数据作为一批取出，
+    以一次batch_ready信号发出，避免每次读取都向下游投递一次。
+    设置了容量检查函数时，每批只取出下游放得下的数据；下游已满时暂停消费该串口，
+    数据留在环形缓冲区中（block策略下缓冲区写满后由接收方阻塞），直到unblock()。
+    """
+
+    # 定义信号
+    batch_ready = pyqtSignal(str, bytes)  # 合并后的数据批次 (port_name, data)，在合并线程中发出
+
+    def __init__(self, window_ms=20, max_batch_bytes=64 * 1024):
+        """
+        初始化信号合并器
+
+        Args:
+            window_ms: 合并时间窗口（毫秒），批次中第一个数据块到达后最多等待的时间
+            max_batch_bytes: 单批最大字节数，达到后立即发出
+        """
+        super().__init__()
+        self.window_ms = window_ms
+        self.max_batch_bytes = max_batch_bytes
+
+        self._lock = threading.Lock()
+        self._consume_lock = threading.Lock()  # 保证环形缓冲区同一时刻只有一个消费者
+        self._rings = {}    # 接收环形缓冲区 {port_name: ByteRingBuffer}
+        self._blocked = set()  # 因下游已满而暂停消费的串口
+        self._capacity_check = None  # 下游容量检查函数 func(port_name) -> 可取出的字节数或None（不限制）
+        self._pending = {}  # 待合并批次 {port_name: {'chunks': 0, 'first_time': float}}
+        self._wakeup = threading.Event()
+        self._running = False
+        self._thread = None
+
+        # 合并统计 {port_name: {'batches': 0, 'chunks': 0, 'bytes': 0}}
+        self.statistics = {}
+
+    def start(self):
+        """启动合并线程"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止合并线程并发出剩余数据"""
+        self._running = False
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self.flush()
+
+    def set_window(self, window_ms=None, max_batch_bytes=None):
+        """
+        更新合并窗口
+
+        Args:
+            window_ms: 合并时间窗口（毫秒）
+            max_batch_bytes: 单批最大字节数
+        """
+        if window_ms is not None:
+            self.window_ms = max(0, int(window_ms))
+        if max_batch_bytes is not None:
+            self.max_batch_bytes = max(1, int(max_batch_bytes))
+        self._wakeup.set()
+
+    def set_capacity_check(self, func):
+        """
+        设置下游容量检查函数
+
+        Args:
+            func: func(port_name)，返回下游当前可接收的字节数，返回None表示不限制
+        """
+        self._capacity_check = func
+
+    def register_port(self, port_name, ring):
+        """
+        注册串口的接收环形缓冲区
+
+        Args:
+            port_name: 串口名称
+            ring: ByteRingBuffer 接收环形缓冲区
+        """
+        with self._lock:
+            self._rings[port_name] = ring
+            self._pending.pop(port_name, None)
+            self._blocked.discard(port_name)
+
+    def add(self, port_name, data):
+        """
+        写入一个数据块并通知合并（生产者线程调用）
+
+        Args:
+            port_name: 串口名称
+            data: 原始字节数据
+        """
+        ring = self._rings.get(port_name)
+        if ring is None or not data:
+            return
+        ring.write(data)
+        self.notify(port_name)
+
+    def notify(self, port_name):
+        """
+        通知有新数据已写入串口的环形缓冲区（生产者线程调用）
+
+        Args:
+            port_name: 串口名称
+        """
+        with self._lock:
+            ring = self._rings.get(port_name)
+            if ring is None:
+                return
+            pending = self._pending.get(port_name)
+            if pending is None:
+                self._pending[port_name] = {'chunks': 1, 'first_time': time.monotonic()}
+                # 新批次开始，唤醒合并线程以便按时间窗口计时
+                wake = True
+            else:
+                pending['chunks'] += 1
+                wake = len(ring) >= self.max_batch_bytes
+        if wake:
+            self._wakeup.set()
+
+    def unblock(self, port_name):
+        """
+        恢复消费因下游已满而暂停的串口（下游已腾出空间或溢出策略已改变时调用）
+
+        Args:
+            port_name: 串口名称
+        """
+        with self._lock:
+            if port_name not in self._blocked:
+                return
+            self._blocked.discard(port_name)
+        self._wakeup.set()
+
+    def flush(self, port_name=None):
+        """
+        立即发出待合并的数据（不做下游容量检查）
+
+        Args:
+            port_name: 串口名称，为None时发出所有串口的数据
+        """
+        with self._lock:
+            if port_name is None:
+                batches = self._pending
+                self._pending = {}
+            elif port_name in self._pending:
+                batches = {port_name: self._pending.pop(port_name)}
+            else:
+                batches = {}
+            for name in batches:
+                self._blocked.discard(name)
+        self._emit_batches(batches, force=True)
+
+    def discard(self, port_name):
+        """
+        注销串口，丢弃其待合并数据和统计信息
+
+        Args:
+            port_name: 串口名称
+        """
+        with self._lock:
+            self._rings.pop(port_name, None)
+            self._pending.pop(port_name, None)
+            self._blocked.discard(port_name)
+            self.statistics.pop(port_name, None)
+
+    def get_statistics(self, port_name=None):
+        """
+        获取合并统计
+
+        Args:
+            port_name: 串口名称，为None时返回所有串口的汇总
+
+        Returns:
+            dict: {'batches': 发出的批次数, 'chunks': 合并的数据块数, 'bytes': 合并的字节数}
+        """
+        with self._lock:
+            if port_name is not None:
+                return dict(self.statistics.get(port_name, {'batches': 0, 'chunks': 0, 'bytes': 0}))
+            total = {'batches': 0, 'chunks': 0, 'bytes': 0}
+            for stats in self.statistics.values():
+                for key in total:
+                    total[key] += stats[key]
+            return total
+
+    def _flush_loop(self):
+        """合并线程主循环"""
+        while self._running:
+            self._wakeup.wait(self._next_timeout())
+            self._wakeup.clear()
+            self._flush_due()
+
+    def _next_timeout(self):
+        """计算距离最早一个批次到期的时间，没有待合并数据时返回None"""
+        with self._lock:
+            waiting = [pending['first_time'] for port_name, pending in self._pending.items()
+                       if port_name not in self._blocked]
+            if not waiting:
+                return None
+            first_time = min(waiting)
+        return max(0.0, first_time + self.window_ms / 1000.0 - time.monotonic())
+
+    def _flush_due(self):
+        """发出已到期或已达到大小上限的批次"""
+        now = time.monotonic()
+        window = self.window_ms / 1000.0
+        with self._lock:
+            due = {}
+            for port_name, pending in list(self._pending.items()):
+                if port_name in self._blocked:
+                    continue
+                ring = self._rings.get(port_name)
+                if (ring is None or len(ring) >= self.max_batch_bytes or
+                        now - pending['first_time'] >= window):
+                    due[port_name] = self._pending.pop(port_name)
+        self._emit_batches(due)
+
+    def _emit_batches(self, batches, force=False):
+        """
+        从环形缓冲区取出数据并发出信号
+
+        Args:
+            batches: 待发出的批次 {port_name: pending}
+            force: 是否忽略下游容量（断开或停止时取出全部数据）
+        """
+        for port_name, pending in batches.items():
+            ring = self._rings.get(port_name)
+            if ring is None:
+                continue
+            max_size = None
+            if self._capacity_check is not None and not force:
+                # 只取出下游放得下的数据，其余留在环形缓冲区中
+                max_size = self._capacity_check(port_name)
+                if max_size is not None and max_size <= 0:
+                    self._block(port_name, pending)
+                    continue
+            with self._consume_lock:
+                data = ring.read(max_size)
+            if not data:
+                continue
+            with self._lock:
+                stats = self.statistics.setdefault(port_name, {'batches': 0, 'chunks': 0, 'bytes': 0})
+                stats['batches'] += 1
+                stats['chunks'] += pending['chunks']
+                stats['bytes'] += len(data)
+            self.batch_ready.emit(port_name, data)
+            if max_size is not None and len(ring):
+                self._block(port_name, pending)
+
+    def _block(self, port_name, pending):
+        """下游已满，暂停消费串口的环形缓冲区直到unblock()"""
+        with self._lock:
+            if port_name not in self._rings:
+                return
+            self._blocked.add(port_name)
+            current = self._pending.setdefault(port_name, pending)
+            if current is not pending:
+                current['chunks'] += pending['chunks']
+                current['first_time'] = min(current['first_time'], pending['first_time'])
+        room = self._capacity_check(port_name) if self._capacity_check is not None else None
+        if room is None or room > 0:
+            # 标记暂停前下游已腾出空间，立即恢复
+            with self._lock:
+                self._blocked.discard(port_name)
@@ -0,0 +1,95 @@
+import queue
+import threading
+
+
+class TaskWorker:
+    """后台任务线程：按提交顺序依次执行任务
+
+    线程在第一次提交任务时启动；每个任务可以附带仍在使用的文件路径，
+    任务完成前这些文件出现在pending_paths()中（日志清理线程不会清理这些文件）。
+    切换线程（RotationWorker）和压缩线程（CompressionWorker）都基于此类。
+    """
+
+    ERROR_MESSAGE = "后台任务失败"  # 任务失败时输出的提示
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._paths = {}     # 任务中仍在使用的文件 {path: 任务数}
+        self.completed = 0   # 已完成的任务数
+        self.failed = 0      # 失败的任务数
+
+    def submit(self, func, *args, paths=()):
+        """
+        提交一个任务
+
+        Args:
+            func: 在后台线程中执行的函数
+            *args: 函数参数
+            paths: 任务完成前仍在使用的文件路径
+        """
+        paths = [str(path) for path in paths]
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            for path in paths:
+                self._paths[path] = self._paths.get(path, 0) + 1
+            self._queue.put((func, args, paths))
+
+    def pending(self):
+        """尚未完成的任务数"""
+        return self._queue.unfinished_tasks
+
+    def pending_paths(self):
+        """
+        尚未完成的任务中仍在使用的文件
+
+        Returns:
+            set: 文件路径集合
+        """
+        with self._lock:
+            return set(self._paths)
+
+    def wait(self, timeout=None):
+        """
+        等待已提交的任务完成
+
+        Args:
+            timeout: 最长等待时间（秒），为None时一直等待
+
+        Returns:
+            bool: 是否已全部完成
+        """
+        with self._queue.all_tasks_done:
+            return self._queue.all_tasks_done.wait_for(
+                lambda: not self._queue.unfinished_tasks, timeout)
+
+    def _report_error(self, args, error):
+        """
+        输出任务失败的提示
+
+        Args:
+            args: 任务的参数
+            error: 异常
+        """
+        print(f"{self.ERROR_MESSAGE}: {str(error)}")
+
+    def _run(self):
+        """后台线程主循环"""
+        while True:
+            func, args, paths = self._queue.get()
+            try:
+                func(*args)
+                self.completed += 1
+            except Exception as e:
+                self.failed += 1
+                self._report_error(args, e)
+            finally:
+                with self._lock:
+                    for path in paths:
+                        self._paths[path] -= 1
+                        if not self._paths[path]:
+                            del self._paths[path]
+                self._queue.task_done()
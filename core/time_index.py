@@ -0,0 +1,227 @@
+import bisect
+import os
+import struct
+from pathlib import Path
+from .log_compression import (COMPRESS_NONE, COMPRESSION_SUFFIXES, COPY_CHUNK_SIZE, detect_compression, open_log,
+                              strip_compression_suffix)
+
+
+# 稀疏时间索引文件 (.tix) 格式：
+# 文件头为 魔数、被索引文件的类型（文本/记录日志），
+# 之后每隔一定字节数或时间一条记录：系统时间(ns)、在被索引文件中的偏移（解压后）、行号（记录日志为记录序号）
+# 偏移总是位于行首（记录日志为记录开头），从该位置开始读取即可得到完整的行
+TIME_INDEX_MAGIC = b'SRTIX001'
+TIME_INDEX_HEADER = struct.Struct('<8sB7x')
+TIME_INDEX_ENTRY = struct.Struct('<qQQ')
+TIME_INDEX_SUFFIX = '.tix'
+
+# 被索引文件的类型
+INDEXED_TEXT = 0    # 文本记录 (.txt)
+INDEXED_RECORD = 1  # 记录日志 (.rec)
+INDEXED_SUFFIXES = {INDEXED_TEXT: '.txt', INDEXED_RECORD: '.rec'}
+
+
+def encode_time_index_header(kind):
+    """
+    生成时间索引文件头
+
+    Args:
+        kind: 被索引文件的类型
+
+    Returns:
+        bytes: 文件头
+    """
+    return TIME_INDEX_HEADER.pack(TIME_INDEX_MAGIC, kind)
+
+
+def encode_time_index_entry(timestamp_ns, offset, line):
+    """
+    生成一条时间索引记录
+
+    Args:
+        timestamp_ns: 系统时间(ns)
+        offset: 行首在被索引文件中的偏移
+        line: 行号（从0开始）
+
+    Returns:
+        bytes: 索引记录
+    """
+    return TIME_INDEX_ENTRY.pack(timestamp_ns, offset, line)
+
+
+def load_time_index(index_path):
+    """
+    读取时间索引文件（压缩的文件自动解压）
+
+    Args:
+        index_path: 索引文件路径
+
+    Returns:
+        tuple: (被索引文件的类型, [(系统时间ns, 偏移, 行号), ...])
+
+    Raises:
+        ValueError: 文件格式无效
+    """
+    with open_log(index_path) as f:
+        data = f.read()
+    if len(data) < TIME_INDEX_HEADER.size:
+        raise ValueError(f"时间索引文件不完整: {index_path}")
+    magic, kind = TIME_INDEX_HEADER.unpack_from(data)
+    if magic != TIME_INDEX_MAGIC:
+        raise ValueError(f"无效的时间索引文件: {index_path}")
+    # 忽略异常结束时末尾不完整的记录
+    body = memoryview(data)[TIME_INDEX_HEADER.size:]
+    body = body[:len(body) - len(body) % TIME_INDEX_ENTRY.size]
+    return kind, list(TIME_INDEX_ENTRY.iter_unpack(body))
+
+
+def find_time_entry(entries, timestamp_ns):
+    """
+    二分查找不晚于指定时间的最后一条索引记录
+
+    Args:
+        entries: load_time_index()返回的索引记录
+        timestamp_ns: 系统时间(ns)
+
+    Returns:
+        tuple: (系统时间ns, 偏移, 行号)，指定时间早于所有记录时返回第一条，没有记录时返回None
+    """
+    if not entries:
+        return None
+    i = bisect.bisect_right(entries, (timestamp_ns, float('inf'), float('inf')))
+    return entries[max(0, i - 1)]
+
+
+def open_log_at(path, offset):
+    """
+    打开日志文件并定位到指定偏移（压缩文件按解压后的偏移定位）
+
+    Args:
+        path: 日志文件路径
+        offset: 解压后的偏移
+
+    Returns:
+        二进制读文件对象
+    """
+    f = open_log(path)
+    try:
+        if detect_compression(path) == COMPRESS_NONE:
+            f.seek(offset)
+        else:
+            # 压缩流不能随机访问，解压并跳过前面的数据
+            remaining = offset
+            while remaining > 0:
+                skipped = len(f.read(min(remaining, COPY_CHUNK_SIZE)))
+                if not skipped:
+                    break
+                remaining -= skipped
+    except Exception:
+        f.close()
+        raise
+    return f
+
+
+class SessionTimeIndex:
+    """跨文件的时间索引
+
+    把一个串口按大小或时间切换出的多个文件的稀疏时间索引按时间顺序连接起来，
+    先二分查找时间所在的文件，再在该文件的索引中二分查找位置。
+    """
+
+    def __init__(self, index_paths):
+        """
+        Args:
+            index_paths: 时间索引文件路径列表（顺序不限）
+        """
+        self.files = []  # [(第一条记录时间ns, 被索引文件路径, 索引记录), ...]，按时间排序
+        for index_path in index_paths:
+            try:
+                kind, entries = load_time_index(index_path)
+            except (OSError, ValueError) as e:
+                print(f"读取时间索引失败: {index_path}: {str(e)}")
+                continue
+            log_path = self._indexed_path(index_path, kind)
+            if entries and log_path is not None:
+                self.files.append((entries[0][0], log_path, entries))
+        self.files.sort(key=lambda item: item[0])
+        self._starts = [item[0] for item in self.files]
+
+    @classmethod
+    def for_port(cls, base_dir, port_name):
+        """
+        收集日志目录中某个串口的所有时间索引
+
+        Args:
+            base_dir: 日志目录
+            port_name: 串口名称
+
+        Returns:
+            SessionTimeIndex: 跨文件的时间索引
+        """
+        prefix = f"{port_name}_"
+        base_dir = Path(base_dir)
+        paths = []
+        if base_dir.is_dir():
+            for entry in os.scandir(base_dir):
+                if (entry.is_file() and entry.name.startswith(prefix) and
+                        strip_compression_suffix(entry.name).endswith(TIME_INDEX_SUFFIX)):
+                    paths.append(entry.path)
+        return cls(paths)
+
+    @staticmethod
+    def _indexed_path(index_path, kind):
+        """时间索引对应的日志文件（可能已被压缩），不存在时返回None"""
+        base = strip_compression_suffix(index_path)[:-len(TIME_INDEX_SUFFIX)]
+        suffix = INDEXED_SUFFIXES.get(kind)
+        if suffix is None:
+            return None
+        for candidate in [base + suffix] + [base + suffix + ext for ext in COMPRESSION_SUFFIXES.values()]:
+            if os.path.exists(candidate):
+                return candidate
+        return None
+
+    def locate(self, timestamp_ns):
+        """
+        查找指定时间的位置
+
+        Args:
+            timestamp_ns: 系统时间(ns)
+
+        Returns:
+            tuple: (日志文件路径, 偏移, 行号)，该位置不晚于指定时间，
+                   从这里向后读取即可找到指定时间的数据；没有索引时返回None
+        """
+        if not self.files:
+            return None
+        i = max(0, bisect.bisect_right(self._starts, timestamp_ns) - 1)
+        _, log_path, entries = self.files[i]
+        _, offset, line = find_time_entry(entries, timestamp_ns)
+        return log_path, offset, line
+
+    def locate_range(self, start_ns, end_ns):
+        """
+        查找时间范围覆盖的文件片段
+
+        Args:
+            start_ns: 开始时间(ns)
+            end_ns: 结束时间(ns)
+
+        Returns:
+            list: [(日志文件路径, 开始偏移, 结束偏移), ...]，结束偏移为None表示到文件末尾；
+                  开始偏移不晚于开始时间，结束偏移不早于结束时间
+        """
+        if not self.files or end_ns < start_ns:
+            return []
+        first = max(0, bisect.bisect_right(self._starts, start_ns) - 1)
+        last = max(0, bisect.bisect_right(self._starts, end_ns) - 1)
+        ranges = []
+        for i in range(first, last + 1):
+            _, log_path, entries = self.files[i]
+            start = find_time_entry(entries, start_ns)[1] if i == first else 0
+            end = None
+            if i == last:
+                j = bisect.bisect_right(entries, (end_ns, float('inf'), float('inf')))
+                if j < len(entries):
+                    end = entries[j][1]
+            ranges.append((log_path, start, end))
+        return ranges
@@ -64,6 +64,7 @@ class SerialCommunicationApp:
         self.serial_manager.error_occurred.connect(self.show_error)
         self.serial_manager.port_list_updated.connect(self.main_window.update_port_list)
         self.serial_manager.statistics_updated.connect(self.handle_statistics_updated)
+        self.serial_manager.statistics_snapshot.connect(self.handle_statistics_snapshot)
         
         # 连接设置页面的信号
         settings_page = self.main_window.right_menu.pages['settings']
@@ -138,6 +139,11 @@ class SerialCommunicationApp:
         # 这里可以添加统计信息的处理逻辑
         pass
     
+    def handle_statistics_snapshot(self, snapshot):
+        """处理统计快照（显示各串口的丢弃计数）"""
+        config_page = self.main_window.right_menu.pages['config']
+        config_page.update_statistics_snapshot(snapshot)
+    
     def handle_disconnect(self):
         """处理断开连接"""
         # 断开所有串口连接
@@ -215,6 +221,16 @@ class SerialCommunicationApp:
                 config_page = self.main_window.right_menu.pages['config']
                 config_page.update_received_windows_interval(settings['update_interval'])
                 print(f"已更新数据显示间隔: {settings['update_interval']}")
+            
+            # 处理接收窗口保留行数设置
+            if 'scrollback_lines' in settings:
+                config_page = self.main_window.right_menu.pages['config']
+                config_page.update_received_windows_scrollback(settings['scrollback_lines'])
+            
+            # 处理接收窗口分行方式设置
+            if 'line_delimiter' in settings:
+                config_page = self.main_window.right_menu.pages['config']
+                config_page.update_received_windows_delimiter(settings['line_delimiter'])
                 
         except Exception as e:
             print(f"处理设置改变失败: {str(e)}")
@@ -248,7 +264,7 @@ def main():
         
         # 清理资源
         try:
-            app.serial_manager.disconnect_all()
+            app.serial_manager.shutdown()
         except Exception as e:
             print(f"清理串口资源时发生错误: {str(e)}")
         
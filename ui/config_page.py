@@ -16,10 +16,17 @@ class SerialConnectionDialog(QDialog):
     
     connection_requested = pyqtSignal(dict)  # 连接请求信号
     
+    # 溢出策略选项 (显示文本, 策略)
+    OVERFLOW_POLICY_OPTIONS = [
+        ("丢弃最旧数据", 'drop_oldest'),
+        ("丢弃最新数据", 'drop_newest'),
+        ("阻塞读取", 'block')
+    ]
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("连接新串口")
-        self.setFixedSize(600, 300)
+        self.setFixedSize(600, 360)
         self.setModal(True)
         self.init_ui()
         self.refresh_ports()
@@ -125,6 +132,24 @@ class SerialConnectionDialog(QDialog):
         baud_layout.addStretch()
         layout.addLayout(baud_layout)
         
+        # 溢出策略选择（接收数据处理不过来时的处理方式）
+        policy_layout = QHBoxLayout()
+        policy_label = QLabel("溢出策略:")
+        policy_label.setStyleSheet(port_label.styleSheet())
+        policy_layout.addWidget(policy_label)
+        
+        self.policy_combo = QComboBox()
+        for text, policy in self.OVERFLOW_POLICY_OPTIONS:
+            self.policy_combo.addItem(text, policy)
+        self.policy_combo.setToolTip("界面或磁盘处理不过来、缓冲区写满时：\n"
+                                     "丢弃最旧数据 - 覆盖尚未处理的最旧数据\n"
+                                     "丢弃最新数据 - 丢弃新收到的数据\n"
+                                     "阻塞读取 - 暂停读取串口，直到缓冲区有空间")
+        self.policy_combo.setStyleSheet(self.baud_combo.styleSheet())
+        policy_layout.addWidget(self.policy_combo)
+        policy_layout.addStretch()
+        layout.addLayout(policy_layout)
+        
         # 添加弹性空间
         layout.addStretch()
         
@@ -250,6 +275,7 @@ class SerialConnectionDialog(QDialog):
         config = {
             'port': port,
             'baudrate': int(self.baud_combo.currentText()),
+            'overflow_policy': self.policy_combo.currentData(),
             'auto_save': True  # 默认启用自动保存
         }
         self.connection_requested.emit(config)
@@ -273,6 +299,8 @@ class ConfigPage(QWidget):
         super().__init__()
         self.serial_widgets = {}  # 存储串口信息组件
         self.received_windows = {}  # 存储接收信息窗口
+        self.scrollback_lines = None  # 接收窗口保留的行数，None表示使用窗口默认值
+        self.line_delimiter = None    # 接收窗口的行分隔符，None表示使用窗口默认值
         self.send_windows = {}  # 存储发送数据窗口
         self.init_ui()
         
@@ -406,6 +434,10 @@ class ConfigPage(QWidget):
         if port_name not in self.received_windows:
             # 创建新的接收信息窗口
             window = ReceivedDataWindow(port_name, self)
+            if self.scrollback_lines is not None:
+                window.set_scrollback(self.scrollback_lines)
+            if self.line_delimiter is not None:
+                window.set_line_delimiter(self.line_delimiter)
             self.received_windows[port_name] = window
         
         window = self.received_windows[port_name]
@@ -482,6 +514,26 @@ class ConfigPage(QWidget):
             if hasattr(window, 'set_update_interval'):
                 window.set_update_interval(interval_text)
     
+    def update_received_windows_scrollback(self, max_lines):
+        """更新所有接收窗口保留的行数
+        
+        Args:
+            max_lines (int): 最多保留的行数
+        """
+        self.scrollback_lines = max_lines
+        for window in self.received_windows.values():
+            window.set_scrollback(max_lines)
+    
+    def update_received_windows_delimiter(self, delimiter):
+        """更新所有接收窗口的分行方式
+        
+        Args:
+            delimiter (str): 行分隔符 'lf'、'crlf' 或 'cr'
+        """
+        self.line_delimiter = delimiter
+        for window in self.received_windows.values():
+            window.set_line_delimiter(delimiter)
+    
     def remove_serial_widget(self, port_name):
         """移除串口组件"""
         try:
@@ -543,6 +595,18 @@ class ConfigPage(QWidget):
         if port_name and port_name in self.serial_widgets:
             self.serial_widgets[port_name].update_status(connected)
     
+    def update_statistics_snapshot(self, snapshot):
+        """
+        根据统计快照更新各串口组件的丢弃计数
+        
+        Args:
+            snapshot (dict): {port_name: {...统计信息}}
+        """
+        for port_name, stats in snapshot.items():
+            if port_name in self.serial_widgets and stats.get('changed', True):
+                self.serial_widgets[port_name].update_drop_statistics(
+                    stats.get('dropped_bytes', 0), stats.get('dropped_frames', 0))
+    
     def update_port_list(self, ports):
         """更新串口列表 - 保留接口兼容性"""
         pass 
\ No newline at end of file
@@ -1,18 +1,127 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QTextEdit, QPushButton, QGroupBox
-from PyQt6.QtCore import pyqtSignal, Qt
+from pathlib import Path
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QListView, QPushButton,
+                             QGroupBox, QListWidget, QListWidgetItem, QProgressBar)
+from PyQt6.QtCore import pyqtSignal, Qt, QAbstractListModel, QModelIndex, QTimer
+from PyQt6.QtGui import QFont
+from core.log_compression import COMPRESSION_SUFFIXES, strip_compression_suffix
+from core.mapped_log import MappedLog, LogIndexer
+
+
+class LogRowModel(QAbstractListModel):
+    """日志行模型：只在视图请求时读取可见的行
+
+    数据来自MappedLog（内存映射，后台线程建立行索引）或一组文本行；
+    建立索引期间由定时器轮询已索引的行数，新行以beginInsertRows()追加，不重置视图。
+    """
+    
+    POLL_INTERVAL_MS = 100  # 轮询索引进度的间隔
+    
+    progress_changed = pyqtSignal(float, int)  # 索引进度 (0.0 ~ 1.0), 已索引行数
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.log = None       # 当前的MappedLog
+        self.indexer = None   # 当前的LogIndexer
+        self.lines = []       # 未打开文件时显示的文本行
+        self._rows = 0        # 视图已知的行数
+        self._timer = QTimer(self)
+        self._timer.setInterval(self.POLL_INTERVAL_MS)
+        self._timer.timeout.connect(self._poll)
+    
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._rows
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        row = index.row()
+        if self.log is not None:
+            return self.log.row_text(row)
+        if row < len(self.lines):
+            return self.lines[row]
+        return None
+    
+    def open_log(self, path):
+        """
+        打开日志文件，在后台建立行索引
+        
+        Args:
+            path: 日志文件路径
+            
+        Raises:
+            ValueError: 不支持的文件类型
+        """
+        log = MappedLog(path)
+        self.close_log()
+        self.log = log
+        self.indexer = LogIndexer(log)
+        self.indexer.start()
+        self._timer.start()
+    
+    def set_lines(self, lines):
+        """
+        显示一组文本行（关闭当前文件）
+        
+        Args:
+            lines: 文本行列表
+        """
+        self.close_log()
+        self.beginResetModel()
+        self.lines = list(lines)
+        self._rows = len(self.lines)
+        self.endResetModel()
+    
+    def close_log(self):
+        """停止索引线程并关闭当前文件（不等待索引线程，文件由索引线程退出时关闭）"""
+        self._timer.stop()
+        self.beginResetModel()
+        if self.indexer is not None:
+            self.indexer.stop()
+            self.indexer = None
+        elif self.log is not None:
+            self.log.close()
+        self.log = None
+        self.lines = []
+        self._rows = 0
+        self.endResetModel()
+    
+    def _poll(self):
+        """追加新索引的行"""
+        if self.log is None:
+            self._timer.stop()
+            return
+        rows = self.log.row_count()
+        if rows > self._rows:
+            self.beginInsertRows(QModelIndex(), self._rows, rows - 1)
+            self._rows = rows
+            self.endInsertRows()
+        finished = self.log.finished or not self.indexer.running
+        self.progress_changed.emit(1.0 if finished else self.log.progress, rows)
+        if finished:
+            self._timer.stop()
 
 
 class HistoryPage(QWidget):
-    """历史记录页面"""
+    """历史记录页面：浏览serial_logs目录中保存的日志文件（压缩文件自动解压）
+
+    日志文件以内存映射方式打开，行索引在后台线程中建立，列表只渲染可见的行，
+    打开和滚动大文件的开销与文件大小无关。
+    """
     
     # 定义信号
     clear_history_signal = pyqtSignal()  # 清空历史记录信号
     save_history_signal = pyqtSignal()   # 保存历史记录信号
     
-    def __init__(self):
+    LOG_SUFFIXES = ('.txt', '.bin', '.rec')  # 可查看的日志文件类型
+    
+    def __init__(self, log_dir="serial_logs"):
         super().__init__()
+        self.log_dir = Path(log_dir)
+        self.current_path = None  # 正在查看的日志文件
         self.init_ui()
-        
+    
     def init_ui(self):
         """初始化UI界面"""
         layout = QVBoxLayout(self)
@@ -23,26 +132,73 @@ class HistoryPage(QWidget):
         title.setStyleSheet("font-size: 24px; font-weight: bold; margin-bottom: 20px;")
         layout.addWidget(title)
         
-        # 显示简化内容
-        content_label = QLabel("后续功能，可继续模块化开发")
-        content_label.setStyleSheet("""
-            QLabel {
-                font-size: 18px;
+        # 日志文件列表
+        files_group = QGroupBox("日志文件")
+        files_layout = QVBoxLayout(files_group)
+        
+        self.file_list = QListWidget()
+        self.file_list.setStyleSheet("""
+            QListWidget {
+                border: 1px solid #d0d0d0;
+                border-radius: 6px;
+                background-color: white;
+                font-size: 12px;
                 color: #333333;
-                padding: 50px 0;
-                background-color: transparent;
-                border: none;
-                text-align: center;
+            }
+            QListWidget::item:selected {
+                background-color: #e3f2fd;
+                color: #0d6efd;
             }
         """)
-        content_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        layout.addWidget(content_label)
+        self.file_list.itemDoubleClicked.connect(self.on_file_activated)
+        files_layout.addWidget(self.file_list)
         
-        # 添加弹性空间
-        layout.addStretch()
+        button_layout = QHBoxLayout()
+        self.refresh_btn = QPushButton("刷新")
+        self.refresh_btn.clicked.connect(self.refresh_file_list)
+        button_layout.addWidget(self.refresh_btn)
+        self.open_btn = QPushButton("查看")
+        self.open_btn.clicked.connect(lambda: self.on_file_activated(self.file_list.currentItem()))
+        button_layout.addWidget(self.open_btn)
+        button_layout.addStretch()
+        files_layout.addLayout(button_layout)
+        layout.addWidget(files_group)
+        
+        # 文件内容预览
+        self.file_info_label = QLabel("双击文件查看内容")
+        self.file_info_label.setStyleSheet("font-size: 12px; color: #666666;")
+        self.file_info_label.setWordWrap(True)
+        layout.addWidget(self.file_info_label)
+        
+        self.index_progress = QProgressBar()
+        self.index_progress.setRange(0, 1000)
+        self.index_progress.setTextVisible(False)
+        self.index_progress.setFixedHeight(4)
+        self.index_progress.hide()
+        layout.addWidget(self.index_progress)
+        
+        self.row_model = LogRowModel(self)
+        self.row_model.progress_changed.connect(self.on_index_progress)
+        self.history_view = QListView()
+        self.history_view.setModel(self.row_model)
+        # 所有行等高，视图不需要逐行测量，滚动时只绘制可见的行
+        self.history_view.setUniformItemSizes(True)
+        self.history_view.setFont(QFont("Consolas", 10))
+        self.history_view.setStyleSheet("""
+            QListView {
+                border: 1px solid #d0d0d0;
+                border-radius: 6px;
+                background-color: white;
+                font-family: Consolas, monospace;
+                font-size: 12px;
+            }
+        """)
+        layout.addWidget(self.history_view, 1)
         
         # 创建简化的控件（保持信号连接）
         self.create_placeholder_controls()
+        
+        self.refresh_file_list()
     
     def create_placeholder_controls(self):
         """创建占位控件以保持信号连接"""
@@ -52,16 +208,94 @@ class HistoryPage(QWidget):
         self.save_history_btn = QPushButton("保存历史记录")
         self.save_history_btn.hide()
         
-        # 历史记录文本区域（隐藏）
-        self.history_text = QTextEdit()
-        self.history_text.hide()
-        
         # 统计信息标签（隐藏）
         self.history_count_label = QLabel("记录条数: 0")
         self.history_count_label.hide()
         self.history_size_label = QLabel("文件大小: 0 KB")
         self.history_size_label.hide()
     
+    def set_log_dir(self, log_dir):
+        """
+        设置日志目录并刷新文件列表
+        
+        Args:
+            log_dir: 日志目录
+        """
+        self.log_dir = Path(log_dir)
+        self.refresh_file_list()
+    
+    def refresh_file_list(self):
+        """刷新日志文件列表（按修改时间从新到旧）"""
+        self.file_list.clear()
+        if not self.log_dir.is_dir():
+            return
+        files = []
+        for path in self.log_dir.iterdir():
+            if path.is_file() and strip_compression_suffix(path).endswith(self.LOG_SUFFIXES):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        for mtime, size, path in sorted(files, reverse=True):
+            item = QListWidgetItem(f"{path.name}  ({size / 1024:.1f} KB)")
+            item.setData(Qt.ItemDataRole.UserRole, str(path))
+            self.file_list.addItem(item)
+    
+    def on_file_activated(self, item):
+        """打开选中的日志文件"""
+        if item is None:
+            return
+        self.load_log_file(item.data(Qt.ItemDataRole.UserRole))
+    
+    def load_log_file(self, path):
+        """
+        打开日志文件并显示（压缩文件自动解压，行索引在后台建立）
+        
+        Args:
+            path: 日志文件路径
+        
+        Returns:
+            bool: 是否打开成功
+        """
+        try:
+            self.row_model.open_log(path)
+        except Exception as e:
+            self.file_info_label.setText(f"读取文件失败: {str(e)}")
+            return False
+        self.current_path = Path(path)
+        self.index_progress.setValue(0)
+        self.index_progress.show()
+        self._update_file_info("正在建立索引…")
+        return True
+    
+    def on_index_progress(self, progress, rows):
+        """
+        更新索引进度
+        
+        Args:
+            progress: 索引进度 (0.0 ~ 1.0)
+            rows: 已索引行数
+        """
+        self.index_progress.setValue(int(progress * 1000))
+        indexer = self.row_model.indexer
+        if indexer is not None and indexer.error:
+            self.index_progress.hide()
+            self.file_info_label.setText(f"读取文件失败: {indexer.error}")
+            return
+        if progress >= 1.0:
+            self.index_progress.hide()
+            self._update_file_info(f"共 {rows} 行")
+        else:
+            self._update_file_info(f"正在建立索引… {progress * 100:.0f}%，已索引 {rows} 行")
+    
+    def _update_file_info(self, status):
+        """显示当前文件名和状态"""
+        info = self.current_path.name if self.current_path is not None else ""
+        if str(info).endswith(tuple(COMPRESSION_SUFFIXES.values())):
+            info += "（已压缩）"
+        self.file_info_label.setText(f"{info}  {status}")
+    
     def append_history(self, text):
         """添加历史记录（占位方法）"""
         pass
@@ -71,13 +305,16 @@ class HistoryPage(QWidget):
         pass
     
     def set_history_content(self, content):
-        """设置历史记录内容（占位方法）"""
-        pass
+        """设置历史记录内容"""
+        self.current_path = None
+        self.index_progress.hide()
+        self.row_model.set_lines(content.split('\n') if content else [])
     
     def get_history_content(self):
-        """获取历史记录内容（占位方法）"""
-        return ""
+        """获取历史记录内容"""
+        model = self.row_model
+        return '\n'.join(model.data(model.index(row)) or '' for row in range(model.rowCount()))
     
     def update_statistics(self, count, size_kb):
         """更新统计信息（占位方法）"""
-        pass 
\ No newline at end of file
+        pass
@@ -1,12 +1,96 @@
+import time
+from collections import deque
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
-                             QTextEdit, QPushButton, QLabel, QScrollArea, QFrame)
-from PyQt6.QtCore import Qt, pyqtSignal, QTimer
-from PyQt6.QtGui import QFont, QTextCursor
+                             QListView, QPushButton, QLabel, QScrollArea, QFrame,
+                             QFileDialog, QMessageBox, QComboBox)
+from PyQt6.QtCore import Qt, pyqtSignal, QTimer, QAbstractListModel, QModelIndex
+from PyQt6.QtGui import QFont
 from ui.settings_utils import parse_update_interval
+from core.ring_buffer import ByteRingBuffer
+from core.line_ring import LineRing
+from core.hex_dump import HexDump, HEX_ROW_WIDTHS
+
+
+class ReceiveLogModel(QAbstractListModel):
+    """接收数据行模型：只在视图请求时格式化可见的行
+
+    数据来自LineRing（文本行）或HexDump（十六进制行），refresh()把上次刷新以来
+    从头部删除的行、最后一行的变化和新增的行分别通知视图，不重置视图；
+    set_source()切换数据源时重置视图。
+    """
+    
+    def __init__(self, source, parent=None):
+        """
+        Args:
+            source: LineRing或HexDump
+            parent: 父对象
+        """
+        super().__init__(parent)
+        self.source = source
+        self._first = source.first_line  # 视图第0行对应的行号
+        self._rows = 0                   # 视图已知的行数
+    
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self._rows
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        return self.source.line_text(self._first + index.row())
+    
+    def set_source(self, source):
+        """
+        切换数据源（行号改变，重置视图）
+        
+        Args:
+            source: LineRing或HexDump
+        """
+        self.beginResetModel()
+        self.source = source
+        self._first = source.first_line
+        self._rows = len(source)
+        self.endResetModel()
+    
+    def refresh(self):
+        """
+        把数据源的变化通知视图
+        
+        Returns:
+            bool: 是否有变化
+        """
+        source = self.source
+        changed = False
+        removed = min(source.first_line - self._first, self._rows)
+        if removed > 0:
+            self.beginRemoveRows(QModelIndex(), 0, removed - 1)
+            self._rows -= removed
+            self._first = source.first_line
+            self.endRemoveRows()
+            changed = True
+        self._first = source.first_line
+        if self._rows:
+            # 最后一行可能还在接收中
+            last = self.index(self._rows - 1)
+            self.dataChanged.emit(last, last)
+        rows = len(source)
+        if rows > self._rows:
+            self.beginInsertRows(QModelIndex(), self._rows, rows - 1)
+            self._rows = rows
+            self.endInsertRows()
+            changed = True
+        return changed
 
 
 class ReceivedDataWindow(QMainWindow):
-    """接收信息显示窗口"""
+    """接收信息显示窗口
+
+    接收的数据按行存放在固定容量的LineRing中（原始字节加行偏移），
+    列表视图只解码和绘制可见的行，显示开销与保留的行数无关。
+    十六进制模式下由HexDump把同一份原始字节按每行16/32字节显示为偏移、到达时间、十六进制和ASCII，
+    两种模式切换时不复制数据。
+    """
     
     def __init__(self, port_name, parent=None):
         super().__init__(parent)
@@ -97,6 +181,27 @@ class ReceivedDataWindow(QMainWindow):
         self.clear_btn.clicked.connect(self.clear_data)
         title_layout.addWidget(self.clear_btn)
         
+        self.export_btn = QPushButton("导出")
+        self.export_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #007bff;
+                color: white;
+                border: none;
+                border-radius: 6px;
+                padding: 8px 16px;
+                font-size: 12px;
+                font-weight: bold;
+            }
+            QPushButton:hover {
+                background-color: #0069d9;
+            }
+            QPushButton:pressed {
+                background-color: #0062cc;
+            }
+        """)
+        self.export_btn.clicked.connect(self.export_data)
+        title_layout.addWidget(self.export_btn)
+        
         layout.addLayout(title_layout)
         
         # 接收数据显示区域
@@ -112,11 +217,12 @@ class ReceivedDataWindow(QMainWindow):
         data_layout = QVBoxLayout(data_frame)
         data_layout.setContentsMargins(15, 15, 15, 15)
         
-        # 数据显示文本框
-        self.text_display = QTextEdit()
-        self.text_display.setReadOnly(True)
-        self.text_display.setStyleSheet("""
-            QTextEdit {
+        # 数据显示列表：所有行等高，视图不需要逐行测量，滚动时只绘制可见的行
+        self.data_view = QListView()
+        self.data_view.setUniformItemSizes(True)
+        self.data_view.setFont(QFont("Consolas", 10))
+        self.data_view.setStyleSheet("""
+            QListView {
                 background-color: #ffffff;
                 border: 1px solid #d0d0d0;
                 border-radius: 4px;
@@ -124,13 +230,12 @@ class ReceivedDataWindow(QMainWindow):
                 font-family: 'Consolas', 'Monaco', 'Courier New', monospace;
                 font-size: 12px;
                 color: #333333;
-                line-height: 1.4;
             }
-            QTextEdit:focus {
+            QListView:focus {
                 border: 2px solid #2196F3;
             }
         """)
-        data_layout.addWidget(self.text_display)
+        data_layout.addWidget(self.data_view)
         
         layout.addWidget(data_frame)
         
@@ -149,7 +254,7 @@ class ReceivedDataWindow(QMainWindow):
         stats_layout.addWidget(self.receive_count_label)
         
         # 添加缓冲区状态显示
-        self.buffer_status_label = QLabel("缓冲区: 0/10000 行")
+        self.buffer_status_label = QLabel("缓冲区: 0/100000 行 (0 KB)")
         self.buffer_status_label.setStyleSheet("""
             QLabel {
                 font-size: 12px;
@@ -181,24 +286,66 @@ class ReceivedDataWindow(QMainWindow):
         self.auto_scroll_btn.clicked.connect(self.toggle_auto_scroll)
         stats_layout.addWidget(self.auto_scroll_btn)
         
+        # 十六进制显示按钮和每行字节数
+        self.hex_width_combo = QComboBox()
+        for width in HEX_ROW_WIDTHS:
+            self.hex_width_combo.addItem(f"{width}字节/行", width)
+        self.hex_width_combo.setStyleSheet("""
+            QComboBox {
+                font-size: 11px;
+                padding: 2px 6px;
+            }
+        """)
+        self.hex_width_combo.setVisible(False)
+        self.hex_width_combo.currentIndexChanged.connect(self.on_hex_width_changed)
+        stats_layout.addWidget(self.hex_width_combo)
+        
+        self.hex_btn = QPushButton("十六进制")
+        self.hex_btn.setCheckable(True)
+        self.hex_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #6c757d;
+                color: white;
+                border: none;
+                border-radius: 4px;
+                padding: 4px 8px;
+                font-size: 11px;
+                font-weight: bold;
+            }
+            QPushButton:hover {
+                background-color: #5a6268;
+            }
+            QPushButton:checked {
+                background-color: #17a2b8;
+            }
+        """)
+        self.hex_btn.toggled.connect(self.set_hex_mode)
+        stats_layout.addWidget(self.hex_btn)
+        
         layout.addLayout(stats_layout)
         
         # 初始化数据
         self.receive_count = 0
         self.auto_scroll = True
-        self.data_buffer = ""  # 数据缓冲区，存储未显示的数据（字符串）
         self.is_paused = False  # 暂停状态
-        self.pause_buffer = []  # 暂停时的数据缓冲区
         self.is_disconnected = False  # 断开连接状态
         
-        # 循环缓冲区设置
-        self.max_display_lines = 10000  # 最大显示行数
-        self.max_display_chars = 1000000  # 最大显示字符数
-        self.display_lines = []  # 存储显示的行
-        self.current_chars = 0  # 当前字符数
+        # 循环缓冲区设置：显示的行只保存原始字节和行偏移，显示时才解码
+        self.max_display_lines = 100000  # 最大显示行数
+        self.max_display_bytes = 8 * 1024 * 1024  # 显示数据最大字节数
+        self.lines = LineRing(self.max_display_bytes, self.max_display_lines)
+        # 十六进制显示行：与文本行共用LineRing中的原始字节
+        self.hex_rows = HexDump(self.lines)
+        self.hex_mode = False
+        # 尚未显示的数据块的到达时间 (接收环形缓冲区中的偏移, 时间戳)，暂停期间的数据也保留到达时间
+        self.arrival_marks = deque(maxlen=HexDump.MAX_MARKS)
+        self.model = ReceiveLogModel(self.lines, self)
+        self.data_view.setModel(self.model)
         
         # 新增：整合main1.py的缓冲区机制
-        self.max_buffer_length = 500000  # 最大缓冲区长度
+        self.max_buffer_length = 512 * 1024  # 最大缓冲区长度（字节）
+        # 接收环形缓冲区：存储尚未显示的原始字节（包括暂停期间的数据），写满后覆盖最旧数据
+        self.receive_ring = ByteRingBuffer(self.max_buffer_length)
         self.max_display_length = 200000  # 最大显示长度
         self.parsed_data_buffer = ""  # 解析数据缓冲区
         
@@ -210,7 +357,11 @@ class ReceivedDataWindow(QMainWindow):
         self._update_buffer_status()
     
     def append_data(self, data):
-        """添加接收数据（优化版本，减少闪烁）"""
+        """添加接收数据（优化版本，减少闪烁）
+        
+        Args:
+            data (bytes): 接收到的原始字节数据
+        """
         if self.is_disconnected:
             # 如果已断开连接，不处理新数据
             return
@@ -220,40 +371,42 @@ class ReceivedDataWindow(QMainWindow):
             # 窗口未打开时，不处理数据
             return
             
+        # 写入接收环形缓冲区，记录到达时间
+        self.arrival_marks.append((self.receive_ring.head, time.time()))
+        self.receive_ring.write(data)
+        self.receive_count += len(data)
+        
         if self.is_paused:
-            # 如果暂停，将数据存储到暂停缓冲区，但不更新显示
-            self.pause_buffer.append(data)
-            self.receive_count += len(data.encode('utf-8'))
+            # 如果暂停，数据保留在环形缓冲区中，但不更新显示
             self.receive_count_label.setText(f"接收字节数: {self.receive_count} (已暂停)")
             return
         
-        # 更新数据缓冲区
-        self.data_buffer += data
-        if len(self.data_buffer) > self.max_buffer_length:
-            self.data_buffer = self.data_buffer[-self.max_buffer_length:]
-        
-        # 将数据按行分割
-        lines = data.split('\n')
-        
-        # 批量添加新行
-        new_lines = []
-        for line in lines:
-            if line:  # 跳过空行
-                new_lines.append(line)
-                self.current_chars += len(line)
+        self.receive_count_label.setText(f"接收字节数: {self.receive_count}")
         
-        # 批量添加到显示行列表
-        if new_lines:
-            self.display_lines.extend(new_lines)
-            
-            # 检查是否需要删除最老的数据
-            self._manage_buffer_size()
-            
+        # 取出未显示的数据加入显示行
+        if self._take_ring_data():
             # 标记有待更新的数据
             self.pending_update = True
+    
+    def _take_ring_data(self):
+        """
+        从接收环形缓冲区取出未显示的数据，加入显示行（不解码）
         
-        self.receive_count += len(data.encode('utf-8'))
-        self.receive_count_label.setText(f"接收字节数: {self.receive_count}")
+        Returns:
+            bool: 是否取出了数据
+        """
+        start, views = self.receive_ring.peek()
+        nbytes = sum(len(view) for view in views)
+        # 把到达时间换算到显示行字节环中的偏移（被覆盖的数据从start开始）
+        base = self.lines.data.head
+        marks = self.arrival_marks
+        while marks and marks[0][0] < start + nbytes:
+            offset, wall_time = marks.popleft()
+            self.hex_rows.mark(base + max(0, offset - start), wall_time)
+        for view in views:
+            self.lines.append(view)
+        self.receive_ring.consume(nbytes)
+        return nbytes > 0
     
     def _perform_update(self):
         """执行定时更新显示"""
@@ -276,139 +429,110 @@ class ReceivedDataWindow(QMainWindow):
                 self._perform_update()
     
     def _update_scroll_position(self):
-        """更新滚动位置（优化版本，避免闪烁）"""
+        """自动滚动开启时滚动到底部"""
         if not self.auto_scroll or self.is_paused:
             return
-            
-        # 记录当前滚动条位置
-        scroll_bar = self.text_display.verticalScrollBar()
-        if scroll_bar is None:
+        self.data_view.scrollToBottom()
+    
+    def set_scrollback(self, max_lines):
+        """设置保留的行数，超出的旧行一次删除
+        
+        Args:
+            max_lines (int): 最多保留的行数
+        """
+        self.max_display_lines = max(1, int(max_lines))
+        self.lines.set_limits(max_lines=self.max_display_lines)
+        self._update_display()
+    
+    def set_line_delimiter(self, delimiter):
+        """设置分行方式（对最后一行和之后收到的数据生效）
+        
+        Args:
+            delimiter (str): 行分隔符 'lf'、'crlf' 或 'cr'
+        """
+        try:
+            self.lines.set_delimiter(delimiter)
+        except ValueError as e:
+            print(f"设置分行方式失败: {str(e)}")
             return
-            
-        self.scroll_position = scroll_bar.value()
-        self.scroll_at_bottom = (self.scroll_position == scroll_bar.maximum())
+        self._update_display()
+    
+    def set_hex_mode(self, enabled):
+        """切换十六进制显示（显示同一份原始字节，不复制数据）
         
-        # 如果自动滚动开启，则滚动到底部
-        if self.auto_scroll:
-            try:
-                scroll_bar.setUpdatesEnabled(False)
-                cursor = self.text_display.textCursor()
-                cursor.movePosition(QTextCursor.MoveOperation.End)
-                self.text_display.setTextCursor(cursor)
-                # 确保滚动条也在底部
-                scroll_bar.setValue(scroll_bar.maximum())
-            except Exception as e:
-                # 如果滚动失败，忽略错误
-                print(f"滚动位置更新失败: {e}")
-                pass
-            finally:
-                scroll_bar.setUpdatesEnabled(True)
+        Args:
+            enabled (bool): 是否按十六进制显示
+        """
+        self.hex_mode = bool(enabled)
+        if self.hex_btn.isChecked() != self.hex_mode:
+            self.hex_btn.setChecked(self.hex_mode)
+        self.hex_width_combo.setVisible(self.hex_mode)
+        self.model.set_source(self.hex_rows if self.hex_mode else self.lines)
+        self._update_scroll_position()
+        self._update_buffer_status()
+    
+    def on_hex_width_changed(self, index):
+        """十六进制每行字节数改变"""
+        width = self.hex_width_combo.itemData(index)
+        if width is None or width == self.hex_rows.width:
+            return
+        self.hex_rows.set_width(width)
+        if self.hex_mode:
+            self.model.set_source(self.hex_rows)
+            self._update_scroll_position()
+    
+    def export_data(self):
+        """把保留的接收数据逐行导出到文件（原始字节，按当前分隔符分行）"""
+        path, _ = QFileDialog.getSaveFileName(self, "导出接收数据", f"{self.port_name}_received.txt",
+                                              "文本文件 (*.txt);;所有文件 (*)")
+        if not path:
+            return
+        try:
+            delimiter = self.lines.indexer.delimiter
+            with open(path, 'wb') as f:
+                for line in self.lines.iter_lines():
+                    f.write(line)
+                    f.write(delimiter)
+        except OSError as e:
+            QMessageBox.warning(self, "导出失败", f"导出接收数据失败: {str(e)}")
     
     def _update_buffer_status(self):
         """更新缓冲区状态显示"""
-        current_lines = len(self.display_lines)
+        current_lines = len(self.lines)
         max_lines = self.max_display_lines
-        self.buffer_status_label.setText(f"缓冲区: {current_lines}/{max_lines} 行")
-    
-    def _manage_buffer_size(self):
-        """管理缓冲区大小，删除最老的数据"""
-        # 检查行数限制
-        removed_count = 0
-        while len(self.display_lines) > self.max_display_lines:
-            removed_line = self.display_lines.pop(0)
-            self.current_chars -= len(removed_line)
-            removed_count += 1
-        
-        # 检查字符数限制
-        while self.current_chars > self.max_display_chars and len(self.display_lines) > 1:
-            removed_line = self.display_lines.pop(0)
-            self.current_chars -= len(removed_line)
-            removed_count += 1
-        
-        # 更新缓冲区状态显示（无论是否删除了数据）
-        self._update_buffer_status()
+        size_kb = self.lines.byte_count() / 1024
+        self.buffer_status_label.setText(f"缓冲区: {current_lines}/{max_lines} 行 ({size_kb:.0f} KB)")
     
     def _update_display(self):
-        """更新显示内容（重新设计，避免闪烁）"""
-        # 检查是否需要更新显示
-        current_content = self.text_display.toPlainText()
-        new_content = '\n'.join(self.display_lines)
-        
-        # 只有当内容真正改变时才更新
-        if current_content != new_content:
-            # 记录当前滚动条位置
-            scroll_bar = self.text_display.verticalScrollBar()
-            at_bottom = scroll_bar.value() == scroll_bar.maximum()
-            current_value = scroll_bar.value()
-            
-            # 使用更稳定的更新方式
-            try:
-                # 暂时禁用滚动条更新和文本显示更新，避免闪烁
-                scroll_bar.setUpdatesEnabled(False)
-                self.text_display.setUpdatesEnabled(False)
-                
-                # 直接设置新内容，避免增量更新
-                self.text_display.setPlainText(new_content)
-                
-                # 恢复滚动条位置
-                if self.auto_scroll and not self.is_paused:
-                    # 如果自动滚动开启，则滚动到底部
-                    scroll_bar.setValue(scroll_bar.maximum())
-                    cursor = self.text_display.textCursor()
-                    cursor.movePosition(QTextCursor.MoveOperation.End)
-                    self.text_display.setTextCursor(cursor)
-                else:
-                    # 如果自动滚动关闭，保持原来的位置
-                    if at_bottom:
-                        scroll_bar.setValue(scroll_bar.maximum())
-                    else:
-                        scroll_bar.setValue(current_value)
-                        
-            finally:
-                # 重新启用滚动条更新和文本显示更新
-                scroll_bar.setUpdatesEnabled(True)
-                self.text_display.setUpdatesEnabled(True)
+        """把新增和删除的行通知列表视图，只重绘可见的行"""
+        if self.model.refresh():
+            self._update_scroll_position()
+        self._update_buffer_status()
     
     def show_buffered_data(self):
         """显示缓冲区中的数据（窗口重新打开时调用）"""
         # 由于窗口关闭时会清空缓冲区，这个方法主要用于窗口重新打开时的初始化
         # 如果有缓冲数据，则显示
-        if self.data_buffer:
-            # 将字符串缓冲区按行分割并添加到显示行列表
-            lines = self.data_buffer.split('\n')
-            new_lines = []
-            for line in lines:
-                if line:  # 跳过空行
-                    new_lines.append(line)
-                    self.current_chars += len(line)
-            
-            # 批量添加到显示行列表
-            if new_lines:
-                self.display_lines.extend(new_lines)
-                
-                # 检查是否需要删除最老的数据
-                self._manage_buffer_size()
-                
+        if len(self.receive_ring):
+            # 将环形缓冲区中的数据加入显示行
+            if self._take_ring_data():
                 # 标记有待更新的数据
                 self.pending_update = True
-            
-            # 清空缓冲区
-            self.data_buffer = ""
         
         # 确保缓冲区状态显示正确
         self._update_buffer_status()
     
     def clear_data(self):
         """清空数据"""
-        self.text_display.clear()
         self.receive_count = 0
         self.receive_count_label.setText("接收字节数: 0")
-        self.data_buffer = ""  # 同时清空缓冲区
-        self.pause_buffer.clear()  # 清空暂停缓冲区
+        self.receive_ring.clear()  # 同时清空接收缓冲区（含暂停期间的数据）
         
         # 清空循环缓冲区
-        self.display_lines.clear()
-        self.current_chars = 0
+        self.lines.clear()
+        self.hex_rows.clear()
+        self.arrival_marks.clear()
+        self.model.refresh()
         
         # 清空解析数据缓冲区
         self.parsed_data_buffer = ""
@@ -438,16 +562,7 @@ class ReceivedDataWindow(QMainWindow):
                 }
             """)
             # 如果开启自动滚动，立即滚动到底部
-            if not self.is_paused:
-                try:
-                    scroll_bar = self.text_display.verticalScrollBar()
-                    scroll_bar.setUpdatesEnabled(False)
-                    scroll_bar.setValue(scroll_bar.maximum())
-                    cursor = self.text_display.textCursor()
-                    cursor.movePosition(QTextCursor.MoveOperation.End)
-                    self.text_display.setTextCursor(cursor)
-                finally:
-                    scroll_bar.setUpdatesEnabled(True)
+            self._update_scroll_position()
         else:
             # 关闭状态
             self.auto_scroll_btn.setText("自动滚动: 关闭")
@@ -465,14 +580,6 @@ class ReceivedDataWindow(QMainWindow):
                     background-color: #5a6268;
                 }
             """)
-            # 如果关闭自动滚动，保持当前滚动位置
-            try:
-                scroll_bar = self.text_display.verticalScrollBar()
-                current_value = scroll_bar.value()
-                scroll_bar.setUpdatesEnabled(False)
-                scroll_bar.setValue(current_value)
-            finally:
-                scroll_bar.setUpdatesEnabled(True)
     
     def toggle_pause(self):
         """切换暂停状态（优化版本，避免闪烁）"""
@@ -522,28 +629,10 @@ class ReceivedDataWindow(QMainWindow):
             self.receive_count_label.setText(f"接收字节数: {self.receive_count}")
             
             # 恢复时显示暂停期间的数据
-            if self.pause_buffer:
+            if len(self.receive_ring):
                 # 批量处理暂停期间的数据
-                all_new_lines = []
-                for data in self.pause_buffer:
-                    lines = data.split('\n')
-                    for line in lines:
-                        if line:  # 跳过空行
-                            all_new_lines.append(line)
-                            self.current_chars += len(line)
-                
-                # 批量添加到显示行列表
-                if all_new_lines:
-                    self.display_lines.extend(all_new_lines)
-                    
-                    # 检查是否需要删除最老的数据
-                    self._manage_buffer_size()
-                    
-                    # 更新显示（使用稳定的更新方式，避免闪烁）
+                if self._take_ring_data():
                     self._update_display()
-                
-                # 清空暂停缓冲区
-                self.pause_buffer.clear()
             
             # 恢复时立即执行一次更新
             if self.pending_update:
@@ -551,11 +640,15 @@ class ReceivedDataWindow(QMainWindow):
     
     def get_data(self):
         """获取当前数据"""
-        return self.text_display.toPlainText()
+        return '\n'.join(self.lines.line_text(line, None)
+                         for line in range(self.lines.first_line, self.lines.next_line))
     
     def set_data(self, data):
         """设置数据"""
-        self.text_display.setPlainText(data)
+        self.lines.clear()
+        self.hex_rows.clear()
+        self.lines.append(data.encode('utf-8'))
+        self._update_display()
         self.receive_count = len(data.encode('utf-8'))
         self.receive_count_label.setText(f"接收字节数: {self.receive_count}")
     
@@ -597,14 +690,12 @@ class ReceivedDataWindow(QMainWindow):
         # 设置窗口关闭状态
         self.is_window_open = False
         
-        # 清空显示内容
-        self.text_display.clear()
-        
-        # 清空所有缓冲区
-        self.data_buffer = ""
-        self.pause_buffer.clear()
-        self.display_lines.clear()
-        self.current_chars = 0
+        # 清空所有缓冲区和显示内容
+        self.receive_ring.clear()
+        self.lines.clear()
+        self.hex_rows.clear()
+        self.arrival_marks.clear()
+        self.model.refresh()
         self.parsed_data_buffer = ""
         
         # 重置状态
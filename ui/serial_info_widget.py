@@ -66,6 +66,12 @@ class SerialInfoWidget(QWidget):
         status_layout.addWidget(self.status_label)
         status_layout.addStretch()
         
+        # 丢弃计数标签（接收路径过载时被丢弃的数据）
+        self.drop_label = QLabel()
+        self.drop_label.setToolTip("界面或磁盘处理不过来时，按溢出策略被丢弃的数据")
+        status_layout.addWidget(self.drop_label)
+        self.update_drop_statistics(0, 0)
+        
         group_layout.addLayout(status_layout)
         
         # 按钮区域
@@ -214,6 +220,26 @@ class SerialInfoWidget(QWidget):
             """)
         self.update_button_states()
     
+    def update_drop_statistics(self, dropped_bytes, dropped_frames):
+        """
+        更新丢弃计数
+        
+        Args:
+            dropped_bytes: 丢弃的字节数
+            dropped_frames: 丢弃的帧数（数据块/批次）
+        """
+        self.drop_label.setText(f"丢弃: {dropped_bytes} 字节 / {dropped_frames} 帧")
+        # 有数据被丢弃时以红色突出显示
+        color = "#dc3545" if dropped_bytes or dropped_frames else "#6c757d"
+        self.drop_label.setStyleSheet(f"""
+            QLabel {{
+                font-size: 12px;
+                color: {color};
+                background-color: transparent;
+                border: none;
+            }}
+        """)
+    
     def update_button_states(self):
         """更新按钮状态"""
         if self.is_connected:
@@ -1,6 +1,13 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGroupBox, 
                              QLabel, QCheckBox, QPushButton, QSpinBox, QComboBox)
 from PyQt6.QtCore import pyqtSignal
+from ui.settings_utils import (get_flush_policy_options, parse_flush_policy,
+                               get_save_format_options, parse_save_format,
+                               get_compression_options, parse_compression,
+                               get_compression_mode_options, parse_compression_mode,
+                               get_rotation_interval_options, parse_rotation_interval,
+                               get_cleanup_action_options, parse_cleanup_action,
+                               get_line_delimiter_options, parse_line_delimiter)
 
 
 class SettingsPage(QWidget):
@@ -224,11 +231,206 @@ class SettingsPage(QWidget):
         file_size_layout.addStretch()
         serial_save_layout.addLayout(file_size_layout)
         
+        # 文件切换：按大小和/或按时间
+        self.rotate_by_size_check = QCheckBox("文件超过大小限制时切换新文件")
+        self.rotate_by_size_check.setChecked(True)  # 默认启用
+        self.rotate_by_size_check.setStyleSheet(self.auto_save_serial_check.styleSheet())
+        self.rotate_by_size_check.toggled.connect(self.on_setting_changed)
+        serial_save_layout.addWidget(self.rotate_by_size_check)
+        
+        rotation_layout = QHBoxLayout()
+        rotation_label = QLabel("按时间切换文件:")
+        rotation_label.setStyleSheet(file_size_label.styleSheet())
+        rotation_layout.addWidget(rotation_label)
+        
+        self.rotation_interval_combo = QComboBox()
+        self.rotation_interval_combo.addItems(get_rotation_interval_options())
+        self.rotation_interval_combo.setCurrentText("不按时间切换")  # 默认选择
+        self.rotation_interval_combo.currentTextChanged.connect(self.on_setting_changed)
+        rotation_layout.addWidget(self.rotation_interval_combo)
+        rotation_layout.addStretch()
+        serial_save_layout.addLayout(rotation_layout)
+        
+        # 旧日志清理：保留天数和所有串口共用的磁盘配额
+        retention_layout = QHBoxLayout()
+        retention_label = QLabel("日志保留天数:")
+        retention_label.setStyleSheet(file_size_label.styleSheet())
+        retention_layout.addWidget(retention_label)
+        
+        self.retention_days = QSpinBox()
+        self.retention_days.setRange(0, 3650)
+        self.retention_days.setValue(0)
+        self.retention_days.setSpecialValueText("永久保留")  # 0表示不按时间清理
+        self.retention_days.setSuffix(" 天")
+        self.retention_days.setStyleSheet(self.file_size_limit.styleSheet())
+        # 编辑完成（回车或失去焦点）后才应用，输入过程中的中间值不会触发清理
+        self.retention_days.setKeyboardTracking(False)
+        self.retention_days.editingFinished.connect(self.on_setting_changed)
+        retention_layout.addWidget(self.retention_days)
+        retention_layout.addStretch()
+        serial_save_layout.addLayout(retention_layout)
+        
+        quota_layout = QHBoxLayout()
+        quota_label = QLabel("日志磁盘配额(GB):")
+        quota_label.setStyleSheet(file_size_label.styleSheet())
+        quota_layout.addWidget(quota_label)
+        
+        self.disk_quota = QSpinBox()
+        self.disk_quota.setRange(0, 100000)
+        self.disk_quota.setValue(0)
+        self.disk_quota.setSpecialValueText("不限制")  # 0表示不限制
+        self.disk_quota.setSuffix(" GB")
+        self.disk_quota.setStyleSheet(self.file_size_limit.styleSheet())
+        # 同上，编辑完成后才应用
+        self.disk_quota.setKeyboardTracking(False)
+        self.disk_quota.editingFinished.connect(self.on_setting_changed)
+        quota_layout.addWidget(self.disk_quota)
+        quota_layout.addStretch()
+        serial_save_layout.addLayout(quota_layout)
+        
+        cleanup_layout = QHBoxLayout()
+        cleanup_label = QLabel("超过保留天数的日志:")
+        cleanup_label.setStyleSheet(file_size_label.styleSheet())
+        cleanup_layout.addWidget(cleanup_label)
+        
+        self.cleanup_action_combo = QComboBox()
+        self.cleanup_action_combo.addItems(get_cleanup_action_options())
+        self.cleanup_action_combo.setCurrentText("删除")  # 默认选择
+        self.cleanup_action_combo.currentTextChanged.connect(self.on_setting_changed)
+        cleanup_layout.addWidget(self.cleanup_action_combo)
+        cleanup_layout.addStretch()
+        serial_save_layout.addLayout(cleanup_layout)
+        
+        # 清理说明：归档不释放磁盘空间
+        cleanup_desc = QLabel("移动到archive目录不会释放磁盘空间：归档的日志同样计入磁盘配额，"
+                              "超出配额时从最旧的日志（包括已归档的）开始删除")
+        cleanup_desc.setWordWrap(True)
+        cleanup_desc.setStyleSheet("""
+            QLabel {
+                font-size: 12px;
+                color: #666666;
+                background-color: transparent;
+                border: none;
+                padding: 0px;
+                margin: 0px;
+            }
+        """)
+        serial_save_layout.addWidget(cleanup_desc)
+        
+        # 保存格式：原始字节按收到的字节原样保存，并附带时间索引
+        save_format_layout = QHBoxLayout()
+        save_format_label = QLabel("保存格式:")
+        save_format_label.setStyleSheet(file_size_label.styleSheet())
+        save_format_layout.addWidget(save_format_label)
+        
+        self.save_format_combo = QComboBox()
+        self.save_format_combo.addItems(get_save_format_options())
+        self.save_format_combo.setCurrentText("文本记录(.txt)")  # 默认选择
+        self.save_format_combo.setStyleSheet("""
+            QComboBox {
+                border: 1px solid #d0d0d0;
+                border-radius: 6px;
+                padding: 8px 12px;
+                background-color: white;
+                font-size: 14px;
+                color: #333333;
+                min-width: 150px;
+            }
+            QComboBox:hover {
+                border: 2px solid #2196F3;
+            }
+            QComboBox:focus {
+                border: 2px solid #1976D2;
+            }
+        """)
+        self.save_format_combo.currentTextChanged.connect(self.on_setting_changed)
+        self.rotation_interval_combo.setStyleSheet(self.save_format_combo.styleSheet())
+        self.cleanup_action_combo.setStyleSheet(self.save_format_combo.styleSheet())
+        save_format_layout.addWidget(self.save_format_combo)
+        save_format_layout.addStretch()
+        serial_save_layout.addLayout(save_format_layout)
+        
+        # 压缩方式和压缩等级
+        compression_layout = QHBoxLayout()
+        compression_label = QLabel("压缩方式:")
+        compression_label.setStyleSheet(file_size_label.styleSheet())
+        compression_layout.addWidget(compression_label)
+        
+        self.compression_combo = QComboBox()
+        self.compression_combo.addItems(get_compression_options())
+        self.compression_combo.setCurrentText("不压缩")  # 默认选择
+        self.compression_combo.setStyleSheet(self.save_format_combo.styleSheet())
+        self.compression_combo.currentTextChanged.connect(self.on_setting_changed)
+        compression_layout.addWidget(self.compression_combo)
+        
+        self.compression_level = QSpinBox()
+        self.compression_level.setRange(1, 9)
+        self.compression_level.setValue(6)
+        self.compression_level.setPrefix("等级 ")
+        self.compression_level.setStyleSheet(self.file_size_limit.styleSheet())
+        self.compression_level.valueChanged.connect(self.on_setting_changed)
+        compression_layout.addWidget(self.compression_level)
+        compression_layout.addStretch()
+        serial_save_layout.addLayout(compression_layout)
+        
+        # 压缩时机：后台压缩时写入路径最快，文件关闭后才压缩
+        compression_mode_layout = QHBoxLayout()
+        compression_mode_label = QLabel("压缩时机:")
+        compression_mode_label.setStyleSheet(file_size_label.styleSheet())
+        compression_mode_layout.addWidget(compression_mode_label)
+        
+        self.compression_mode_combo = QComboBox()
+        self.compression_mode_combo.addItems(get_compression_mode_options())
+        self.compression_mode_combo.setCurrentText("写入时压缩")  # 默认选择
+        self.compression_mode_combo.setStyleSheet(self.save_format_combo.styleSheet())
+        self.compression_mode_combo.currentTextChanged.connect(self.on_setting_changed)
+        compression_mode_layout.addWidget(self.compression_mode_combo)
+        compression_mode_layout.addStretch()
+        serial_save_layout.addLayout(compression_mode_layout)
+        
         app_settings_layout.addWidget(serial_save_group)
         
-        # 自动保存间隔
+        # 保存文件刷新策略：数据先写入大块缓冲区，按策略刷新到文件
+        flush_policy_layout = QHBoxLayout()
+        flush_policy_label = QLabel("保存刷新策略:")
+        flush_policy_label.setStyleSheet("""
+            QLabel {
+                font-size: 14px;
+                color: #333333;
+                background-color: transparent;
+                border: none;
+            }
+        """)
+        flush_policy_layout.addWidget(flush_policy_label)
+        
+        self.flush_policy_combo = QComboBox()
+        self.flush_policy_combo.addItems(get_flush_policy_options())
+        self.flush_policy_combo.setCurrentText("按时间间隔刷新")  # 默认选择
+        self.flush_policy_combo.setStyleSheet("""
+            QComboBox {
+                border: 1px solid #d0d0d0;
+                border-radius: 6px;
+                padding: 8px 12px;
+                background-color: white;
+                font-size: 14px;
+                color: #333333;
+                min-width: 150px;
+            }
+            QComboBox:hover {
+                border: 2px solid #2196F3;
+            }
+            QComboBox:focus {
+                border: 2px solid #1976D2;
+            }
+        """)
+        self.flush_policy_combo.currentTextChanged.connect(self.on_setting_changed)
+        flush_policy_layout.addWidget(self.flush_policy_combo)
+        flush_policy_layout.addStretch()
+        app_settings_layout.addLayout(flush_policy_layout)
+        
+        # 自动保存间隔（按时间间隔刷新的间隔）
         auto_save_layout = QHBoxLayout()
-        auto_save_label = QLabel("自动保存间隔(分钟):")
+        auto_save_label = QLabel("自动保存间隔(秒):")
         auto_save_label.setStyleSheet("""
             QLabel {
                 font-size: 14px;
@@ -241,7 +443,7 @@ class SettingsPage(QWidget):
         
         self.auto_save_interval = QSpinBox()
         self.auto_save_interval.setRange(1, 60)
-        self.auto_save_interval.setValue(5)
+        self.auto_save_interval.setValue(1)
         self.auto_save_interval.setStyleSheet("""
             QSpinBox {
                 border: 1px solid #d0d0d0;
@@ -268,6 +470,70 @@ class SettingsPage(QWidget):
         auto_save_layout.addStretch()
         app_settings_layout.addLayout(auto_save_layout)
         
+        # 按数据量刷新的阈值
+        flush_bytes_layout = QHBoxLayout()
+        flush_bytes_label = QLabel("刷新数据量(KB):")
+        flush_bytes_label.setStyleSheet(auto_save_label.styleSheet())
+        flush_bytes_layout.addWidget(flush_bytes_label)
+        
+        self.flush_bytes = QSpinBox()
+        self.flush_bytes.setRange(4, 65536)
+        self.flush_bytes.setValue(1024)
+        self.flush_bytes.setSuffix(" KB")
+        self.flush_bytes.setStyleSheet(self.auto_save_interval.styleSheet())
+        self.flush_bytes.valueChanged.connect(self.on_setting_changed)
+        flush_bytes_layout.addWidget(self.flush_bytes)
+        flush_bytes_layout.addStretch()
+        app_settings_layout.addLayout(flush_bytes_layout)
+        
+        # fsync间隔
+        fsync_layout = QHBoxLayout()
+        fsync_label = QLabel("同步到磁盘间隔(秒):")
+        fsync_label.setStyleSheet(auto_save_label.styleSheet())
+        fsync_layout.addWidget(fsync_label)
+        
+        self.fsync_interval = QSpinBox()
+        self.fsync_interval.setRange(0, 600)
+        self.fsync_interval.setValue(0)
+        self.fsync_interval.setSpecialValueText("不同步")  # 0表示不调用fsync
+        self.fsync_interval.setStyleSheet(self.auto_save_interval.styleSheet())
+        self.fsync_interval.valueChanged.connect(self.on_setting_changed)
+        fsync_layout.addWidget(self.fsync_interval)
+        fsync_layout.addStretch()
+        app_settings_layout.addLayout(fsync_layout)
+        
+        # 持久模式提交点间隔
+        commit_layout = QHBoxLayout()
+        commit_label = QLabel("提交点间隔(秒):")
+        commit_label.setStyleSheet(auto_save_label.styleSheet())
+        commit_layout.addWidget(commit_label)
+        
+        self.commit_interval = QSpinBox()
+        self.commit_interval.setRange(0, 600)
+        self.commit_interval.setValue(0)
+        self.commit_interval.setSpecialValueText("不启用")  # 0表示不写入提交点
+        self.commit_interval.setStyleSheet(self.auto_save_interval.styleSheet())
+        self.commit_interval.valueChanged.connect(self.on_setting_changed)
+        commit_layout.addWidget(self.commit_interval)
+        commit_layout.addStretch()
+        app_settings_layout.addLayout(commit_layout)
+        
+        # 刷新策略说明
+        flush_policy_desc = QLabel("刷新越频繁数据越不易丢失，但磁盘写入次数越多；同步到磁盘可防止断电丢失数据，但开销较大；"
+                                   "启用提交点后程序异常退出时，下次启动会自动修复未正常关闭的日志文件")
+        flush_policy_desc.setWordWrap(True)
+        flush_policy_desc.setStyleSheet("""
+            QLabel {
+                font-size: 12px;
+                color: #666666;
+                background-color: transparent;
+                border: none;
+                padding: 0px;
+                margin: 0px;
+            }
+        """)
+        app_settings_layout.addWidget(flush_policy_desc)
+        
         layout.addWidget(app_settings_group)
         
         # 显示设置组
@@ -467,6 +733,37 @@ class SettingsPage(QWidget):
         """)
         display_settings_layout.addWidget(update_interval_desc)
         
+        # 接收窗口保留的行数
+        scrollback_layout = QHBoxLayout()
+        scrollback_label = QLabel("接收窗口保留行数:")
+        scrollback_label.setStyleSheet(update_interval_label.styleSheet())
+        scrollback_layout.addWidget(scrollback_label)
+        
+        self.scrollback_lines = QSpinBox()
+        self.scrollback_lines.setRange(1000, 5000000)
+        self.scrollback_lines.setSingleStep(10000)
+        self.scrollback_lines.setValue(100000)
+        self.scrollback_lines.setStyleSheet(self.auto_save_interval.styleSheet())
+        self.scrollback_lines.valueChanged.connect(self.on_setting_changed)
+        scrollback_layout.addWidget(self.scrollback_lines)
+        scrollback_layout.addStretch()
+        display_settings_layout.addLayout(scrollback_layout)
+        
+        # 接收窗口分行方式
+        delimiter_layout = QHBoxLayout()
+        delimiter_label = QLabel("接收数据分行方式:")
+        delimiter_label.setStyleSheet(update_interval_label.styleSheet())
+        delimiter_layout.addWidget(delimiter_label)
+        
+        self.line_delimiter_combo = QComboBox()
+        self.line_delimiter_combo.addItems(get_line_delimiter_options())
+        self.line_delimiter_combo.setCurrentText("换行 \\n (LF)")  # 默认选择
+        self.line_delimiter_combo.setStyleSheet(self.update_interval_combo.styleSheet())
+        self.line_delimiter_combo.currentTextChanged.connect(self.on_setting_changed)
+        delimiter_layout.addWidget(self.line_delimiter_combo)
+        delimiter_layout.addStretch()
+        display_settings_layout.addLayout(delimiter_layout)
+        
         layout.addWidget(display_settings_group)
         
         # 控制按钮
@@ -507,11 +804,26 @@ class SettingsPage(QWidget):
             'save_history': self.save_history_check.isChecked(),
             'auto_save_serial': self.auto_save_serial_check.isChecked(),
             'file_size_limit': self.file_size_limit.value(),
+            'rotate_by_size': self.rotate_by_size_check.isChecked(),
+            'rotation_interval': parse_rotation_interval(self.rotation_interval_combo.currentText()),
+            'retention_days': self.retention_days.value(),
+            'disk_quota_mb': self.disk_quota.value() * 1024,
+            'cleanup_action': parse_cleanup_action(self.cleanup_action_combo.currentText()),
+            'save_format': parse_save_format(self.save_format_combo.currentText()),
+            'compression': parse_compression(self.compression_combo.currentText()),
+            'compression_level': self.compression_level.value(),
+            'compression_mode': parse_compression_mode(self.compression_mode_combo.currentText()),
             'auto_save_interval': self.auto_save_interval.value(),
+            'flush_policy': parse_flush_policy(self.flush_policy_combo.currentText()),
+            'flush_bytes_kb': self.flush_bytes.value(),
+            'fsync_interval': self.fsync_interval.value(),
+            'commit_interval': self.commit_interval.value(),
             'font_size': int(self.font_size_combo.currentText()),
             'show_timestamp': self.show_timestamp_check.isChecked(),
             'show_direction': self.show_direction_check.isChecked(),
-            'update_interval': self.update_interval_combo.currentText()
+            'update_interval': self.update_interval_combo.currentText(),
+            'scrollback_lines': self.scrollback_lines.value(),
+            'line_delimiter': parse_line_delimiter(self.line_delimiter_combo.currentText())
         }
     
     def set_settings(self, settings):
@@ -528,9 +840,60 @@ class SettingsPage(QWidget):
         if 'file_size_limit' in settings:
             self.file_size_limit.setValue(settings['file_size_limit'])
         
+        if 'rotate_by_size' in settings:
+            self.rotate_by_size_check.setChecked(settings['rotate_by_size'])
+        
+        if 'rotation_interval' in settings:
+            for option in get_rotation_interval_options():
+                if parse_rotation_interval(option) == settings['rotation_interval']:
+                    self.rotation_interval_combo.setCurrentText(option)
+        
+        if 'retention_days' in settings:
+            self.retention_days.setValue(settings['retention_days'])
+        
+        if 'disk_quota_mb' in settings:
+            self.disk_quota.setValue(settings['disk_quota_mb'] // 1024)
+        
+        if 'cleanup_action' in settings:
+            for option in get_cleanup_action_options():
+                if parse_cleanup_action(option) == settings['cleanup_action']:
+                    self.cleanup_action_combo.setCurrentText(option)
+        
+        if 'save_format' in settings:
+            for option in get_save_format_options():
+                if parse_save_format(option) == settings['save_format']:
+                    self.save_format_combo.setCurrentText(option)
+        
+        if 'compression' in settings:
+            for option in get_compression_options():
+                if parse_compression(option) == settings['compression']:
+                    self.compression_combo.setCurrentText(option)
+        
+        if 'compression_level' in settings:
+            self.compression_level.setValue(settings['compression_level'])
+        
+        if 'compression_mode' in settings:
+            for option in get_compression_mode_options():
+                if parse_compression_mode(option) == settings['compression_mode']:
+                    self.compression_mode_combo.setCurrentText(option)
+        
         if 'auto_save_interval' in settings:
             self.auto_save_interval.setValue(settings['auto_save_interval'])
         
+        if 'flush_policy' in settings:
+            for option in get_flush_policy_options():
+                if parse_flush_policy(option) == settings['flush_policy']:
+                    self.flush_policy_combo.setCurrentText(option)
+        
+        if 'flush_bytes_kb' in settings:
+            self.flush_bytes.setValue(settings['flush_bytes_kb'])
+        
+        if 'fsync_interval' in settings:
+            self.fsync_interval.setValue(settings['fsync_interval'])
+        
+        if 'commit_interval' in settings:
+            self.commit_interval.setValue(settings['commit_interval'])
+        
         if 'font_size' in settings:
             self.font_size_combo.setCurrentText(str(settings['font_size']))
         
@@ -541,4 +904,12 @@ class SettingsPage(QWidget):
             self.show_direction_check.setChecked(settings['show_direction'])
         
         if 'update_interval' in settings:
-            self.update_interval_combo.setCurrentText(settings['update_interval']) 
\ No newline at end of file
+            self.update_interval_combo.setCurrentText(settings['update_interval'])
+        
+        if 'scrollback_lines' in settings:
+            self.scrollback_lines.setValue(settings['scrollback_lines'])
+        
+        if 'line_delimiter' in settings:
+            for option in get_line_delimiter_options():
+                if parse_line_delimiter(option) == settings['line_delimiter']:
+                    self.line_delimiter_combo.setCurrentText(option)
\ No newline at end of file
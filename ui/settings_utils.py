@@ -38,3 +38,236 @@ def get_update_interval_options():
         "慢速更新 (200ms)",
         "极慢更新 (500ms)"
     ]
+
+
+def parse_flush_policy(policy_text):
+    """
+    解析保存文件刷新策略设置文本，返回刷新策略
+    
+    Args:
+        policy_text (str): 刷新策略设置文本，如 "按时间间隔刷新"
+    
+    Returns:
+        str: 刷新策略 'always'、'bytes'、'interval' 或 'rotation'
+    """
+    policy_map = {
+        "每次写入都刷新": 'always',
+        "按数据量刷新": 'bytes',
+        "按时间间隔刷新": 'interval',
+        "仅切换文件时刷新": 'rotation'
+    }
+    
+    return policy_map.get(policy_text, 'interval')  # 默认按时间间隔刷新
+
+
+def get_flush_policy_options():
+    """
+    获取保存文件刷新策略选项列表
+    
+    Returns:
+        list: 刷新策略选项列表
+    """
+    return [
+        "每次写入都刷新",
+        "按数据量刷新",
+        "按时间间隔刷新",
+        "仅切换文件时刷新"
+    ]
+
+
+def parse_save_format(format_text):
+    """
+    解析串口数据保存格式设置文本，返回保存格式
+    
+    Args:
+        format_text (str): 保存格式设置文本，如 "文本记录(.txt)"
+    
+    Returns:
+        str: 保存格式 'text'、'raw'、'both' 或 'record'
+    """
+    format_map = {
+        "文本记录(.txt)": 'text',
+        "原始字节(.bin + .idx)": 'raw',
+        "原始字节 + 文本记录": 'both',
+        "收发记录日志(.rec)": 'record'
+    }
+    
+    return format_map.get(format_text, 'text')  # 默认文本记录
+
+
+def get_save_format_options():
+    """
+    获取串口数据保存格式选项列表
+    
+    Returns:
+        list: 保存格式选项列表
+    """
+    return [
+        "文本记录(.txt)",
+        "原始字节(.bin + .idx)",
+        "原始字节 + 文本记录",
+        "收发记录日志(.rec)"
+    ]
+
+
+def parse_compression(compression_text):
+    """
+    解析串口数据压缩方式设置文本，返回压缩方式
+    
+    Args:
+        compression_text (str): 压缩方式设置文本，如 "gzip"
+    
+    Returns:
+        str: 压缩方式 'none'、'gzip'、'zlib' 或 'lzma'
+    """
+    compression_map = {
+        "不压缩": 'none',
+        "gzip (.gz)": 'gzip',
+        "zlib (.zz)": 'zlib',
+        "lzma (.xz)": 'lzma'
+    }
+    
+    return compression_map.get(compression_text, 'none')  # 默认不压缩
+
+
+def get_compression_options():
+    """
+    获取串口数据压缩方式选项列表
+    
+    Returns:
+        list: 压缩方式选项列表
+    """
+    return [
+        "不压缩",
+        "gzip (.gz)",
+        "zlib (.zz)",
+        "lzma (.xz)"
+    ]
+
+
+def parse_compression_mode(mode_text):
+    """
+    解析压缩时机设置文本，返回压缩时机
+    
+    Args:
+        mode_text (str): 压缩时机设置文本，如 "写入时压缩"
+    
+    Returns:
+        str: 压缩时机 'stream' 或 'rotated'
+    """
+    mode_map = {
+        "写入时压缩": 'stream',
+        "文件关闭后后台压缩": 'rotated'
+    }
+    
+    return mode_map.get(mode_text, 'stream')  # 默认写入时压缩
+
+
+def get_compression_mode_options():
+    """
+    获取压缩时机选项列表
+    
+    Returns:
+        list: 压缩时机选项列表
+    """
+    return [
+        "写入时压缩",
+        "文件关闭后后台压缩"
+    ]
+
+
+def parse_rotation_interval(interval_text):
+    """
+    解析按时间切换文件设置文本，返回切换间隔
+    
+    Args:
+        interval_text (str): 切换间隔设置文本，如 "每小时"
+    
+    Returns:
+        str: 切换间隔 'none'、'hourly' 或 'daily'
+    """
+    interval_map = {
+        "不按时间切换": 'none',
+        "每小时": 'hourly',
+        "每天": 'daily'
+    }
+    
+    return interval_map.get(interval_text, 'none')  # 默认不按时间切换
+
+
+def get_rotation_interval_options():
+    """
+    获取按时间切换文件选项列表
+    
+    Returns:
+        list: 切换间隔选项列表
+    """
+    return [
+        "不按时间切换",
+        "每小时",
+        "每天"
+    ]
+
+
+def parse_cleanup_action(action_text):
+    """
+    解析旧日志处理方式设置文本，返回处理方式
+    
+    Args:
+        action_text (str): 处理方式设置文本，如 "删除"
+    
+    Returns:
+        str: 处理方式 'delete' 或 'archive'
+    """
+    action_map = {
+        "删除": 'delete',
+        "移动到archive目录": 'archive'
+    }
+    
+    return action_map.get(action_text, 'delete')  # 默认删除
+
+
+def get_cleanup_action_options():
+    """
+    获取旧日志处理方式选项列表
+    
+    Returns:
+        list: 处理方式选项列表
+    """
+    return [
+        "删除",
+        "移动到archive目录"
+    ]
+
+
+def parse_line_delimiter(delimiter_text):
+    """
+    解析接收窗口分行方式设置文本，返回行分隔符
+    
+    Args:
+        delimiter_text (str): 分行方式设置文本，如 "换行 \\n (LF)"
+    
+    Returns:
+        str: 行分隔符 'lf'、'crlf' 或 'cr'
+    """
+    delimiter_map = {
+        "换行 \\n (LF)": 'lf',
+        "回车换行 \\r\\n (CRLF)": 'crlf',
+        "回车 \\r (CR)": 'cr'
+    }
+    
+    return delimiter_map.get(delimiter_text, 'lf')  # 默认按换行分行
+
+
+def get_line_delimiter_options():
+    """
+    获取接收窗口分行方式选项列表
+    
+    Returns:
+        list: 分行方式选项列表
+    """
+    return [
+        "换行 \\n (LF)",
+        "回车换行 \\r\\n (CRLF)",
+        "回车 \\r (CR)"
+    ]